@@ -0,0 +1,93 @@
+"""
+FaxTriage AI — Page Image Encoder Benchmark
+
+Renders every page of the synthetic corpus once at 300 DPI (auto-cropped,
+as the pipeline sends them) and compares encode time and byte size for each
+encoder, plus which encoder the "auto" policy picks.
+
+Usage:
+    python scripts/benchmark_encoders.py
+    python scripts/benchmark_encoders.py --fax-dir data/synthetic-faxes/ --encoders png:1 png:6 png:9 webp jpeg:75 jpeg:85
+"""
+
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.backend.services.pdf_processor import (
+    EncodingPolicy,
+    autocrop_image,
+    get_encoder,
+    psnr,
+    _pixmap_to_image,
+)
+
+DEFAULT_ENCODERS = ["png:1", "png:6", "png:9", "webp", "jpeg:75", "jpeg:85", "jpeg:95"]
+
+
+def render_pages(fax_dir: Path, dpi: int, max_pages: int):
+    """Yield (label, PIL image) for the first max_pages pages of each PDF."""
+    for pdf_path in sorted(fax_dir.glob("*.pdf")):
+        doc = fitz.open(pdf_path)
+        for page_num in range(min(len(doc), max_pages)):
+            pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False)
+            img, _ = autocrop_image(_pixmap_to_image(pix))
+            yield f"{pdf_path.stem[:28]} p{page_num + 1}", img
+        doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page image encoders")
+    parser.add_argument("--fax-dir", default="data/synthetic-faxes/", help="Directory of PDFs")
+    parser.add_argument("--encoders", nargs="+", default=DEFAULT_ENCODERS, help="Encoder specs")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--max-pages", type=int, default=3, help="Pages per PDF (pipeline sends at most 5)")
+    args = parser.parse_args()
+
+    encoders = [get_encoder(spec) for spec in args.encoders]
+    auto = EncodingPolicy("auto")
+    totals = {e.name: [0, 0.0] for e in encoders}
+    totals["auto"] = [0, 0.0]
+    picks = Counter()
+    worst_psnr = {e.name: float("inf") for e in encoders if not e.lossless}
+
+    print(f"{'page':<34}" + "".join(f"{e.name:>12}" for e in encoders) + f"{'auto':>16}")
+    pages = 0
+    for label, img in render_pages(Path(args.fax_dir), args.dpi, args.max_pages):
+        pages += 1
+        row = f"{label:<34}"
+        for encoder in encoders:
+            start = time.perf_counter()
+            data = encoder.encode(img)
+            totals[encoder.name][0] += len(data)
+            totals[encoder.name][1] += time.perf_counter() - start
+            row += f"{len(data) // 1024:>10}KB"
+            if not encoder.lossless:
+                worst_psnr[encoder.name] = min(worst_psnr[encoder.name], psnr(img, data))
+
+        start = time.perf_counter()
+        data, media_type = auto.encode(img)
+        totals["auto"][0] += len(data)
+        totals["auto"][1] += time.perf_counter() - start
+        picks[media_type] += 1
+        row += f"{len(data) // 1024:>6}KB {media_type.split('/')[1]:<5}"
+        print(row)
+
+    print(f"\n{pages} pages")
+    print(f"{'encoder':<10}{'total KB':>12}{'avg KB':>10}{'avg ms':>10}{'min PSNR':>10}")
+    for name, (size, seconds) in totals.items():
+        quality = f"{worst_psnr[name]:>10.1f}" if name in worst_psnr else f"{'lossless':>10}"
+        if name == "auto":
+            quality = ""
+        print(f"{name:<10}{size // 1024:>12}{size / pages / 1024:>10.0f}{seconds / pages * 1000:>10.0f}{quality}")
+    print(f"\nauto picks: {dict(picks)}")
+
+
+if __name__ == "__main__":
+    main()
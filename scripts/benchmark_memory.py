@@ -0,0 +1,107 @@
+"""
+FaxTriage AI — Page Image Memory Benchmark
+
+Compares memory held by rendered pages when they are carried as base64
+strings (the old pipeline) versus raw PageImage bytes that are only
+base64-encoded when the request body is built.
+
+Each mode runs in its own subprocess so peak RSS is measured cleanly.
+All pages of the document are rendered, as bundle splitting and contact
+sheets may require.
+
+Usage:
+    python scripts/benchmark_memory.py
+    python scripts/benchmark_memory.py --pdf data/synthetic-faxes/10_chart_dump_40pages.pdf --encoder png
+"""
+
+import os
+import sys
+import json
+import base64
+import resource
+import argparse
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Measure real renders, not render cache hits (inherited by worker processes)
+os.environ["RENDER_CACHE_ENABLED"] = "false"
+
+DEFAULT_PDF = "data/synthetic-faxes/10_chart_dump_40pages.pdf"
+
+
+def run_mode(mode: str, pdf_path: str, encoder: str) -> dict:
+    """Render every page, hold them, then build a request body. Returns measurements."""
+    import fitz  # PyMuPDF
+    from src.backend.services.pdf_processor import EncodingPolicy, iter_page_images_pymupdf
+
+    with fitz.open(pdf_path) as doc:
+        page_numbers = list(range(len(doc)))
+
+    tracemalloc.start()
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    held = []
+    policy = EncodingPolicy(encoder)
+    for page in iter_page_images_pymupdf(pdf_path, page_numbers, encoding=policy):
+        if mode == "base64":
+            # Old pipeline: base64 string per page, bytes dropped immediately
+            held.append((base64.b64encode(page.data).decode("utf-8"), page.media_type))
+        else:
+            held.append(page)
+        del page
+
+    held_bytes = tracemalloc.get_traced_memory()[0]
+
+    # Request build + serialization, as the SDK does it
+    if mode == "base64":
+        content = [{"type": "image", "source": {"type": "base64", "media_type": mt, "data": b64}}
+                   for b64, mt in held]
+    else:
+        content = [{"type": "image", "source": {"type": "base64", "media_type": p.media_type,
+                                                "data": p.to_base64()}} for p in held]
+    body = json.dumps({"messages": [{"role": "user", "content": content}]})
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "pages": len(held),
+        "held_mb": held_bytes / 1e6,
+        "peak_traced_mb": peak / 1e6,
+        "body_mb": len(body) / 1e6,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_growth_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of base64 vs bytes page images")
+    parser.add_argument("--pdf", default=DEFAULT_PDF, help="PDF to render")
+    parser.add_argument("--encoder", default="png", help="Encoder spec (png, webp, jpeg:85, auto)")
+    parser.add_argument("--mode", choices=["base64", "bytes"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.pdf, args.encoder)))
+        return
+
+    results = []
+    for mode in ("base64", "bytes"):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", __file__, "--mode", mode, "--pdf", args.pdf, "--encoder", args.encoder],
+            capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{Path(args.pdf).name}, encoder={args.encoder}, {results[0]['pages']} pages\n")
+    print(f"{'mode':<8}{'held MB':>10}{'peak traced MB':>16}{'body MB':>10}{'peak RSS MB':>13}{'RSS growth MB':>15}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['held_mb']:>10.1f}{r['peak_traced_mb']:>16.1f}{r['body_mb']:>10.1f}"
+              f"{r['max_rss_mb']:>13.1f}{r['rss_growth_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+FaxTriage AI — OCR Pre-pass Benchmark
+
+Measures what the optional Tesseract pre-pass costs per document and, with
+--classify, what it saves: each PDF is classified from page images (the
+vision path) and, when every page's OCR is confident enough, from its OCR
+text plus a thumbnail. Net saving = vision API latency − (OCR time + OCR
+text API latency).
+
+Requires the tesseract binary; --classify also needs ANTHROPIC_API_KEY
+(two API calls per PDF that passes the confidence bar).
+
+Usage:
+    python scripts/benchmark_ocr.py
+    python scripts/benchmark_ocr.py --classify --min-confidence 85
+    python scripts/benchmark_ocr.py --fax-dir data/synthetic-faxes/ --files 11_illegible_physician_notes.pdf
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from statistics import mean
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Render in-process and uncached; this script is a measurement, not a server
+os.environ.setdefault("RENDER_POOL_ENABLED", "false")
+os.environ.setdefault("RENDER_CACHE_ENABLED", "false")
+
+from src.backend.config import settings
+from src.backend.services.classifier import classify_document
+from src.backend.services.ocr import ocr_pages, tesseract_available
+from src.backend.services.pdf_processor import (
+    EncodingPolicy,
+    get_page_count,
+    pdf_to_page_images,
+    render_contact_sheets,
+    select_pages_to_send,
+)
+
+
+def vision_path(pdf_path: str):
+    page_count = get_page_count(pdf_path)
+    page_numbers = select_pages_to_send(list(range(page_count)))
+    images, _ = pdf_to_page_images(
+        pdf_path,
+        page_numbers=page_numbers,
+        autocrop_padding=settings.autocrop_padding_px,
+        encoding=EncodingPolicy(settings.image_encoder, settings.image_encoder_candidates,
+                                settings.image_encoder_min_psnr)
+    )
+    return classify_document(images, page_count, page_numbers=page_numbers)
+
+
+def ocr_path(pdf_path: str, page_texts):
+    thumbnails = render_contact_sheets(
+        pdf_path, page_numbers=[0], thumb_width=settings.text_path_thumbnail_width, columns=1
+    )
+    return classify_document(thumbnails, len(page_texts), page_texts=page_texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pre-pass against the vision path")
+    parser.add_argument("--fax-dir", default="data/synthetic-faxes/", help="Directory of PDFs")
+    parser.add_argument("--files", nargs="*", help="Specific PDF filenames within --fax-dir")
+    parser.add_argument("--dpi", type=int, default=settings.ocr_dpi, help="OCR render DPI")
+    parser.add_argument("--min-confidence", type=float, default=settings.ocr_min_confidence,
+                        help="Mean word confidence (0-100) a page needs for the text path")
+    parser.add_argument("--classify", action="store_true", help="Also time both API paths")
+    args = parser.parse_args()
+
+    if not tesseract_available(settings.ocr_tesseract_cmd):
+        print(f"ERROR: tesseract binary not found ({settings.ocr_tesseract_cmd}).")
+        sys.exit(1)
+    if args.classify and not settings.anthropic_api_key:
+        print("ERROR: ANTHROPIC_API_KEY is not set.")
+        sys.exit(1)
+
+    fax_dir = Path(args.fax_dir)
+    pdfs = [fax_dir / name for name in args.files] if args.files else sorted(fax_dir.glob("*.pdf"))
+
+    rows = []
+    print(f"{'file':<38}{'pages':>6}{'ocr ms':>8}{'min conf':>10}{'route':>8}"
+          f"{'vision ms':>11}{'ocr api ms':>12}{'saved ms':>10}{'type match':>12}")
+    for pdf_path in pdfs:
+        page_count = get_page_count(str(pdf_path))
+        pages = list(range(min(page_count, settings.ocr_max_pages)))
+
+        started = time.perf_counter()
+        page_texts = ocr_pages(
+            str(pdf_path), pages,
+            dpi=args.dpi,
+            lang=settings.ocr_lang,
+            min_confidence=args.min_confidence,
+            tesseract_cmd=settings.ocr_tesseract_cmd,
+            page_timeout=settings.ocr_page_timeout_seconds,
+            max_chars_per_page=settings.text_path_max_chars_per_page
+        )
+        ocr_ms = int((time.perf_counter() - started) * 1000)
+        confidences = [p.confidence for p in page_texts if p.confidence is not None]
+        min_conf = min(confidences) if confidences else 0.0
+        usable = page_count <= settings.ocr_max_pages and all(p.usable for p in page_texts)
+        row = {"ocr_ms": ocr_ms, "pages": len(pages), "usable": usable}
+
+        line = (f"{pdf_path.name:<38}{page_count:>6}{ocr_ms:>8}{min_conf:>10.1f}"
+                f"{'text' if usable else 'vision':>8}")
+        if args.classify and usable:
+            vision = vision_path(str(pdf_path))
+            text = ocr_path(str(pdf_path), page_texts)
+            row["saved_ms"] = vision.processing_time_ms - (ocr_ms + text.processing_time_ms)
+            row["agree"] = vision.document_type == text.document_type
+            line += (f"{vision.processing_time_ms:>11}{text.processing_time_ms:>12}"
+                     f"{row['saved_ms']:>10}{'✓' if row['agree'] else '✗':>12}")
+        print(line)
+        rows.append(row)
+
+    if not rows:
+        return
+
+    routed = [r for r in rows if r["usable"]]
+    total_pages = sum(r["pages"] for r in rows)
+    print(f"\n{len(rows)} documents, {total_pages} pages OCR'd")
+    print(f"  OCR time: {mean(r['ocr_ms'] for r in rows):.0f} ms/document, "
+          f"{sum(r['ocr_ms'] for r in rows) / max(total_pages, 1):.0f} ms/page")
+    print(f"  Text path at confidence ≥ {args.min_confidence:.0f}: {len(routed)}/{len(rows)} documents")
+
+    compared = [r for r in routed if "saved_ms" in r]
+    if compared:
+        print(f"  Net latency saved on text-path documents: {mean(r['saved_ms'] for r in compared):.0f} ms/document")
+        print(f"  Document type agreement with vision path: {sum(r['agree'] for r in compared)}/{len(compared)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+FaxTriage AI — Parallel Page Rendering Benchmark
+
+Renders every page of a PDF through the render worker pool with the page
+range split across 1..N workers, and reports wall time, speedup and
+parallel efficiency. Workers are started and warmed up before timing, so
+the numbers show steady-state server behavior, not process spawn cost.
+
+Usage:
+    python scripts/benchmark_parallel_render.py
+    python scripts/benchmark_parallel_render.py --pdf data/synthetic-faxes/10_chart_dump_40pages.pdf --max-workers 8 --encoder png
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Measure real renders, not render cache hits (inherited by worker processes)
+os.environ["RENDER_CACHE_ENABLED"] = "false"
+
+from src.backend.services.pdf_processor import EncodingPolicy, get_page_count, pdf_to_page_images
+from src.backend.services.render_pool import RenderPool, split_pages
+
+DEFAULT_PDF = "data/synthetic-faxes/10_chart_dump_40pages.pdf"
+
+
+def render_all(pool: RenderPool, pdf_path: str, page_numbers: list[int], workers: int, encoding) -> float:
+    """Render all pages split across `workers` chunks; returns wall seconds."""
+    chunks = split_pages(page_numbers, workers)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(chunks)) as dispatch:
+        results = list(dispatch.map(
+            lambda chunk: pool.run(pdf_to_page_images, pdf_path, page_numbers=chunk,
+                                   autocrop_padding=36, encoding=encoding),
+            chunks
+        ))
+    elapsed = time.perf_counter() - start
+
+    rendered = [img.page_number for images, _ in results for img in images]
+    assert rendered == page_numbers, "pages came back out of order"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intra-document parallel rendering")
+    parser.add_argument("--pdf", default=DEFAULT_PDF, help="PDF to render")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest worker count to try")
+    parser.add_argument("--encoder", default="auto", help="Encoder spec (png, webp, jpeg:85, auto)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per worker count (best is kept)")
+    args = parser.parse_args()
+
+    page_numbers = list(range(get_page_count(args.pdf)))
+    encoding = EncodingPolicy(args.encoder)
+    counts = sorted({1, *range(2, args.max_workers + 1, 2), args.max_workers})
+
+    print(f"{Path(args.pdf).name}: {len(page_numbers)} pages, encoder={args.encoder}, "
+          f"{os.cpu_count()} CPUs\n")
+    print(f"{'workers':>8}{'wall s':>10}{'pages/s':>10}{'speedup':>10}{'efficiency':>12}")
+
+    baseline = None
+    for workers in counts:
+        pool = RenderPool(workers=workers, timeout=600, max_rss_mb=None)
+        try:
+            # Warm up: spawn every worker and import the PDF libraries
+            render_all(pool, args.pdf, page_numbers[:workers], workers, encoding)
+            elapsed = min(render_all(pool, args.pdf, page_numbers, workers, encoding)
+                          for _ in range(args.repeat))
+        finally:
+            pool.close()
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>8}{elapsed:>10.1f}{len(page_numbers) / elapsed:>10.1f}"
+              f"{speedup:>10.2f}{speedup / workers:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
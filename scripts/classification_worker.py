@@ -0,0 +1,22 @@
+"""
+FaxTriage AI — Standalone Classification Worker
+
+Development shortcut for src/backend/worker.py (python -m src.backend.worker),
+which is what worker containers run.
+
+Usage:
+    python scripts/classification_worker.py
+    python scripts/classification_worker.py --workers 4 --express-workers 2
+    python scripts/classification_worker.py --metrics-port 9108
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.backend.worker import main
+
+
+if __name__ == "__main__":
+    main()
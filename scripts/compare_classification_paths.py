@@ -0,0 +1,118 @@
+"""
+FaxTriage AI — Image vs Text-Layer Classification Comparison
+
+Classifies every PDF in the corpus twice — once from rendered page images
+(the image path) and once from the extracted text layer plus a thumbnail
+(the text path) — and reports per-file agreement on document type,
+priority and flags, with input tokens and API latency for each path.
+
+Requires ANTHROPIC_API_KEY (makes two API calls per PDF).
+
+Usage:
+    python scripts/compare_classification_paths.py
+    python scripts/compare_classification_paths.py --fax-dir data/synthetic-faxes/ --files 01_lab_result_cbc.pdf
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+from statistics import mean
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Render in-process; this script is a measurement, not a server
+os.environ.setdefault("RENDER_POOL_ENABLED", "false")
+
+from src.backend.config import settings
+from src.backend.services.classifier import classify_document
+from src.backend.services.pdf_processor import (
+    EncodingPolicy,
+    extract_page_texts,
+    get_page_count,
+    pdf_to_page_images,
+    render_contact_sheets,
+    select_pages_to_send,
+)
+
+
+def image_path(pdf_path: str):
+    page_count = get_page_count(pdf_path)
+    page_numbers = select_pages_to_send(list(range(page_count)))
+    images, _ = pdf_to_page_images(
+        pdf_path,
+        page_numbers=page_numbers,
+        autocrop_padding=settings.autocrop_padding_px,
+        encoding=EncodingPolicy(settings.image_encoder, settings.image_encoder_candidates,
+                                settings.image_encoder_min_psnr)
+    )
+    return classify_document(images, page_count, page_numbers=page_numbers)
+
+
+def text_path(pdf_path: str):
+    page_texts = extract_page_texts(pdf_path, max_chars_per_page=settings.text_path_max_chars_per_page)
+    unusable = [p.page_number + 1 for p in page_texts if not p.usable]
+    if unusable:
+        return None, f"unusable text layer on pages {unusable}"
+    thumbnails = render_contact_sheets(
+        pdf_path, page_numbers=[0], thumb_width=settings.text_path_thumbnail_width, columns=1
+    )
+    return classify_document(thumbnails, len(page_texts), page_texts=page_texts), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare image and text-layer classification paths")
+    parser.add_argument("--fax-dir", default="data/synthetic-faxes/", help="Directory of PDFs")
+    parser.add_argument("--files", nargs="*", help="Specific PDF filenames within --fax-dir")
+    args = parser.parse_args()
+
+    if not settings.anthropic_api_key:
+        print("ERROR: ANTHROPIC_API_KEY is not set.")
+        sys.exit(1)
+
+    fax_dir = Path(args.fax_dir)
+    pdfs = [fax_dir / name for name in args.files] if args.files else sorted(fax_dir.glob("*.pdf"))
+
+    rows = []
+    print(f"{'file':<38}{'image type':<22}{'text type':<22}{'agree':<7}"
+          f"{'img tok':>9}{'txt tok':>9}{'img ms':>8}{'txt ms':>8}")
+    for pdf_path in pdfs:
+        image = image_path(str(pdf_path))
+        text, skipped = text_path(str(pdf_path))
+        if text is None:
+            print(f"{pdf_path.name:<38}{image.document_type:<22}{'— ' + skipped}")
+            continue
+
+        agree = {
+            "type": image.document_type == text.document_type,
+            "priority": image.priority == text.priority,
+            "flags": sorted(image.flags) == sorted(text.flags),
+        }
+        rows.append((image, text, agree))
+        marks = "".join("✓" if agree[k] else "✗" for k in ("type", "priority", "flags"))
+        print(f"{pdf_path.name:<38}{image.document_type:<22}{text.document_type:<22}{marks:<7}"
+              f"{image.token_usage['input_tokens']:>9}{text.token_usage['input_tokens']:>9}"
+              f"{image.processing_time_ms:>8}{text.processing_time_ms:>8}")
+        if not all(agree.values()):
+            print(f"{'':<38}image: {image.priority} {image.flags}  text: {text.priority} {text.flags}")
+
+    if not rows:
+        return
+
+    print(f"\n{len(rows)} documents compared (agreement columns: type, priority, flags)")
+    for key in ("type", "priority", "flags"):
+        agreed = sum(agree[key] for _, _, agree in rows)
+        print(f"  {key:<9} agreement: {agreed}/{len(rows)}")
+
+    image_tokens = mean(i.token_usage["input_tokens"] for i, _, _ in rows)
+    text_tokens = mean(t.token_usage["input_tokens"] for _, t, _ in rows)
+    image_ms = mean(i.processing_time_ms for i, _, _ in rows)
+    text_ms = mean(t.processing_time_ms for _, t, _ in rows)
+    print(f"\n{'path':<8}{'avg input tokens':>18}{'avg latency ms':>16}")
+    print(f"{'image':<8}{image_tokens:>18.0f}{image_ms:>16.0f}")
+    print(f"{'text':<8}{text_tokens:>18.0f}{text_ms:>16.0f}")
+    print(f"\ntext path uses {text_tokens / image_tokens:.0%} of the image path's input tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+FaxTriage AI — Local Trace Collector
+
+A stand-in for an OTLP collector during development: accepts OTLP/JSON
+span exports on POST /v1/traces, appends each span to a JSON lines file and
+prints a one-line summary per root span. Point the backend at it with
+TRACING_OTLP_ENDPOINT=http://localhost:4318/v1/traces.
+
+Usage:
+    python scripts/trace_collector.py
+    python scripts/trace_collector.py --port 4318 --output data/collected_traces.jsonl
+"""
+
+import json
+import sys
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.backend.config import PROJECT_ROOT
+
+
+def attribute_values(attributes: list[dict]) -> dict:
+    """OTLP [{key, value: {stringValue: ...}}] -> {key: value}"""
+    values = {}
+    for attribute in attributes:
+        value = attribute.get('value', {})
+        values[attribute['key']] = next(iter(value.values()), None)
+    return values
+
+
+def make_handler(output: Path, lock: threading.Lock):
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError:
+                self.send_error(400, "Expected OTLP/JSON")
+                return
+
+            lines = []
+            for resource_spans in body.get('resourceSpans', []):
+                resource = attribute_values(resource_spans.get('resource', {}).get('attributes', []))
+                for scope_spans in resource_spans.get('scopeSpans', []):
+                    for span in scope_spans.get('spans', []):
+                        lines.append(json.dumps({**span, 'resource': resource}))
+                        if 'parentSpanId' not in span:
+                            attributes = attribute_values(span.get('attributes', []))
+                            duration_ms = (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6
+                            print(f"{span['traceId']} {span['name']:<10} {duration_ms:>9.1f} ms  "
+                                  f"doc={attributes.get('document.id')} "
+                                  f"{attributes.get('sampling.reason', '')} "
+                                  f"{span.get('status', {}).get('message', '')}")
+            with lock:
+                with open(output, "a") as f:
+                    f.write("".join(line + "\n" for line in lines))
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass  # the span summaries are the log
+
+    return CollectorHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect OTLP/JSON trace exports into a local file")
+    parser.add_argument("--port", type=int, default=4318, help="Port to listen on (OTLP/HTTP default)")
+    parser.add_argument("--output", type=Path, default=PROJECT_ROOT / "data" / "collected_traces.jsonl",
+                        help="JSON lines file to append spans to")
+    args = parser.parse_args()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(args.output, threading.Lock()))
+    print(f"Collecting traces on http://0.0.0.0:{args.port}/v1/traces into {args.output}. Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+FaxTriage AI — Train the Local Pre-classifier
+
+Trains the hashed n-gram model from documents whose type a reviewer
+confirmed or reassigned, using their stored text layer / OCR text (or the
+PDF's text layer when nothing was stored). A deterministic holdout split
+produces the accuracy report — overall, per type, and for the predictions
+that would skip the API — then the model is refit on all examples and saved
+as the next version, which the server picks up on its next document.
+
+Usage:
+    python scripts/train_local_classifier.py
+    python scripts/train_local_classifier.py --dry-run --holdout 0.3
+    python scripts/train_local_classifier.py --list
+"""
+
+import os
+import sys
+import zlib
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Read PDFs in-process; this script is offline training, not a server
+os.environ.setdefault("RENDER_POOL_ENABLED", "false")
+
+from src.backend.config import settings
+from src.backend import database as db
+from src.backend.services.local_classifier import (
+    FEATURE_DIM,
+    LocalClassifier,
+    evaluate,
+    list_model_versions,
+    parse_skip_types,
+    train_local_classifier,
+)
+from src.backend.services.pdf_processor import PDFProcessingError, extract_page_texts
+
+
+def load_examples() -> list[tuple[int, str, str]]:
+    """(document id, text, document type) for every labeled document with text."""
+    examples = []
+    for doc in db.get_labeled_documents():
+        text = doc['text']
+        if not text and doc['file_path'] and Path(doc['file_path']).exists():
+            try:
+                pages = extract_page_texts(doc['file_path'], max_chars_per_page=settings.text_path_max_chars_per_page)
+                text = "\n".join(page.text for page in pages if page.usable)
+            except PDFProcessingError:
+                text = ""
+        if text:
+            examples.append((doc['id'], text, doc['document_type']))
+    return examples
+
+
+def in_holdout(doc_id: int, fraction: float) -> bool:
+    """Stable split: a document stays on the same side across retrains."""
+    return zlib.crc32(str(doc_id).encode()) % 1000 < fraction * 1000
+
+
+def print_report(report: dict):
+    print(f"  examples: {report['examples']}   accuracy: {report['accuracy']}")
+    print(f"  {'type':<26}{'support':>8}{'precision':>11}{'recall':>8}")
+    for label, row in report['per_type'].items():
+        precision = "—" if row['precision'] is None else f"{row['precision']:.2f}"
+        recall = "—" if row['recall'] is None else f"{row['recall']:.2f}"
+        print(f"  {label:<26}{row['support']:>8}{precision:>11}{recall:>8}")
+    skip = report['skip']
+    print(f"  skip API ({', '.join(skip['types'])} at ≥ {skip['threshold']}): "
+          f"{skip['count']} documents ({skip['coverage']:.0%}), precision {skip['precision']}")
+    print(f"  avg predict time: {report['avg_predict_us']} µs")
+
+
+def list_versions():
+    versions = list_model_versions(settings.local_classifier_dir)
+    if not versions:
+        print(f"No models in {settings.local_classifier_dir}")
+        return
+    pinned = settings.local_classifier_version or versions[-1][0]
+    print(f"{'version':<9}{'trained_at':<28}{'examples':>9}{'holdout acc':>13}{'skip prec':>11}")
+    for version, path in versions:
+        meta = LocalClassifier.load(path).metadata
+        holdout = meta.get('holdout') or {}
+        marker = " *" if version == pinned else ""
+        print(f"v{version:<8}{meta.get('trained_at', '?'):<28}{meta.get('examples', 0):>9}"
+              f"{str(holdout.get('accuracy')):>13}{str((holdout.get('skip') or {}).get('precision')):>11}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local pre-classifier from reviewed documents")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for the report")
+    parser.add_argument("--epochs", type=int, default=30, help="SGD epochs")
+    parser.add_argument("--dim", type=int, default=FEATURE_DIM, help="Hashed feature dimension")
+    parser.add_argument("--min-examples", type=int, default=20, help="Refuse to train on fewer examples")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, don't save a new version")
+    parser.add_argument("--list", action="store_true", help="List saved versions and their reports")
+    args = parser.parse_args()
+
+    if args.list:
+        list_versions()
+        return
+
+    db.init_database()
+    examples = load_examples()
+    if len(examples) < args.min_examples:
+        print(f"ERROR: {len(examples)} labeled documents with text (need {args.min_examples}).")
+        sys.exit(1)
+
+    skip_types = parse_skip_types(settings.local_classifier_skip_types)
+    threshold = settings.local_classifier_skip_threshold
+
+    train = [(text, label) for doc_id, text, label in examples if not in_holdout(doc_id, args.holdout)]
+    holdout = [(text, label) for doc_id, text, label in examples if in_holdout(doc_id, args.holdout)]
+    report = None
+    if train and holdout:
+        model = train_local_classifier([t for t, _ in train], [y for _, y in train], dim=args.dim, epochs=args.epochs)
+        report = evaluate(model, [t for t, _ in holdout], [y for _, y in holdout], skip_types, threshold)
+        print(f"Holdout report ({len(train)} train / {len(holdout)} held out):")
+        print_report(report)
+    else:
+        print("Not enough examples for a holdout split — no accuracy report.")
+
+    if args.dry_run:
+        return
+
+    final = train_local_classifier([t for _, t, _ in examples], [y for _, _, y in examples],
+                                   dim=args.dim, epochs=args.epochs)
+    final.metadata['holdout'] = report
+    path = final.save(settings.local_classifier_dir)
+    print(f"\nSaved v{final.version} ({len(examples)} examples) to {path}")
+    if settings.local_classifier_version:
+        print(f"Note: LOCAL_CLASSIFIER_VERSION pins v{settings.local_classifier_version}; unset it to use v{final.version}")
+
+
+if __name__ == "__main__":
+    main()
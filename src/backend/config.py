@@ -20,11 +20,227 @@ class Settings(BaseSettings):
     # Paths (env-configurable for production deployment)
     database_path: Path = Path(os.environ.get("DATABASE_PATH", str(PROJECT_ROOT / "data" / "faxtriage.db")))
     upload_dir: Path = Path(os.environ.get("UPLOAD_DIR", str(PROJECT_ROOT / "data" / "uploads")))
+    render_cache_dir: Path = Path(os.environ.get("RENDER_CACHE_DIR", str(PROJECT_ROOT / "data" / "render_cache")))
+    local_classifier_dir: Path = Path(os.environ.get("LOCAL_CLASSIFIER_DIR", str(PROJECT_ROOT / "data" / "models" / "local_classifier")))
     frontend_dist: Path = Path(os.environ.get("FRONTEND_DIST", str(PROJECT_ROOT / "src" / "frontend" / "dist")))
 
     # Claude model
     claude_model: str = "claude-sonnet-4-20250514"
 
+    # Preflight — structural check of each PDF before rendering that picks the
+    # processing route; text-layer PDFs render at a lower DPI, scans at their
+    # native resolution (clamped), and encrypted/corrupt/oversized files are
+    # rejected without rendering
+    preflight_enabled: bool = True
+    preflight_max_pages: int = 500
+    preflight_max_page_inches: float = 50.0
+    preflight_sample_pages: int = 12
+    preflight_text_dpi: int = 200
+    preflight_scan_min_dpi: int = 150
+    preflight_scan_max_dpi: int = 300
+
+    # Text-layer fast path — PDFs whose pages all carry a usable text layer are
+    # classified from the extracted text plus one small thumbnail of the first
+    # page, without rendering; longer text than text_path_max_chars uses images.
+    # Off until scripts/compare_classification_paths.py shows the text path
+    # agrees with the image path on the corpus
+    text_path_enabled: bool = False
+    text_path_max_chars: int = 60000
+    text_path_max_chars_per_page: int = 8000
+    text_path_thumbnail: bool = True
+    text_path_thumbnail_width: int = 400
+
+    # OCR pre-pass (opt-in, needs the tesseract binary) — image-only faxes are
+    # OCR'd in the render pool; if every page reaches ocr_min_confidence (mean
+    # word confidence, 0-100) they take the text path, otherwise the vision path.
+    # OCR text is stored for search either way.
+    ocr_enabled: bool = False
+    ocr_tesseract_cmd: str = "tesseract"
+    ocr_lang: str = "eng"
+    ocr_dpi: int = 300
+    ocr_min_confidence: float = 80.0
+    ocr_max_pages: int = 10
+    ocr_page_timeout_seconds: float = 30.0
+
+    # Local pre-classifier — hashed n-gram linear model over the text layer or
+    # OCR text, trained from reviewed documents (scripts/train_local_classifier.py).
+    # Predictions of a skip type at or above the skip threshold replace the API
+    # call; other predictions above the hint threshold are passed as a hint.
+    # local_classifier_version pins a model version (0 = newest)
+    local_classifier_enabled: bool = True
+    local_classifier_version: int = 0
+    local_classifier_skip_types: str = "marketing_junk"
+    local_classifier_skip_threshold: float = 0.97
+    local_classifier_hint_threshold: float = 0.6
+
+    # Sender fingerprints — senders are recognized by fax numbers in the
+    # transmission header, normalized header text, or a cover-page layout hash.
+    # A sender seen at least sender_min_observations times whose faxes were at
+    # least sender_auto_min_share one of sender_auto_types is classified without
+    # the API; other known senders get a narrowing hint and prefilled fields
+    sender_index_enabled: bool = True
+    practice_fax_number: str = "555-867-5309"
+    sender_min_observations: int = 3
+    sender_auto_types: str = "marketing_junk"
+    sender_auto_min_share: float = 0.9
+    sender_layout_max_distance: int = 24
+
+    # Contact sheets — labeled thumbnail montages of long faxes, sent alongside
+    # the full-resolution first pages so the model sees the whole document
+    contact_sheet_enabled: bool = True
+    contact_sheet_max_pages: int = 40
+    contact_sheet_pages_per_sheet: int = 20
+    contact_sheet_thumb_width: int = 300
+
+    # Page elision — blank pages (by ink coverage) and near-duplicate pages
+    # (by perceptual hash distance in bits) are dropped before rendering
+    page_filter_enabled: bool = True
+    blank_page_ink_threshold: float = 0.002
+    duplicate_page_max_distance: int = 10
+
+    # Auto-crop — trim empty margins and scanner edge shadows from rendered
+    # pages, keeping this much padding (pixels at 300 DPI) around the content
+    autocrop_enabled: bool = True
+    autocrop_padding_px: int = 36
+
+    # Page image encoding — "png", "png:<level>", "webp" (lossless),
+    # "jpeg:<quality>", or "auto" to keep the smallest of the candidates.
+    # Lossy candidates must reach image_encoder_min_psnr (dB) to be chosen.
+    image_encoder: str = "auto"
+    image_encoder_candidates: str = "png,webp,jpeg:85"
+    image_encoder_min_psnr: float = 42.0
+
+    # Bundle splitting — faxes flagged multi_document_bundle are segmented at
+    # detected document boundaries and each segment classified as a child document
+    bundle_split_enabled: bool = True
+    bundle_max_segments: int = 12
+    bundle_max_workers: int = 4
+
+    # Render worker pool — PDF parsing/rendering runs in separate processes.
+    # A task that exceeds the timeout or RSS cap is killed and surfaces as a
+    # PDF processing failure; workers are replaced after max_tasks renders
+    render_pool_enabled: bool = True
+    render_workers: int = 2
+    render_timeout_seconds: float = 60.0
+    render_max_rss_mb: int = 1024
+    # Worker virtual memory limit (RLIMIT_AS), enforced by the kernel between
+    # RSS polls; 0 = twice render_max_rss_mb
+    render_max_address_space_mb: int = 0
+    render_worker_max_tasks: int = 50
+    # Pages of one document are split across up to this many workers
+    # (1 = render sequentially in a single worker)
+    render_parallel_workers: int = 2
+    # Poppler processes used to re-render pages PyMuPDF produced black
+    pdf2image_max_threads: int = 2
+
+    # Render cache — rendered pages on disk, keyed by PDF content hash, page
+    # and render settings; least recently used entries evicted over budget
+    render_cache_enabled: bool = True
+    render_cache_max_mb: int = 512
+
+    # Classification queue — uploads are classified by worker threads in order
+    # of a provisional urgency score (0-100) sniffed from the first pages' text
+    # layer at ingest. Waiting documents gain queue_aging_per_minute points so
+    # low-urgency work can't starve; documents scoring at least
+    # express_lane_threshold also have express_lane_workers reserved for them.
+    # Disabled = classify inline in the upload request
+    classification_queue_enabled: bool = True
+    classification_workers: int = 6
+    express_lane_workers: int = 1
+    express_lane_threshold: int = 60
+    queue_aging_per_minute: float = 5.0
+    urgency_sniff_pages: int = 3
+    # How long an upload waits for its documents to be classified (?wait=true)
+    upload_wait_timeout_seconds: float = 300.0
+    # Leases — the queue lives in the database and workers in any process
+    # (uvicorn workers, python -m src.backend.worker) claim documents with
+    # a lease they heartbeat while working. Expired leases are reclaimed; a
+    # document is abandoned as an error after queue_max_attempts claims.
+    # 0 workers + 0 express workers = this process only ingests
+    queue_lease_seconds: float = 120.0
+    queue_heartbeat_seconds: float = 30.0
+    queue_max_attempts: int = 3
+    queue_poll_seconds: float = 1.0
+
+    # Pipeline — claimed documents flow through preflight → render → classify
+    # → persist stages, each with its own worker threads and a bounded queue
+    # (most urgent first) in front of it, so rendering one document overlaps
+    # the API call of another. The queue workers above are the ingest stage:
+    # each holds one claimed document in the pipeline.
+    # Disabled = each queue worker runs all stages in turn
+    pipeline_enabled: bool = True
+    pipeline_preflight_workers: int = 1
+    pipeline_render_workers: int = 2
+    pipeline_classify_workers: int = 4
+    pipeline_persist_workers: int = 1
+    pipeline_queue_size: int = 4
+
+    # Adaptive degradation — as the queue grows, documents are rendered and
+    # classified more cheaply (lower resolution, grayscale, fewer pages, then
+    # the economy model) instead of falling behind. Levels 1-3 are entered at
+    # the queue depths / oldest waits (seconds) listed; the level steps back
+    # down once both are below degradation_hysteresis × the thresholds for
+    # degradation_cooldown_seconds. Express-lane documents are never degraded
+    degradation_enabled: bool = True
+    degradation_depth_thresholds: str = "25,60,150"
+    degradation_wait_thresholds_seconds: str = "120,300,900"
+    degradation_interval_seconds: float = 10.0
+    degradation_cooldown_seconds: float = 120.0
+    degradation_hysteresis: float = 0.5
+    degradation_min_dpi: int = 100
+    degradation_economy_model: str = "claude-3-5-haiku-20241022"
+
+    # Admission control — uploads are refused before they are read: 503 when
+    # the shared queue would exceed admission_max_queue_depth documents or this
+    # process is handling admission_max_inflight_uploads upload requests, 429
+    # when a client (X-Client-Id header, else its address) would exceed its
+    # queued-document limit. admission_client_limits overrides that limit per
+    # client ("faxserver=300,scanner-2=20"). Retry-After is the time to drain
+    # the excess at the rate documents were classified over the drain window
+    admission_enabled: bool = True
+    admission_max_queue_depth: int = 500
+    admission_max_inflight_uploads: int = 16
+    admission_client_max_queued: int = 100
+    admission_client_limits: str = ""
+    admission_drain_window_seconds: int = 300
+    admission_max_retry_after_seconds: int = 600
+
+    # Metrics — Prometheus text exposition at GET /metrics, per process.
+    # Standalone classification workers serve it on metrics_worker_port (0 = off)
+    metrics_enabled: bool = True
+    metrics_worker_port: int = 0
+
+    # Tracing — spans per stage, render task and API attempt, tail-sampled:
+    # traces with an error or a root span over tracing_slow_ms are always
+    # kept, healthy ones at tracing_sample_rate. Kept spans are appended to
+    # tracing_file as JSON lines (rotated at tracing_file_max_mb, keeping
+    # tracing_file_backups old files), or POSTed as OTLP/JSON to
+    # tracing_otlp_endpoint (e.g. http://localhost:4318/v1/traces) when set.
+    # Spans carry ids, sizes and timings — never file names or document text,
+    # which may identify patients
+    tracing_enabled: bool = True
+    tracing_slow_ms: int = 30000
+    tracing_sample_rate: float = 0.01
+    tracing_file: Path = Path(os.environ.get("TRACING_FILE", str(PROJECT_ROOT / "data" / "traces.jsonl")))
+    tracing_file_max_mb: int = 50
+    tracing_file_backups: int = 3
+    tracing_otlp_endpoint: str = ""
+    tracing_service_name: str = "faxtriage"
+
+    # Profiling — statistical sampling profiler, off by default. A share of
+    # HTTP requests (profiling_request_rate, plus any sent with X-Profile: 1)
+    # and of documents (profiling_document_rate, one profile per processing
+    # stage, render worker processes included) have their stacks sampled
+    # every profiling_interval_ms. Profiles are collapsed-stack files
+    # (flamegraph.pl, speedscope) in profiling_dir, of which the newest
+    # profiling_max_profiles are kept; listed at GET /api/admin/profiles
+    profiling_enabled: bool = False
+    profiling_request_rate: float = 0.01
+    profiling_document_rate: float = 0.01
+    profiling_interval_ms: float = 5.0
+    profiling_dir: Path = Path(os.environ.get("PROFILING_DIR", str(PROJECT_ROOT / "data" / "profiles")))
+    profiling_max_profiles: int = 200
+
     # Upload limits
     max_file_size_mb: int = 50
 
@@ -1,16 +1,19 @@
 """
 FaxTriage AI — Database Setup and Connection
 
-SQLite database with documents and processing_log tables.
+SQLite database with documents, processing_log, page_texts and sender index tables.
 """
 import json
 import sqlite3
+import time
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Generator, Optional
 
 from .config import settings
+from .services import timing
+from .services.metrics import SQLITE_SECONDS
 
 
 # SQL Schema
@@ -41,11 +44,72 @@ CREATE TABLE IF NOT EXISTS processing_log (
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS page_texts (
+    document_id INTEGER REFERENCES documents(id),
+    page_number INTEGER,
+    source TEXT,
+    text TEXT,
+    confidence REAL,
+    PRIMARY KEY (document_id, page_number, source)
+);
+
+CREATE TABLE IF NOT EXISTS senders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    header_key TEXT,
+    layout_hash TEXT,
+    sending_facility TEXT,
+    fax_origin_number TEXT,
+    type_counts JSON,
+    observations INTEGER DEFAULT 0,
+    corrections INTEGER DEFAULT 0,
+    first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_seen DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sender_numbers (
+    number TEXT PRIMARY KEY,
+    sender_id INTEGER REFERENCES senders(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_senders_header_key ON senders(header_key);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
 CREATE INDEX IF NOT EXISTS idx_documents_type ON documents(document_type);
 CREATE INDEX IF NOT EXISTS idx_documents_priority ON documents(priority);
 CREATE INDEX IF NOT EXISTS idx_documents_upload_time ON documents(upload_time);
 CREATE INDEX IF NOT EXISTS idx_processing_log_document_id ON processing_log(document_id);
+CREATE INDEX IF NOT EXISTS idx_processing_log_event ON processing_log(event_type, timestamp);
+"""
+
+
+# Columns added after the initial schema. Applied in order on startup so
+# existing databases pick them up without a rebuild.
+MIGRATIONS = [
+    ("documents", "parent_id", "INTEGER REFERENCES documents(id)"),
+    ("documents", "page_start", "INTEGER"),
+    ("documents", "page_end", "INTEGER"),
+    ("documents", "pdf_category", "TEXT"),
+    ("documents", "processing_route", "TEXT"),
+    ("documents", "preflight", "JSON"),
+    ("documents", "sender_id", "INTEGER REFERENCES senders(id)"),
+    ("documents", "urgency_score", "INTEGER"),
+    # Classification queue: queued_at is set while a document waits for or
+    # holds a lease (epoch seconds, shared across processes)
+    ("documents", "queued_at", "REAL"),
+    ("documents", "lease_owner", "TEXT"),
+    ("documents", "lease_expires", "REAL"),
+    ("documents", "attempts", "INTEGER DEFAULT 0"),
+    # Uploading client (X-Client-Id header or address), for admission limits
+    ("documents", "client_id", "TEXT"),
+    # Per-stage timing breakdown: ingest, queue wait and processing
+    ("documents", "timings", "JSON"),
+    # Trace started at upload, continued by whichever process classifies it
+    ("documents", "trace_id", "TEXT"),
+]
+
+# Indexes on migrated columns (created after MIGRATIONS have run)
+MIGRATION_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_documents_parent_id ON documents(parent_id);
+CREATE INDEX IF NOT EXISTS idx_documents_queued_at ON documents(queued_at) WHERE queued_at IS NOT NULL;
 """
 
 
@@ -59,31 +123,68 @@ def init_database():
     """Initialize the database with schema."""
     settings.ensure_directories()
     conn = sqlite3.connect(settings.database_path)
+    # WAL lets API and worker processes read while one of them writes
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.executescript(SCHEMA)
+    apply_migrations(conn)
     conn.commit()
     conn.close()
 
 
+def apply_migrations(conn: sqlite3.Connection):
+    """Add any columns from MIGRATIONS that the database is missing."""
+    for table, column, column_type in MIGRATIONS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    conn.executescript(MIGRATION_INDEXES)
+
+
 @contextmanager
 def get_db() -> Generator[sqlite3.Connection, None, None]:
     """Get a database connection with dict row factory."""
+    started = time.perf_counter()
     conn = sqlite3.connect(settings.database_path)
     conn.row_factory = dict_factory
     try:
         yield conn
     finally:
         conn.close()
+        elapsed = time.perf_counter() - started
+        SQLITE_SECONDS.observe(elapsed)
+        # Charged to the document stage running in this thread, if any
+        timing.record('db', elapsed)
 
 
 # --- Document Operations ---
 
-def create_document(filename: str, file_path: str, page_count: Optional[int] = None) -> int:
-    """Create a new document record. Returns the document ID."""
+def create_document(
+    filename: str,
+    file_path: str,
+    page_count: Optional[int] = None,
+    parent_id: Optional[int] = None,
+    page_start: Optional[int] = None,
+    page_end: Optional[int] = None,
+    urgency_score: Optional[int] = None,
+    client_id: Optional[str] = None,
+    trace_id: Optional[str] = None
+) -> int:
+    """
+    Create a new document record. Returns the document ID.
+
+    parent_id/page_start/page_end are set for segments split out of a
+    multi-document bundle (page range is 1-based, inclusive, in the parent).
+    urgency_score is the provisional score sniffed at ingest (0-100);
+    client_id identifies the uploader for admission limits; trace_id the
+    trace its processing is recorded in.
+    """
     with get_db() as conn:
         cursor = conn.execute(
-            """INSERT INTO documents (filename, file_path, page_count, status)
-               VALUES (?, ?, ?, 'pending')""",
-            (filename, file_path, page_count)
+            """INSERT INTO documents
+               (filename, file_path, page_count, status, parent_id, page_start, page_end, urgency_score, client_id,
+                trace_id)
+               VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?)""",
+            (filename, file_path, page_count, parent_id, page_start, page_end, urgency_score, client_id, trace_id)
         )
         conn.commit()
         return cursor.lastrowid
@@ -106,11 +207,16 @@ def update_document_classification(
     priority: str,
     extracted_fields: dict,
     flags: list,
-    processing_time_ms: int
-):
-    """Update document with classification results."""
+    processing_time_ms: int,
+    lease_owner: Optional[str] = None
+) -> bool:
+    """
+    Update document with classification results. With lease_owner, only
+    while that worker still holds the document's queue lease — False if it
+    was lost, so a stale worker can't overwrite another's result.
+    """
     with get_db() as conn:
-        conn.execute(
+        cursor = conn.execute(
             """UPDATE documents SET
                status = 'classified',
                document_type = ?,
@@ -119,7 +225,7 @@ def update_document_classification(
                extracted_fields = ?,
                flags = ?,
                processing_time_ms = ?
-               WHERE id = ?""",
+               WHERE id = ?""" + (" AND lease_owner = ?" if lease_owner is not None else ""),
             (
                 document_type,
                 confidence,
@@ -128,7 +234,54 @@ def update_document_classification(
                 json.dumps(flags),
                 processing_time_ms,
                 doc_id
-            )
+            ) + ((lease_owner,) if lease_owner is not None else ())
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def update_document_preflight(doc_id: int, pdf_category: str, processing_route: str, preflight: dict):
+    """Record the preflight category, chosen route and measurements."""
+    with get_db() as conn:
+        conn.execute(
+            """UPDATE documents SET
+               pdf_category = ?,
+               processing_route = ?,
+               preflight = ?
+               WHERE id = ?""",
+            (pdf_category, processing_route, json.dumps(preflight), doc_id)
+        )
+        conn.commit()
+
+
+def update_document_timings(doc_id: int, section: str, timings: dict):
+    """
+    Set one section of the document's timing breakdown ('ingest', 'queue',
+    'processing'), keeping the sections earlier steps — possibly in other
+    processes — recorded. A retried step replaces its section.
+    """
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE documents SET timings = json_set(COALESCE(timings, '{}'), '$.' || ?, json(?)) WHERE id = ?",
+            (section, json.dumps(timings), doc_id)
+        )
+        conn.commit()
+
+
+def save_page_texts(doc_id: int, source: str, pages: list[dict]):
+    """
+    Store per-page text (e.g. OCR output) for search, replacing earlier text
+    from the same source.
+
+    Args:
+        pages: Dicts with page_number (1-based), text and confidence
+    """
+    with get_db() as conn:
+        conn.execute("DELETE FROM page_texts WHERE document_id = ? AND source = ?", (doc_id, source))
+        conn.executemany(
+            """INSERT INTO page_texts (document_id, page_number, source, text, confidence)
+               VALUES (?, ?, ?, ?, ?)""",
+            [(doc_id, page['page_number'], source, page['text'], page.get('confidence')) for page in pages]
         )
         conn.commit()
 
@@ -187,6 +340,10 @@ def get_document(doc_id: int) -> Optional[dict]:
             row['extracted_fields'] = json.loads(row['extracted_fields'])
         if row.get('flags'):
             row['flags'] = json.loads(row['flags'])
+        if row.get('preflight'):
+            row['preflight'] = json.loads(row['preflight'])
+        if row.get('timings'):
+            row['timings'] = json.loads(row['timings'])
     return row
 
 
@@ -194,6 +351,7 @@ def list_documents(
     status: Optional[str] = None,
     document_type: Optional[str] = None,
     priority: Optional[str] = None,
+    search: Optional[str] = None,
     sort_by: str = "upload_time",
     sort_order: str = "desc",
     limit: int = 50,
@@ -206,6 +364,7 @@ def list_documents(
         status: Filter by status (single value)
         document_type: Filter by document type (single value)
         priority: Filter by priority (supports comma-separated values, e.g., "high,critical")
+        search: Case-insensitive substring of the filename or stored page text
         sort_by: Field to sort by
         sort_order: Sort order ("asc" or "desc")
         limit: Maximum number of results
@@ -230,11 +389,19 @@ def list_documents(
             placeholders = ','.join('?' * len(priority_values))
             conditions.append(f"priority IN ({placeholders})")
             params.extend(priority_values)
+    if search:
+        pattern = f"%{search}%"
+        conditions.append(
+            "(filename LIKE ? OR id IN (SELECT document_id FROM page_texts WHERE text LIKE ?))"
+        )
+        params.extend([pattern, pattern])
 
     where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
 
     # Validate sort fields to prevent SQL injection
-    allowed_sort_fields = {'upload_time', 'document_type', 'priority', 'status', 'confidence', 'filename'}
+    allowed_sort_fields = {
+        'upload_time', 'document_type', 'priority', 'status', 'confidence', 'filename', 'urgency_score'
+    }
     if sort_by not in allowed_sort_fields:
         sort_by = 'upload_time'
     sort_order = 'DESC' if sort_order.lower() == 'desc' else 'ASC'
@@ -261,10 +428,187 @@ def list_documents(
             row['extracted_fields'] = json.loads(row['extracted_fields'])
         if row.get('flags'):
             row['flags'] = json.loads(row['flags'])
+        if row.get('preflight'):
+            row['preflight'] = json.loads(row['preflight'])
 
     return rows, total
 
 
+def get_child_documents(parent_id: int) -> list[dict]:
+    """Get documents split out of a bundle, in page order."""
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT * FROM documents
+               WHERE parent_id = ?
+               ORDER BY page_start ASC""",
+            (parent_id,)
+        ).fetchall()
+
+    for row in rows:
+        if row.get('extracted_fields'):
+            row['extracted_fields'] = json.loads(row['extracted_fields'])
+        if row.get('flags'):
+            row['flags'] = json.loads(row['flags'])
+        if row.get('preflight'):
+            row['preflight'] = json.loads(row['preflight'])
+    return rows
+
+
+# --- Classification Queue ---
+
+def enqueue_document(doc_id: int, now: float):
+    """Put a document in the classification queue (resets its attempts)."""
+    with get_db() as conn:
+        conn.execute(
+            """UPDATE documents SET
+               queued_at = ?, lease_owner = NULL, lease_expires = NULL, attempts = 0
+               WHERE id = ?""",
+            (now, doc_id)
+        )
+        conn.commit()
+
+
+def claim_document(
+    owner: str,
+    now: float,
+    lease_seconds: float,
+    max_attempts: int,
+    aging_per_minute: float,
+    min_urgency: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Atomically lease the most urgent claimable document: queued, not leased or
+    with an expired lease, and under max_attempts. Urgency ages by
+    aging_per_minute per minute queued. min_urgency restricts the claim to
+    the express lane.
+
+    Documents whose lease expired on their last allowed attempt are taken out
+    of the queue and marked as errors in the same transaction.
+
+    Returns:
+        The claimed row (id, file_path, urgency_score, queued_at, attempts), or None
+    """
+    with get_db() as conn:
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes
+        # can never select and lease the same row
+        conn.execute("BEGIN IMMEDIATE")
+        exhausted = conn.execute(
+            """SELECT id, attempts FROM documents
+               WHERE queued_at IS NOT NULL AND lease_expires < ? AND attempts >= ?""",
+            (now, max_attempts)
+        ).fetchall()
+        for row in exhausted:
+            message = f"Classification abandoned after {row['attempts']} attempts (lease expired)"
+            conn.execute(
+                """UPDATE documents SET
+                   status = 'error', notes = ?, queued_at = NULL, lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ?""",
+                (message, row['id'])
+            )
+            conn.execute(
+                "INSERT INTO processing_log (document_id, event_type, event_data) VALUES (?, 'queue_abandoned', ?)",
+                (row['id'], json.dumps({'attempts': row['attempts']}))
+            )
+
+        conditions = "queued_at IS NOT NULL AND (lease_expires IS NULL OR lease_expires < ?) AND attempts < ?"
+        params: list = [now, max_attempts]
+        if min_urgency is not None:
+            conditions += " AND COALESCE(urgency_score, 0) >= ?"
+            params.append(min_urgency)
+        row = conn.execute(
+            f"""SELECT id, file_path, urgency_score, queued_at, attempts, trace_id FROM documents
+                WHERE {conditions}
+                ORDER BY ? * queued_at / 60.0 - COALESCE(urgency_score, 0), id
+                LIMIT 1""",
+            params + [aging_per_minute]
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE documents SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (owner, now + lease_seconds, row['id'])
+            )
+            row['attempts'] += 1
+        conn.commit()
+    return row
+
+
+def renew_lease(doc_id: int, owner: str, expires: float) -> bool:
+    """Heartbeat: extend a lease this owner still holds. False if it was lost."""
+    with get_db() as conn:
+        cursor = conn.execute(
+            """UPDATE documents SET lease_expires = ?
+               WHERE id = ? AND lease_owner = ? AND queued_at IS NOT NULL""",
+            (expires, doc_id, owner)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def release_document(doc_id: int, owner: str) -> bool:
+    """Take a finished document out of the queue. False if the lease was lost."""
+    with get_db() as conn:
+        cursor = conn.execute(
+            """UPDATE documents SET queued_at = NULL, lease_owner = NULL, lease_expires = NULL
+               WHERE id = ? AND lease_owner = ?""",
+            (doc_id, owner)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def count_queued(client_id: Optional[str] = None) -> int:
+    """Documents in the classification queue (waiting or leased), optionally for one client."""
+    with get_db() as conn:
+        if client_id is None:
+            row = conn.execute("SELECT COUNT(*) as count FROM documents WHERE queued_at IS NOT NULL").fetchone()
+        else:
+            row = conn.execute(
+                "SELECT COUNT(*) as count FROM documents WHERE queued_at IS NOT NULL AND client_id = ?",
+                (client_id,)
+            ).fetchone()
+    return row['count']
+
+
+def count_classified_since(seconds: int) -> int:
+    """Documents classified in the last `seconds` seconds, by any process (the queue's drain)."""
+    with get_db() as conn:
+        row = conn.execute(
+            """SELECT COUNT(*) as count FROM processing_log
+               WHERE event_type = 'classify' AND timestamp >= datetime('now', ?)""",
+            (f"-{int(seconds)} seconds",)
+        ).fetchone()
+    return row['count']
+
+
+def is_queued(doc_id: int) -> bool:
+    """Whether a document is still waiting for or undergoing classification."""
+    with get_db() as conn:
+        row = conn.execute("SELECT queued_at FROM documents WHERE id = ?", (doc_id,)).fetchone()
+    return bool(row and row['queued_at'] is not None)
+
+
+def get_queue_depth(now: float, express_threshold: int) -> dict:
+    """
+    Queue contents per lane across all processes: documents waiting, leased
+    (in flight), and with an expired lease awaiting reclaim, plus the oldest
+    queued_at of the waiting ones.
+    """
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT
+                   CASE WHEN COALESCE(urgency_score, 0) >= ? THEN 'express' ELSE 'normal' END as lane,
+                   SUM(lease_expires IS NULL) as waiting,
+                   SUM(lease_expires >= ?) as in_flight,
+                   SUM(lease_expires < ?) as expired,
+                   MIN(CASE WHEN lease_expires IS NULL THEN queued_at END) as oldest_queued_at
+               FROM documents
+               WHERE queued_at IS NOT NULL
+               GROUP BY lane""",
+            (express_threshold, now, now)
+        ).fetchall()
+    return {row['lane']: row for row in rows}
+
+
 # --- Processing Log Operations ---
 
 def log_event(document_id: int, event_type: str, event_data: Optional[dict] = None):
@@ -359,3 +703,280 @@ def get_stats() -> dict:
         'avg_confidence': round(avg_conf, 3) if avg_conf else None,
         'avg_processing_time_ms': round(avg_time, 1) if avg_time else None,
     }
+
+
+def get_classification_path_stats() -> list[dict]:
+    """Classify calls, tokens and latency per input path (image vs text layer)."""
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT
+                   COALESCE(json_extract(event_data, '$.path'), 'image') as path,
+                   COUNT(*) as classifications,
+                   AVG(json_extract(event_data, '$.token_usage.input_tokens')) as avg_input_tokens,
+                   AVG(json_extract(event_data, '$.token_usage.output_tokens')) as avg_output_tokens,
+                   AVG(json_extract(event_data, '$.latency_ms')) as avg_latency_ms
+               FROM processing_log
+               WHERE event_type = 'classify'
+               GROUP BY path
+               ORDER BY path"""
+        ).fetchall()
+
+    for row in rows:
+        for field in ('avg_input_tokens', 'avg_output_tokens', 'avg_latency_ms'):
+            if row[field] is not None:
+                row[field] = round(row[field], 1)
+    return rows
+
+
+def get_queue_wait_stats(recent: int = 1000) -> list[dict]:
+    """
+    Classification queue wait per lane (express vs normal) over each lane's
+    most recent documents: count, average, p50/p95 and max wait in ms.
+    """
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT lane, wait_ms FROM (
+                   SELECT COALESCE(json_extract(event_data, '$.lane'), 'normal') as lane,
+                          json_extract(event_data, '$.wait_ms') as wait_ms,
+                          ROW_NUMBER() OVER (
+                              PARTITION BY COALESCE(json_extract(event_data, '$.lane'), 'normal')
+                              ORDER BY id DESC
+                          ) as recency
+                   FROM processing_log
+                   WHERE event_type = 'queue'
+               )
+               WHERE recency <= ?""",
+            (recent,)
+        ).fetchall()
+
+    waits: dict[str, list[int]] = {}
+    for row in rows:
+        waits.setdefault(row['lane'], []).append(row['wait_ms'] or 0)
+
+    stats = []
+    for lane, values in sorted(waits.items()):
+        values.sort()
+        stats.append({
+            'lane': lane,
+            'documents': len(values),
+            'avg_wait_ms': round(sum(values) / len(values), 1),
+            'p50_wait_ms': values[len(values) // 2],
+            'p95_wait_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max_wait_ms': values[-1],
+        })
+    return stats
+
+
+def get_degradation_counts() -> dict[int, int]:
+    """Documents rendered and classified at each degradation level."""
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT json_extract(event_data, '$.level') as level, COUNT(*) as count
+               FROM processing_log
+               WHERE event_type = 'degradation'
+               GROUP BY level"""
+        ).fetchall()
+    return {row['level']: row['count'] for row in rows}
+
+
+def get_labeled_documents() -> list[dict]:
+    """
+    Documents whose type a reviewer confirmed or reassigned, with their stored
+    page text (text layer preferred over OCR) — training data for the local
+    pre-classifier. Dismissing a document doesn't confirm its type, so
+    dismissed documents only count if they were also reviewed or reassigned.
+
+    Returns:
+        Dicts with id, document_type, file_path and text ('' if none stored)
+    """
+    with get_db() as conn:
+        documents = conn.execute(
+            """SELECT id, document_type, file_path FROM documents
+               WHERE document_type IS NOT NULL
+                 AND (reviewed_at IS NOT NULL
+                      OR id IN (SELECT document_id FROM processing_log WHERE event_type = 'reassign'))
+               ORDER BY id"""
+        ).fetchall()
+        pages = conn.execute(
+            """SELECT document_id, source, text FROM page_texts
+               ORDER BY document_id, source DESC, page_number"""
+        ).fetchall()
+
+    # source DESC puts 'text_layer' ahead of 'ocr'; keep one source per document
+    texts: dict[int, tuple[str, list[str]]] = {}
+    for page in pages:
+        source, parts = texts.setdefault(page['document_id'], (page['source'], []))
+        if page['source'] == source:
+            parts.append(page['text'])
+    for doc in documents:
+        doc['text'] = "\n".join(texts.get(doc['id'], ('', []))[1])
+    return documents
+
+
+def get_local_classifier_stats() -> list[dict]:
+    """
+    Live accuracy of the local pre-classifier per model version: predictions,
+    API calls skipped, and agreement with each document's current type
+    (which includes reviewer corrections).
+    """
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT
+                   json_extract(l.event_data, '$.version') as version,
+                   COUNT(*) as predictions,
+                   SUM(json_extract(l.event_data, '$.skipped_api')) as skipped,
+                   SUM(json_extract(l.event_data, '$.label') = d.document_type) as agreed,
+                   SUM(CASE WHEN json_extract(l.event_data, '$.skipped_api')
+                            THEN json_extract(l.event_data, '$.label') = d.document_type END) as skipped_agreed,
+                   SUM(d.reviewed_at IS NOT NULL) as reviewed,
+                   AVG(json_extract(l.event_data, '$.elapsed_us')) as avg_predict_us
+               FROM processing_log l
+               JOIN documents d ON d.id = l.document_id
+               WHERE l.event_type = 'local_classifier'
+               GROUP BY version
+               ORDER BY version"""
+        ).fetchall()
+
+    for row in rows:
+        row['skipped'] = row['skipped'] or 0
+        row['agreed'] = row['agreed'] or 0
+        row['skipped_agreed'] = row['skipped_agreed'] or 0
+        row['agreement'] = round(row['agreed'] / row['predictions'], 4) if row['predictions'] else None
+        if row['avg_predict_us'] is not None:
+            row['avg_predict_us'] = round(row['avg_predict_us'], 1)
+    return rows
+
+
+def _parse_sender(row: Optional[dict]) -> Optional[dict]:
+    if row is not None:
+        row['type_counts'] = json.loads(row['type_counts']) if row.get('type_counts') else {}
+    return row
+
+
+def get_sender(sender_id: int) -> Optional[dict]:
+    """Get a sender from the fingerprint index."""
+    with get_db() as conn:
+        row = conn.execute("SELECT * FROM senders WHERE id = ?", (sender_id,)).fetchone()
+    return _parse_sender(row)
+
+
+def find_sender_by_numbers(numbers: list[str]) -> Optional[dict]:
+    """Sender owning any of these fax numbers (first number wins)."""
+    with get_db() as conn:
+        for number in numbers:
+            row = conn.execute(
+                """SELECT s.* FROM sender_numbers n JOIN senders s ON s.id = n.sender_id
+                   WHERE n.number = ?""",
+                (number,)
+            ).fetchone()
+            if row:
+                return _parse_sender(row)
+    return None
+
+
+def find_sender_by_header(header_key: str) -> Optional[dict]:
+    """Most frequently seen sender with this header key."""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM senders WHERE header_key = ? ORDER BY observations DESC LIMIT 1",
+            (header_key,)
+        ).fetchone()
+    return _parse_sender(row)
+
+
+def list_sender_layouts() -> list[dict]:
+    """(id, layout_hash) of every sender with a layout hash."""
+    with get_db() as conn:
+        return conn.execute(
+            "SELECT id, layout_hash FROM senders WHERE layout_hash IS NOT NULL"
+        ).fetchall()
+
+
+def record_sender_observation(
+    sender_id: Optional[int],
+    document_type: str,
+    numbers: list[str],
+    header_key: Optional[str],
+    layout_hash: Optional[str],
+    sending_facility: Optional[str],
+    fax_origin_number: Optional[str]
+) -> int:
+    """
+    Count a classified document against a sender, creating the sender when
+    sender_id is None. New identifying details (numbers, header key, layout,
+    facility) are added to the sender. Returns the sender id.
+    """
+    with get_db() as conn:
+        # Serialize read-modify-write of type_counts across concurrent documents
+        conn.execute("BEGIN IMMEDIATE")
+        if sender_id is None:
+            cursor = conn.execute(
+                "INSERT INTO senders (header_key, layout_hash, type_counts) VALUES (?, ?, '{}')",
+                (header_key, layout_hash)
+            )
+            sender_id = cursor.lastrowid
+        row = conn.execute("SELECT type_counts FROM senders WHERE id = ?", (sender_id,)).fetchone()
+        type_counts = json.loads(row['type_counts']) if row and row['type_counts'] else {}
+        type_counts[document_type] = type_counts.get(document_type, 0) + 1
+        conn.execute(
+            """UPDATE senders SET
+               type_counts = ?,
+               observations = observations + 1,
+               header_key = COALESCE(header_key, ?),
+               layout_hash = COALESCE(layout_hash, ?),
+               sending_facility = COALESCE(?, sending_facility),
+               fax_origin_number = COALESCE(?, fax_origin_number),
+               last_seen = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (json.dumps(type_counts), header_key, layout_hash, sending_facility, fax_origin_number, sender_id)
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO sender_numbers (number, sender_id) VALUES (?, ?)",
+            [(number, sender_id) for number in numbers]
+        )
+        conn.commit()
+    return sender_id
+
+
+def correct_sender_type(sender_id: int, from_type: Optional[str], to_type: str):
+    """Move one of a sender's documents from one type to another after a reviewer correction."""
+    with get_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT type_counts FROM senders WHERE id = ?", (sender_id,)).fetchone()
+        if not row:
+            conn.rollback()
+            return
+        type_counts = json.loads(row['type_counts']) if row['type_counts'] else {}
+        if from_type and type_counts.get(from_type, 0) > 0:
+            type_counts[from_type] -= 1
+        type_counts[to_type] = type_counts.get(to_type, 0) + 1
+        conn.execute(
+            "UPDATE senders SET type_counts = ?, corrections = corrections + 1 WHERE id = ?",
+            (json.dumps(type_counts), sender_id)
+        )
+        conn.commit()
+
+
+def set_document_sender(doc_id: int, sender_id: int):
+    """Link a document to its sender in the fingerprint index."""
+    with get_db() as conn:
+        conn.execute("UPDATE documents SET sender_id = ? WHERE id = ?", (sender_id, doc_id))
+        conn.commit()
+
+
+def list_senders(limit: int = 50) -> list[dict]:
+    """Known senders by volume, with their fax numbers."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT * FROM senders ORDER BY observations DESC, last_seen DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        numbers = conn.execute("SELECT number, sender_id FROM sender_numbers ORDER BY number").fetchall()
+
+    by_sender: dict[int, list[str]] = {}
+    for row in numbers:
+        by_sender.setdefault(row['sender_id'], []).append(row['number'])
+    for row in rows:
+        _parse_sender(row)
+        row['numbers'] = by_sender.get(row['id'], [])
+    return rows
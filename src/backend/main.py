@@ -8,16 +8,23 @@ Run with:
 """
 import logging
 import threading
+import uuid
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from .config import settings
 from .database import init_database
-from .routers import documents, upload, stats
+from .routers import documents, upload, stats, metrics, profiles
 from .services.demo_seeder import seed_demo_data
+from .services.document_service import start_classification_workers, start_document_pipeline
+from .services.pipeline import stop_pipeline
+from .services.profiling import get_profiler
+from .services.render_pool import shutdown_render_pool
+from .services.tracing import set_request_id, shutdown_tracer
+from .services.work_queue import stop_classification_queue
 
 # Configure logging
 logging.basicConfig(
@@ -41,10 +48,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Profile a sampled share of requests (and any sent with X-Profile: 1) when profiling is enabled."""
+    profiler = get_profiler()
+    if profiler is None or not profiler.sample_request(request.headers.get("X-Profile") == "1"):
+        return await call_next(request)
+    with profiler.session("request", f"{request.method} {request.url.path}", all_threads=True,
+                          **{'request.id': request.headers.get("X-Request-Id", "")}) as session:
+        response = await call_next(request)
+        # Name the profile by route template once routing has matched one
+        route = request.scope.get("route")
+        if route is not None:
+            session.name = f"{request.method} {route.path}"
+        session.attributes['http.status'] = response.status_code
+    return response
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Tag the request (and the traces of documents it uploads) with an id, echoed as X-Request-Id."""
+    request_id = request.headers.get("X-Request-Id", "")[:128] or uuid.uuid4().hex
+    set_request_id(request_id)
+    response = await call_next(request)
+    response.headers["X-Request-Id"] = request_id
+    return response
+
+
 # Include routers
 app.include_router(documents.router)
 app.include_router(upload.router)
 app.include_router(stats.router)
+app.include_router(metrics.router)
+app.include_router(profiles.router)
 
 
 @app.on_event("startup")
@@ -53,6 +89,11 @@ def startup_event():
     settings.ensure_directories()
     init_database()
 
+    if settings.classification_queue_enabled:
+        if settings.pipeline_enabled:
+            start_document_pipeline()
+        start_classification_workers()
+
     # Auto-seed demo data in background thread (non-blocking)
     # This ensures health check passes immediately while seeding runs async
     if settings.auto_seed_demo:
@@ -60,6 +101,15 @@ def startup_event():
         thread.start()
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop claiming work, drain the pipeline, stop render worker processes, flush traces."""
+    stop_classification_queue()
+    stop_pipeline()
+    shutdown_render_pool()
+    shutdown_tracer()
+
+
 @app.get("/api/health")
 def health_check():
     """Health check endpoint."""
@@ -72,6 +72,17 @@ class DocumentResponse(BaseModel):
     notes: Optional[str] = None
     reviewed_by: Optional[str] = None
     reviewed_at: Optional[datetime] = None
+    # Set on segments split out of a multi-document bundle
+    parent_id: Optional[int] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    # PDF preflight: text/scan/mixed/repairable/encrypted/corrupt/oversized,
+    # the route taken (render/repair/reject) and the measurements behind it
+    pdf_category: Optional[str] = None
+    processing_route: Optional[str] = None
+    preflight: Optional[dict] = None
+    # Provisional urgency (0-100) sniffed at ingest; orders the classification queue
+    urgency_score: Optional[int] = None
 
 
 class DocumentListResponse(BaseModel):
@@ -93,6 +104,18 @@ class ProcessingLogEntry(BaseModel):
     timestamp: datetime
 
 
+class DocumentTimeline(BaseModel):
+    """
+    Where a document's time went: the per-stage timing breakdown
+    (ingest, queue wait, processing stages and their parts) and its
+    processing log events in order.
+    """
+    document_id: int
+    status: str
+    timings: Optional[dict] = None
+    events: list[ProcessingLogEntry]
+
+
 # --- Stats Models ---
 
 class StatsSummary(BaseModel):
@@ -107,6 +130,145 @@ class StatsSummary(BaseModel):
     avg_processing_time_ms: Optional[float]
 
 
+class ClassificationPathStats(BaseModel):
+    """Token and latency averages for one classification input path."""
+    path: str  # "image", "text", "ocr" or "local"
+    classifications: int
+    avg_input_tokens: Optional[float] = None
+    avg_output_tokens: Optional[float] = None
+    avg_latency_ms: Optional[float] = None
+
+
+class LocalClassifierVersionStats(BaseModel):
+    """Live predictions of one local pre-classifier version."""
+    version: Optional[int] = None
+    predictions: int
+    skipped: int = 0  # API calls replaced by the local prediction
+    agreed: int = 0  # predictions matching the document's current type
+    skipped_agreed: int = 0
+    reviewed: int = 0
+    agreement: Optional[float] = None
+    avg_predict_us: Optional[float] = None
+
+
+class LocalClassifierStats(BaseModel):
+    """Local pre-classifier in use, its training report and live accuracy."""
+    enabled: bool
+    version: Optional[int] = None
+    trained_at: Optional[str] = None
+    examples: int = 0
+    class_counts: dict[str, int] = {}
+    holdout: Optional[dict] = None  # accuracy report from training
+    live: list[LocalClassifierVersionStats] = []
+
+
+class SenderSummary(BaseModel):
+    """A known sender in the fingerprint index."""
+    id: int
+    sending_facility: Optional[str] = None
+    fax_origin_number: Optional[str] = None
+    numbers: list[str] = []
+    header_key: Optional[str] = None
+    observations: int = 0
+    corrections: int = 0  # reviewer type corrections on this sender's faxes
+    type_counts: dict[str, int] = {}
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+
+class QueueLaneWaitStats(BaseModel):
+    """Queue wait of recently classified documents in one lane."""
+    lane: str  # "express" or "normal"
+    documents: int
+    avg_wait_ms: Optional[float] = None
+    p50_wait_ms: Optional[int] = None
+    p95_wait_ms: Optional[int] = None
+    max_wait_ms: Optional[int] = None
+
+
+class QueueStats(BaseModel):
+    """Classification queue: live depth per lane and measured waits."""
+    enabled: bool
+    workers: int = 0
+    express_workers: int = 0
+    express_threshold: Optional[int] = None
+    aging_per_minute: Optional[float] = None
+    lease_seconds: Optional[float] = None
+    max_attempts: Optional[int] = None
+    local_in_flight: int = 0  # documents leased by this process
+    # depth, in_flight, expired_leases, oldest_wait_ms per lane (all processes)
+    lanes: dict[str, dict] = {}
+    waits: list[QueueLaneWaitStats] = []
+
+
+class PipelineStageStats(BaseModel):
+    """Load on one processing stage since the pipeline started."""
+    name: str
+    workers: int
+    queue_depth: int = 0
+    queue_capacity: Optional[int] = None
+    busy: int = 0  # workers working right now
+    processed: int = 0
+    failed: int = 0
+    utilization: Optional[float] = None  # share of worker time spent working
+    avg_queue_wait_ms: Optional[float] = None
+    avg_service_ms: Optional[float] = None
+    blocked_ms: int = 0  # time spent waiting for room in the next stage
+
+
+class PipelineStats(BaseModel):
+    """Staged pipeline, ingest (queue claims) first."""
+    enabled: bool
+    stages: list[PipelineStageStats] = []
+
+
+class DegradationStats(BaseModel):
+    """Adaptive degradation level in force and how documents were processed."""
+    enabled: bool
+    level: int = 0
+    name: Optional[str] = None
+    signals: dict = {}  # queue depth and oldest wait at the last evaluation
+    depth_thresholds: list[float] = []
+    wait_thresholds_seconds: list[float] = []
+    held_seconds: Optional[float] = None
+    levels: list[dict] = []  # render/model settings per level
+    documents_by_level: dict[int, int] = {}
+
+
+class RenderCacheStats(BaseModel):
+    """Render cache usage and effectiveness, across all render workers."""
+    enabled: bool
+    entries: int = 0
+    bytes_used: int = 0
+    max_bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    hit_rate: Optional[float] = None
+    writes: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0  # encoded bytes served from cache instead of re-rendered
+    render_ms_saved: int = 0  # render time the cache hits originally cost
+
+
+class ProfileInfo(BaseModel):
+    """A sampling profile of one request or document stage."""
+    id: str
+    kind: str  # request | stage
+    name: str  # "METHOD /route" or the stage name
+    created: str
+    duration_ms: float
+    samples: int
+    stacks: int  # distinct collapsed stacks
+    interval_ms: float
+    attributes: dict = {}
+
+
+class ProfileList(BaseModel):
+    """Recent profiles, newest first."""
+    enabled: bool
+    profiles: list[ProfileInfo] = []
+
+
 # --- Upload Response ---
 
 class UploadResponse(BaseModel):
@@ -122,3 +284,6 @@ class BatchUploadResponse(BaseModel):
     failed: int
     documents: list[DocumentResponse]
     errors: list[dict]
+    # Queue depth, this client's queued documents and their limits, and the
+    # drain rate at admission — for upstream senders to pace themselves
+    backlog: Optional[dict] = None
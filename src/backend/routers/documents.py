@@ -9,7 +9,7 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import FileResponse
 
 from .. import database as db
-from ..models import DocumentResponse, DocumentListResponse, DocumentUpdate
+from ..models import DocumentResponse, DocumentListResponse, DocumentUpdate, DocumentTimeline
 from ..services.document_service import update_document, get_document_file_path
 from ..prompts.classification import VALID_DOCUMENT_TYPES
 
@@ -29,6 +29,7 @@ def list_documents(
     status: Optional[str] = Query(None, description="Filter by status"),
     document_type: Optional[str] = Query(None, description="Filter by document type"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
+    search: Optional[str] = Query(None, min_length=2, description="Search filename and page text"),
     sort_by: str = Query("upload_time", description="Sort field"),
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
     limit: int = Query(50, ge=1, le=200, description="Results per page"),
@@ -39,6 +40,7 @@ def list_documents(
         status=status,
         document_type=document_type,
         priority=priority,
+        search=search,
         sort_by=sort_by,
         sort_order=sort_order,
         limit=limit,
@@ -62,6 +64,28 @@ def get_document(doc_id: int):
     return DocumentResponse(**_strip_file_path(doc))
 
 
+@router.get("/{doc_id}/children", response_model=list[DocumentResponse])
+def get_document_children(doc_id: int):
+    """Get the segments split out of a multi-document bundle, in page order."""
+    if not db.get_document(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return [DocumentResponse(**_strip_file_path(doc)) for doc in db.get_child_documents(doc_id)]
+
+
+@router.get("/{doc_id}/timeline", response_model=DocumentTimeline)
+def get_document_timeline(doc_id: int):
+    """Get a document's timing breakdown by stage with its processing log events."""
+    doc = db.get_document(doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return DocumentTimeline(
+        document_id=doc_id,
+        status=doc['status'],
+        timings=doc.get('timings'),
+        events=db.get_document_logs(doc_id)
+    )
+
+
 @router.patch("/{doc_id}", response_model=DocumentResponse)
 def patch_document(doc_id: int, update: DocumentUpdate):
     """
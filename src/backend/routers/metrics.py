@@ -0,0 +1,97 @@
+"""
+FaxTriage AI — Metrics Router
+
+Prometheus scrape endpoint: the counters and histograms recorded while
+documents are processed, plus live gauges read at scrape time.
+"""
+import time
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from .. import database as db
+from ..config import settings
+from ..services import metrics
+from ..services.admission import get_admission_controller
+from ..services.degradation import get_degradation_controller
+from ..services.pipeline import get_pipeline
+from ..services.tracing import get_tracer
+from ..services.work_queue import EXPRESS, NORMAL, get_classification_queue
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_gauges() -> list:
+    """Queue depth, worker and stage utilization, degradation level, in-flight uploads and trace sampling, now."""
+    gauges = []
+
+    queue = get_classification_queue()
+    if settings.classification_queue_enabled:
+        depth = metrics.Gauge("faxtriage_queue_depth", "Documents waiting for a classification worker", ["lane"])
+        in_flight = metrics.Gauge("faxtriage_queue_in_flight", "Documents leased by a worker (all processes)", ["lane"])
+        oldest = metrics.Gauge("faxtriage_queue_oldest_wait_seconds", "Wait of the oldest queued document", ["lane"])
+        now = time.time()
+        lanes = db.get_queue_depth(now, settings.express_lane_threshold)
+        for lane in (EXPRESS, NORMAL):
+            row = lanes.get(lane) or {}
+            depth.set(row.get('waiting') or 0, lane=lane)
+            in_flight.set(row.get('in_flight') or 0, lane=lane)
+            oldest.set(round(now - row['oldest_queued_at'], 3) if row.get('oldest_queued_at') else 0, lane=lane)
+        gauges += [depth, in_flight, oldest]
+    if queue is not None:
+        workers = metrics.Gauge("faxtriage_classification_workers", "Classification workers in this process")
+        busy = metrics.Gauge("faxtriage_classification_workers_busy", "Classification workers holding a document")
+        workers.set(queue.workers + queue.express_workers)
+        busy.set(queue.stats()['local_in_flight'])
+        gauges += [workers, busy]
+
+    pipeline = get_pipeline()
+    if pipeline is not None:
+        utilization = metrics.Gauge(
+            "faxtriage_pipeline_stage_utilization", "Share of stage worker time spent working", ["stage"]
+        )
+        stage_depth = metrics.Gauge("faxtriage_pipeline_stage_queue_depth", "Jobs queued in front of a stage", ["stage"])
+        stage_busy = metrics.Gauge("faxtriage_pipeline_stage_busy", "Stage workers working on a job", ["stage"])
+        for stage in pipeline.stats():
+            utilization.set(stage['utilization'], stage=stage['name'])
+            stage_depth.set(stage['queue_depth'], stage=stage['name'])
+            stage_busy.set(stage['busy'], stage=stage['name'])
+        gauges += [utilization, stage_depth, stage_busy]
+
+    controller = get_degradation_controller()
+    if controller is not None:
+        level = metrics.Gauge("faxtriage_degradation_level", "Adaptive degradation level in force (0 = full quality)")
+        level.set(controller.evaluate())
+        gauges.append(level)
+
+    admission = get_admission_controller()
+    if admission is not None:
+        uploads = metrics.Gauge("faxtriage_uploads_in_flight", "Upload requests being handled by this process")
+        uploads.set(admission.inflight)
+        gauges.append(uploads)
+
+    tracer = get_tracer()
+    if tracer is not None:
+        # Counted by the tracer; reported as a counter built at scrape time
+        traces = metrics.Counter("faxtriage_traces", "Traces tail-sampled by this process", ["decision"])
+        tracer_stats = tracer.stats()
+        traces.inc(tracer_stats['kept_traces'], decision="kept")
+        traces.inc(tracer_stats['dropped_traces'], decision="dropped")
+        traces.inc(tracer_stats['export_dropped'], decision="export_failed")
+        gauges.append(traces)
+
+    return gauges
+
+
+def render_metrics() -> str:
+    return metrics.render(metrics.RECORDED + collect_gauges())
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of this process's metrics."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
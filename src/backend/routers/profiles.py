@@ -0,0 +1,43 @@
+"""
+FaxTriage AI — Profiles Router
+
+Admin endpoints for the sampling profiler: list the recent request and
+stage profiles, and download one as collapsed stacks for flamegraph.pl or
+speedscope.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..models import ProfileInfo, ProfileList
+from ..services.profiling import get_profiler
+
+router = APIRouter(prefix="/api/admin/profiles", tags=["admin"])
+
+
+@router.get("", response_model=ProfileList)
+def list_profiles(
+    kind: Optional[str] = Query(None, pattern="^(request|stage)$", description="Only request or stage profiles"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum profiles to list")
+):
+    """List the most recent profiles, newest first, optionally only requests or stages."""
+    profiler = get_profiler()
+    if profiler is None:
+        return ProfileList(enabled=False)
+    return ProfileList(
+        enabled=True,
+        profiles=[ProfileInfo(**meta) for meta in profiler.store.list(limit=limit, kind=kind)]
+    )
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Download a profile as collapsed stacks ("frame;frame;frame count" per line)."""
+    profiler = get_profiler()
+    folded = profiler.store.read(profile_id) if profiler is not None else None
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded, headers={
+        "Content-Disposition": f'attachment; filename="{profile_id}.folded"'
+    })
@@ -3,10 +3,27 @@ FaxTriage AI — Statistics Router
 
 Dashboard statistics endpoint.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 from .. import database as db
-from ..models import StatsSummary
+from ..models import (
+    StatsSummary,
+    RenderCacheStats,
+    ClassificationPathStats,
+    LocalClassifierStats,
+    LocalClassifierVersionStats,
+    SenderSummary,
+    QueueStats,
+    QueueLaneWaitStats,
+    PipelineStats,
+    PipelineStageStats,
+    DegradationStats,
+)
+from ..services.degradation import get_degradation_controller
+from ..services.local_classifier import get_local_classifier
+from ..services.pipeline import get_pipeline
+from ..services.render_cache import get_render_cache
+from ..services.work_queue import get_classification_queue
 
 router = APIRouter(prefix="/api/stats", tags=["stats"])
 
@@ -27,3 +44,106 @@ def get_stats_summary():
     """
     stats = db.get_stats()
     return StatsSummary(**stats)
+
+
+@router.get("/classification-paths", response_model=list[ClassificationPathStats])
+def get_classification_path_stats():
+    """
+    Compare the classification paths (image, text layer, OCR, local): call
+    count, average input/output tokens and average latency for each.
+    """
+    return [ClassificationPathStats(**row) for row in db.get_classification_path_stats()]
+
+
+@router.get("/render-cache", response_model=RenderCacheStats)
+def get_render_cache_stats():
+    """
+    Get render cache metrics: hit rate, bytes and render time saved, disk usage.
+    """
+    cache = get_render_cache()
+    if cache is None:
+        return RenderCacheStats(enabled=False)
+    return RenderCacheStats(enabled=True, **cache.stats())
+
+
+@router.get("/local-classifier", response_model=LocalClassifierStats)
+def get_local_classifier_stats():
+    """
+    Get the local pre-classifier in use, its holdout accuracy report from
+    training, and live agreement with final (reviewer-corrected) types per version.
+    """
+    live = [LocalClassifierVersionStats(**row) for row in db.get_local_classifier_stats()]
+    model = get_local_classifier()
+    if model is None:
+        return LocalClassifierStats(enabled=False, live=live)
+    return LocalClassifierStats(
+        enabled=True,
+        version=model.version,
+        trained_at=model.metadata.get('trained_at'),
+        examples=model.metadata.get('examples', 0),
+        class_counts=model.metadata.get('class_counts', {}),
+        holdout=model.metadata.get('holdout'),
+        live=live
+    )
+
+
+@router.get("/senders", response_model=list[SenderSummary])
+def get_sender_stats(limit: int = Query(50, ge=1, le=500, description="Number of senders")):
+    """
+    Get known senders from the fingerprint index by volume, with the types
+    their faxes were classified as (after reviewer corrections).
+    """
+    return [SenderSummary(**row) for row in db.list_senders(limit)]
+
+
+@router.get("/queue", response_model=QueueStats)
+def get_queue_stats():
+    """
+    Get the classification queue: documents waiting and in flight per lane,
+    and queue wait (average, p50, p95, max) measured separately for the
+    express lane and the normal lane.
+    """
+    waits = [QueueLaneWaitStats(**row) for row in db.get_queue_wait_stats()]
+    queue = get_classification_queue()
+    if queue is None:
+        return QueueStats(enabled=False, waits=waits)
+    return QueueStats(enabled=True, waits=waits, **queue.stats())
+
+
+@router.get("/pipeline", response_model=PipelineStats)
+def get_pipeline_stats():
+    """
+    Get per-stage load — queue depth, busy workers, utilization, queue wait,
+    service time and time blocked on the next stage — to find the bottleneck
+    stage. The ingest stage is this process's queue workers; its depth is
+    the shared queue's.
+    """
+    pipeline = get_pipeline()
+    if pipeline is None:
+        return PipelineStats(enabled=False)
+    stages = []
+    queue = get_classification_queue()
+    if queue is not None:
+        live = queue.stats()
+        stages.append(PipelineStageStats(
+            name="ingest",
+            workers=queue.workers + queue.express_workers,
+            queue_depth=sum(lane['depth'] for lane in live['lanes'].values()),
+            busy=live['local_in_flight']
+        ))
+    stages.extend(PipelineStageStats(**stage) for stage in pipeline.stats())
+    return PipelineStats(enabled=True, stages=stages)
+
+
+@router.get("/degradation", response_model=DegradationStats)
+def get_degradation_stats():
+    """
+    Get the adaptive degradation level in force, the queue signals behind it,
+    the settings of each level, and how many documents were processed at each.
+    """
+    counts = db.get_degradation_counts()
+    controller = get_degradation_controller()
+    if controller is None:
+        return DegradationStats(enabled=False, documents_by_level=counts)
+    controller.evaluate()
+    return DegradationStats(enabled=True, documents_by_level=counts, **controller.state())
@@ -3,12 +3,23 @@ FaxTriage AI — Upload Router
 
 Handles PDF file uploads and processing.
 """
-from typing import List
+import time
+from typing import List, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 
+from .. import database as db
+from ..config import settings
 from ..models import DocumentResponse, BatchUploadResponse
-from ..services.document_service import upload_and_process, DocumentProcessingError
+from ..services.document_service import (
+    upload_and_process,
+    ingest_document,
+    enqueue_document,
+    DocumentProcessingError,
+)
+from ..services.admission import get_admission_controller
+from ..services.work_queue import get_classification_queue
 
 router = APIRouter(prefix="/api/documents", tags=["upload"])
 
@@ -18,21 +29,72 @@ def _strip_file_path(doc: dict) -> dict:
     return {k: v for k, v in doc.items() if k != 'file_path'}
 
 
+def _client_id(request: Request) -> str:
+    """Uploader identity for admission limits: X-Client-Id, else the client address."""
+    client_id = request.headers.get("X-Client-Id", "").strip()
+    if client_id:
+        return client_id[:64]
+    return request.client.host if request.client else "unknown"
+
+
 @router.post("/upload", response_model=BatchUploadResponse)
-async def upload_documents(files: List[UploadFile] = File(...)):
+async def upload_documents(
+    request: Request,
+    response: Response,
+    files: List[UploadFile] = File(...),
+    wait: bool = Query(True, description="Wait for classification; false returns pending documents at once")
+):
     """
     Upload one or more PDF files for classification.
 
     Accepts multipart form data with one or more PDF files.
-    Each file is validated, saved, and processed through the
-    classification pipeline synchronously.
+    Each file is validated, saved, and queued for classification in order
+    of its sniffed urgency. With wait=true (the default) the response holds
+    the classified documents; with wait=false they are returned pending.
+    Without the classification queue, files are processed inline.
+
+    Past the admission limits the upload is refused with 503 (queue full or
+    too many uploads in progress) or 429 (this client's queued documents,
+    identified by X-Client-Id) and a Retry-After. Every response carries the
+    backlog in X-Queue-* / X-Client-* headers and, on success, the body.
 
     Returns array of created document records plus any errors.
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
+    client_id = _client_id(request)
+    admission = get_admission_controller()
+    decision = await run_in_threadpool(admission.admit, client_id, len(files)) if admission else None
+    if decision is not None:
+        if not decision.admitted:
+            raise HTTPException(
+                status_code=decision.status_code,
+                detail={
+                    "error": decision.reason,
+                    "retry_after": decision.retry_after,
+                    "backlog": decision.backlog,
+                },
+                headers=decision.headers()
+            )
+        response.headers.update(decision.headers())
+
+    try:
+        return await _process_uploads(files, wait, client_id, decision.backlog if decision else None)
+    finally:
+        if admission:
+            admission.release()
+
+
+async def _process_uploads(
+    files: List[UploadFile],
+    wait: bool,
+    client_id: str,
+    backlog: Optional[dict]
+) -> BatchUploadResponse:
+    queue = get_classification_queue()
     documents = []
+    queued = []
     errors = []
 
     for file in files:
@@ -40,9 +102,14 @@ async def upload_documents(files: List[UploadFile] = File(...)):
             # Read file content
             content = await file.read()
 
-            # Process the document
-            doc = upload_and_process(file.filename, content)
-            documents.append(DocumentResponse(**_strip_file_path(doc)))
+            if queue is None:
+                # Process the document inline
+                doc = await run_in_threadpool(upload_and_process, file.filename, content)
+                documents.append(DocumentResponse(**_strip_file_path(doc)))
+            else:
+                doc = await run_in_threadpool(ingest_document, file.filename, content, client_id)
+                await run_in_threadpool(enqueue_document, queue, doc)
+                queued.append(doc['id'])
 
         except DocumentProcessingError as e:
             errors.append({
@@ -55,9 +122,17 @@ async def upload_documents(files: List[UploadFile] = File(...)):
                 "error": f"Unexpected error: {str(e)}"
             })
 
+    # Documents still queued after the timeout are returned as they stand
+    deadline = time.monotonic() + settings.upload_wait_timeout_seconds
+    for doc_id in queued:
+        if wait:
+            await run_in_threadpool(queue.wait, doc_id, max(deadline - time.monotonic(), 0))
+        documents.append(DocumentResponse(**_strip_file_path(db.get_document(doc_id))))
+
     return BatchUploadResponse(
         uploaded=len(documents),
         failed=len(errors),
         documents=documents,
-        errors=errors
+        errors=errors,
+        backlog=backlog
     )
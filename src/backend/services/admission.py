@@ -0,0 +1,189 @@
+"""
+FaxTriage AI — Upload Admission Control
+
+Decides whether an upload is accepted before any of it is saved or
+processed, so a fax server flushing its spool can't pile up unbounded
+renders and API calls:
+
+- 503 when the shared classification queue is full, or this process is
+  already handling its maximum of concurrent upload requests
+- 429 when the uploading client already has its limit of documents queued
+
+Clients are identified by the X-Client-Id header, else their address, and
+per-client limits are configurable. Refusals carry a Retry-After computed
+from the queue's drain rate (documents classified per second over a recent
+window, across all processes): the time needed to drain the excess. Every
+response carries the current backlog so senders can pace themselves.
+"""
+import math
+import threading
+import time
+from typing import Optional
+
+from .. import database as db
+from ..config import settings
+
+
+def parse_client_limits(spec: str) -> dict[str, int]:
+    """'faxserver=300,scanner-2=20' -> {'faxserver': 300, 'scanner-2': 20}"""
+    limits = {}
+    for part in spec.split(","):
+        client, sep, limit = part.partition("=")
+        if sep and client.strip() and limit.strip().isdigit():
+            limits[client.strip()] = int(limit.strip())
+    return limits
+
+
+class AdmissionDecision:
+    """Outcome of an admission check, with the backlog it was based on."""
+
+    __slots__ = ("admitted", "status_code", "reason", "retry_after", "backlog")
+
+    def __init__(
+        self,
+        admitted: bool,
+        backlog: dict,
+        status_code: int = 200,
+        reason: Optional[str] = None,
+        retry_after: Optional[int] = None
+    ):
+        self.admitted = admitted
+        self.backlog = backlog
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-Queue-Depth": str(self.backlog['queue_depth']),
+            "X-Queue-Limit": str(self.backlog['queue_limit']),
+            "X-Client-Queued": str(self.backlog['client_queued']),
+            "X-Client-Limit": str(self.backlog['client_limit']),
+            "X-Queue-Drain-Per-Minute": str(self.backlog['drain_per_minute']),
+        }
+        if self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class AdmissionController:
+    """Queue-depth, in-flight and per-client limits on uploads."""
+
+    def __init__(
+        self,
+        max_queue_depth: int = 500,
+        max_inflight: int = 16,
+        client_max_queued: int = 100,
+        client_limits: Optional[dict[str, int]] = None,
+        drain_window_seconds: int = 300,
+        max_retry_after: int = 600,
+        queue_enabled: bool = True
+    ):
+        self.max_queue_depth = max_queue_depth
+        self.max_inflight = max_inflight
+        self.client_max_queued = client_max_queued
+        self.client_limits = client_limits or {}
+        self.drain_window_seconds = max(drain_window_seconds, 1)
+        self.max_retry_after = max_retry_after
+        self.queue_enabled = queue_enabled
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._drain_cache: tuple[float, float] = (0.0, 0.0)  # (measured at, docs/second)
+
+    @property
+    def inflight(self) -> int:
+        """Upload requests admitted and not yet released."""
+        return self._inflight
+
+    def client_limit(self, client_id: str) -> int:
+        return self.client_limits.get(client_id, self.client_max_queued)
+
+    def drain_rate(self) -> float:
+        """Documents classified per second over the drain window (cached for a few seconds)."""
+        measured_at, rate = self._drain_cache
+        now = time.monotonic()
+        if now - measured_at > 5:
+            rate = db.count_classified_since(self.drain_window_seconds) / self.drain_window_seconds
+            self._drain_cache = (now, rate)
+        return rate
+
+    def backlog(self, client_id: str) -> dict:
+        rate = self.drain_rate()
+        depth = db.count_queued() if self.queue_enabled else 0
+        return {
+            'queue_depth': depth,
+            'queue_limit': self.max_queue_depth,
+            'client_id': client_id,
+            'client_queued': db.count_queued(client_id) if self.queue_enabled else 0,
+            'client_limit': self.client_limit(client_id),
+            'inflight_uploads': self._inflight,
+            'drain_per_minute': round(rate * 60, 1),
+            # Time for the current queue to drain at that rate
+            'estimated_drain_seconds': math.ceil(depth / rate) if rate else None,
+        }
+
+    def _retry_after(self, excess: int, rate: float) -> int:
+        if rate <= 0:
+            return self.max_retry_after
+        return max(1, min(self.max_retry_after, math.ceil(excess / rate)))
+
+    def admit(self, client_id: str, files: int) -> AdmissionDecision:
+        """
+        Check an upload of `files` documents. An admitted upload counts as in
+        flight until release() is called.
+        """
+        backlog = self.backlog(client_id)
+        rate = backlog['drain_per_minute'] / 60
+
+        with self._lock:
+            if self._inflight >= self.max_inflight:
+                return AdmissionDecision(
+                    False, backlog, 503, "Too many uploads in progress",
+                    # Roughly one document per upload ahead of this one has to finish
+                    self._retry_after(self._inflight - self.max_inflight + 1, rate)
+                )
+            if self.queue_enabled:
+                excess = backlog['queue_depth'] + files - self.max_queue_depth
+                if excess > 0:
+                    return AdmissionDecision(
+                        False, backlog, 503, "Classification queue is full", self._retry_after(excess, rate)
+                    )
+                client_excess = backlog['client_queued'] + files - backlog['client_limit']
+                if client_excess > 0:
+                    # A client's own documents share the drain with everyone else's;
+                    # its share is what it holds of the queue
+                    share = backlog['client_queued'] / backlog['queue_depth'] if backlog['queue_depth'] else 1.0
+                    return AdmissionDecision(
+                        False, backlog, 429, f"Client {client_id} has too many documents queued",
+                        self._retry_after(client_excess, rate * share)
+                    )
+            self._inflight += 1
+            backlog['inflight_uploads'] = self._inflight
+        return AdmissionDecision(True, backlog)
+
+    def release(self):
+        with self._lock:
+            self._inflight = max(self._inflight - 1, 0)
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """The process-wide controller, or None when admission control is disabled."""
+    global _controller
+    if not settings.admission_enabled:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                max_queue_depth=settings.admission_max_queue_depth,
+                max_inflight=settings.admission_max_inflight_uploads,
+                client_max_queued=settings.admission_client_max_queued,
+                client_limits=parse_client_limits(settings.admission_client_limits),
+                drain_window_seconds=settings.admission_drain_window_seconds,
+                max_retry_after=settings.admission_max_retry_after_seconds,
+                queue_enabled=settings.classification_queue_enabled
+            )
+        return _controller
@@ -0,0 +1,135 @@
+"""
+FaxTriage AI — Bundle Splitter
+
+Detects document boundaries inside multi-document faxes (chart dumps,
+records transmissions) using cheap text-layer cues, so each segment can be
+classified on its own.
+
+Boundary signals, per page:
+- Cover sheets: a fax cover page starts a segment and is kept with the
+  pages that follow it
+- Page-number resets: "Page 1 of N" / "PAGE 1" after other pages
+- Header changes: the section title under the running header differs
+  from the previous page's title
+"""
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+import fitz  # PyMuPDF
+
+from .pdf_processor import PDFProcessingError
+
+# Fax machine transmission header, e.g. "02/07/2026 16:22PM FROM: ... P.01/40"
+FAX_HEADER_PATTERN = re.compile(r"\bP\.?\s*\d+\s*/\s*\d+\b|\bFROM:.*\bTO:", re.IGNORECASE)
+
+PAGE_ONE_PATTERN = re.compile(r"\bpage\s+1\b(?!\d)(\s+of\s+\d+)?", re.IGNORECASE)
+
+COVER_SHEET_MARKERS = ("FAX", "TO:", "FROM:")
+COVER_SHEET_TITLES = ("COVER", "TRANSMISSION", "PAGES:")
+
+# Lines inspected at the top of each page for title/page-number cues
+HEADER_LINES = 6
+
+# Titles at least this similar are treated as the same document
+TITLE_SIMILARITY = 0.8
+
+
+def _page_lines(page: fitz.Page) -> list[str]:
+    """Non-empty text lines of a page, top to bottom."""
+    return [line.strip() for line in page.get_text().splitlines() if line.strip()]
+
+
+def _is_cover_sheet(lines: list[str]) -> bool:
+    """Heuristic: a fax cover sheet has TO/FROM/FAX fields and a cover-style title."""
+    text = "\n".join(lines[:40]).upper()
+    if not all(marker in text for marker in COVER_SHEET_MARKERS):
+        return False
+    return any(title in text for title in COVER_SHEET_TITLES)
+
+
+def _page_title(lines: list[str], running_lines: set[str]) -> str:
+    """First header line that isn't a fax header or a running header repeated on most pages."""
+    for line in lines[:HEADER_LINES]:
+        if line in running_lines or FAX_HEADER_PATTERN.search(line):
+            continue
+        return line.upper()
+    return ""
+
+
+def _same_title(a: str, b: str) -> bool:
+    if not a or not b:
+        # No title on one side (image-only page, blank) — no evidence of a boundary
+        return True
+    return a == b or SequenceMatcher(None, a, b).ratio() >= TITLE_SIMILARITY
+
+
+def detect_segments(pdf_path: str, max_segments: int = 12) -> list[tuple[int, int]]:
+    """
+    Split a PDF into document segments using text-layer cues.
+
+    Args:
+        pdf_path: Path to the PDF file
+        max_segments: Upper bound on segments; the smallest are merged into
+            their predecessor until the count fits
+
+    Returns:
+        List of (page_start, page_end) tuples, 1-based and inclusive.
+        A single segment covering the whole file means no boundaries were found.
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    try:
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
+        pages = [_page_lines(page) for page in doc]
+    finally:
+        doc.close()
+
+    if len(pages) <= 1:
+        return [(1, len(pages))] if pages else []
+
+    # Running headers (patient banner, facility line) repeat on most pages
+    # and say nothing about where one document ends
+    line_counts = Counter(line for lines in pages for line in set(lines[:HEADER_LINES]))
+    running_lines = {line for line, count in line_counts.items() if count >= len(pages) / 2}
+
+    starts = [0]
+    previous_title = _page_title(pages[0], running_lines)
+    previous_was_cover = _is_cover_sheet(pages[0])
+
+    for index in range(1, len(pages)):
+        lines = pages[index]
+        title = _page_title(lines, running_lines)
+        is_cover = _is_cover_sheet(lines)
+        page_reset = any(PAGE_ONE_PATTERN.search(line) for line in lines[:HEADER_LINES])
+
+        if previous_was_cover:
+            # Cover sheet belongs to the document it introduces
+            boundary = False
+        else:
+            boundary = is_cover or page_reset or not _same_title(title, previous_title)
+
+        if boundary:
+            starts.append(index)
+        previous_title = title or previous_title
+        previous_was_cover = is_cover
+
+    segments = [
+        [start, (starts[i + 1] - 1) if i + 1 < len(starts) else len(pages) - 1]
+        for i, start in enumerate(starts)
+    ]
+
+    while len(segments) > max(max_segments, 1):
+        # Merge the shortest segment (after the first) into the one before it
+        smallest = min(range(1, len(segments)), key=lambda i: segments[i][1] - segments[i][0])
+        segments[smallest - 1][1] = segments[smallest][1]
+        del segments[smallest]
+
+    return [(start + 1, end + 1) for start, end in segments]
@@ -11,6 +11,9 @@ from typing import Optional
 import anthropic
 
 from ..config import settings
+from . import timing, tracing
+from .metrics import API_REQUESTS, API_RETRIES, API_SECONDS, API_TOKENS
+from .pdf_processor import PageImage, PageText
 from ..prompts.classification import (
     CLASSIFICATION_PROMPT,
     VALID_DOCUMENT_TYPES,
@@ -26,7 +29,7 @@ class ClassificationError(Exception):
 class ClassificationResult:
     """Result of document classification."""
 
-    def __init__(self, data: dict, processing_time_ms: int, token_usage: dict):
+    def __init__(self, data: dict, processing_time_ms: int, token_usage: dict, input_path: str = "image"):
         self.document_type: str = data.get('document_type', 'other')
         self.confidence: float = data.get('confidence', 0.0)
         self.priority: str = data.get('priority', 'low')
@@ -37,6 +40,7 @@ class ClassificationResult:
         self.is_continuation: bool = data.get('is_continuation', False)
         self.processing_time_ms: int = processing_time_ms
         self.token_usage: dict = token_usage
+        self.input_path: str = input_path  # "image", "text", "ocr" or "local" (no API call)
         self._raw: dict = data
 
     def to_dict(self) -> dict:
@@ -74,17 +78,35 @@ def validate_classification(result: dict) -> list[str]:
 
 
 def classify_document(
-    images: list[str],
+    images: list[PageImage],
     page_count: int,
-    retry_on_failure: bool = True
+    retry_on_failure: bool = True,
+    contact_sheets: Optional[list[PageImage]] = None,
+    contact_sheet_pages: Optional[list[int]] = None,
+    page_numbers: Optional[list[int]] = None,
+    omitted_pages: Optional[dict[int, str]] = None,
+    page_texts: Optional[list[PageText]] = None,
+    hints: Optional[list[str]] = None,
+    model: Optional[str] = None
 ) -> ClassificationResult:
     """
     Send document images to Claude Vision API for classification.
 
+    With page_texts, the request is text-primary: the extracted text layer
+    (or OCR text) of every page is sent, and images (if any) are only low-resolution
+    thumbnails for layout and scan quality.
+
     Args:
-        images: List of base64-encoded PNG image strings
+        images: Encoded page images (base64-encoded here, once, for the request)
         page_count: Total number of pages in the document
         retry_on_failure: If True, retry once on API error
+        contact_sheets: Optional PNG montages of page thumbnails
+        contact_sheet_pages: 0-based page numbers shown on the contact sheets
+        page_numbers: 0-based page number of each image (None = pages 1..N)
+        omitted_pages: 0-based page -> reason for pages elided before sending
+        page_texts: Text layer or OCR text per page (text-primary request)
+        hints: Unverified context from local models, sent ahead of the instruction
+        model: Model to use instead of settings.claude_model (degraded tier under load)
 
     Returns:
         ClassificationResult with parsed classification data
@@ -96,45 +118,67 @@ def classify_document(
         raise ClassificationError("ANTHROPIC_API_KEY not configured")
 
     client = anthropic.Anthropic()
+    model = model or settings.claude_model
 
-    # Build content with all images
+    # Build content with all images. This is the only place pages are
+    # base64-encoded; retries reuse the same content list.
     content = []
-    for img in images:
+    with timing.part('base64'):
+        for img in list(images) + list(contact_sheets or []):
+            content.append({
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": img.media_type,
+                    "data": img.to_base64()
+                }
+            })
+
+    if hints:
         content.append({
-            "type": "image",
-            "source": {
-                "type": "base64",
-                "media_type": "image/png",
-                "data": img
-            }
+            "type": "text",
+            "text": "Hints (verify against the document; ignore if they conflict):\n"
+                    + "\n".join(f"- {hint}" for hint in hints)
         })
 
-    # Add instruction text
-    pages_note = (
-        f"(showing {len(images)} of {page_count} pages)"
-        if len(images) < page_count
-        else f"({len(images)} pages)"
-    )
+    if page_texts:
+        instruction = _text_instruction(page_texts, page_count, len(images), omitted_pages)
+    else:
+        instruction = _image_instruction(
+            images, page_count, contact_sheets, contact_sheet_pages, page_numbers, omitted_pages
+        )
     content.append({
         "type": "text",
-        "text": f"Classify this fax document {pages_note}."
+        "text": instruction
     })
+    if page_texts:
+        input_path = "ocr" if any(page.source == "ocr" for page in page_texts) else "text"
+    else:
+        input_path = "image"
 
     # Call the API with retry logic
     last_error: Optional[Exception] = None
     attempts = 2 if retry_on_failure else 1
 
     for attempt in range(attempts):
+        if attempt:
+            API_RETRIES.inc(model=model)
+        attempt_span = tracing.start_span("api_attempt", attempt=attempt + 1, model=model, input_path=input_path)
         try:
             start_time = time.time()
 
-            response = client.messages.create(
-                model=settings.claude_model,
-                max_tokens=1024,
-                temperature=0,
-                system=CLASSIFICATION_PROMPT,
-                messages=[{"role": "user", "content": content}]
-            )
+            # One 'api' part per attempt, failed ones included
+            with timing.part('api'):
+                try:
+                    response = client.messages.create(
+                        model=model,
+                        max_tokens=1024,
+                        temperature=0,
+                        system=CLASSIFICATION_PROMPT,
+                        messages=[{"role": "user", "content": content}]
+                    )
+                finally:
+                    API_SECONDS.observe(time.time() - start_time, model=model)
 
             elapsed_ms = int((time.time() - start_time) * 1000)
 
@@ -201,9 +245,16 @@ def classify_document(
             token_usage = {
                 "input_tokens": response.usage.input_tokens,
                 "output_tokens": response.usage.output_tokens,
+                "cache_read_input_tokens": getattr(response.usage, "cache_read_input_tokens", None) or 0,
+                "cache_creation_input_tokens": getattr(response.usage, "cache_creation_input_tokens", None) or 0,
             }
+            API_REQUESTS.inc(model=model, outcome="success")
+            for kind, tokens in token_usage.items():
+                API_TOKENS.inc(tokens, model=model, type=kind.replace("_tokens", ""))
+            attempt_span.set(**{f"tokens.{kind.replace('_tokens', '')}": n for kind, n in token_usage.items()})
+            attempt_span.end()
 
-            return ClassificationResult(result, elapsed_ms, token_usage)
+            return ClassificationResult(result, elapsed_ms, token_usage, input_path=input_path)
 
         except json.JSONDecodeError as e:
             last_error = ClassificationError(f"Failed to parse JSON response: {e}")
@@ -212,9 +263,84 @@ def classify_document(
         except Exception as e:
             last_error = ClassificationError(f"Unexpected error: {e}")
 
+        API_REQUESTS.inc(model=model, outcome="error")
+        attempt_span.end(error=last_error)
+
         # If we get here and have more attempts, we'll retry
         if attempt < attempts - 1:
-            time.sleep(1)  # Brief pause before retry
+            with timing.part('retry_wait'):
+                time.sleep(1)  # Brief pause before retry
 
     # All attempts failed
     raise last_error
+
+
+def _image_instruction(
+    images: list[PageImage],
+    page_count: int,
+    contact_sheets: Optional[list[PageImage]],
+    contact_sheet_pages: Optional[list[int]],
+    page_numbers: Optional[list[int]],
+    omitted_pages: Optional[dict[int, str]]
+) -> str:
+    """Instruction for the image request: which pages are shown and what was left out."""
+    pages_note = (
+        f"(showing {len(images)} of {page_count} pages)"
+        if len(images) < page_count
+        else f"({len(images)} pages)"
+    )
+    if page_numbers is not None and page_numbers != list(range(len(images))):
+        shown = ", ".join(str(p + 1) for p in page_numbers)
+        pages_note = f"(showing {len(images)} of {page_count} pages: {shown})"
+    instruction = f"Classify this fax document {pages_note}."
+    if omitted_pages:
+        omitted = "; ".join(f"page {p + 1} {reason}" for p, reason in omitted_pages.items())
+        instruction += f" Omitted before sending: {omitted}."
+    if contact_sheets:
+        shown = len(contact_sheet_pages) if contact_sheet_pages else page_count
+        coverage = (
+            f"all {page_count} pages" if shown >= page_count
+            else f"{shown} sampled pages of {page_count}"
+        )
+        instruction += (
+            f" The first {len(images)} image(s) are full-resolution pages."
+            f" The last {len(contact_sheets)} image(s) are contact sheets of labeled"
+            f" thumbnails covering {coverage}."
+        )
+    return instruction
+
+
+def _text_instruction(
+    page_texts: list[PageText],
+    page_count: int,
+    thumbnails: int,
+    omitted_pages: Optional[dict[int, str]]
+) -> str:
+    """Instruction for the text-primary request, followed by the text layer of each page."""
+    pages_note = (
+        f"(showing {len(page_texts)} of {page_count} pages)"
+        if len(page_texts) < page_count
+        else f"({len(page_texts)} pages)"
+    )
+    if any(page.source == "ocr" for page in page_texts):
+        instruction = (
+            f"Classify this fax document {pages_note} from OCR text of its scanned pages."
+            " Expect occasional misread characters."
+        )
+    else:
+        instruction = f"Classify this fax document {pages_note} from its extracted text layer."
+    if omitted_pages:
+        omitted = "; ".join(f"page {p + 1} {reason}" for p, reason in omitted_pages.items())
+        instruction += f" Omitted before sending: {omitted}."
+    if thumbnails:
+        instruction += (
+            f" The {thumbnails} image(s) are low-resolution thumbnails for layout and"
+            " scan quality only; read content from the text below."
+        )
+    sections = [instruction]
+    for page in page_texts:
+        note = f" (OCR confidence {page.confidence:.0f}%)" if page.confidence is not None else ""
+        if page.truncated:
+            note += " (truncated)"
+        sections.append(f"--- Page {page.page_number + 1}{note} ---\n{page.text}")
+    return "\n\n".join(sections)
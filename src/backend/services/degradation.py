@@ -0,0 +1,191 @@
+"""
+FaxTriage AI — Adaptive Quality Degradation
+
+When the classification backlog grows, classifying everything a bit cheaper
+beats falling hours behind. The controller watches the shared queue — its
+depth and how long the oldest waiting document has waited — and steps the
+degradation level up one level per evaluation while either signal is past
+that level's threshold:
+
+    0 full     — configured render settings and model
+    1 reduced  — 75% resolution, grayscale
+    2 lean     — 60% resolution, grayscale, at most 2 pages, no contact sheets
+    3 economy  — 50% resolution, grayscale, first page only, no contact
+                 sheets, the economy model tier
+
+It steps back down one level at a time once both signals are below
+`hysteresis` × the current level's thresholds and the level has held for the
+cooldown, so a queue hovering at a threshold doesn't flap. Express-lane
+documents are never degraded. The level applied to each document is logged
+as a 'degradation' event.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from .. import database as db
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DegradationLevel:
+    """Render and model settings for one degradation level."""
+
+    __slots__ = ("level", "name", "dpi_scale", "grayscale", "max_pages", "contact_sheets", "model")
+
+    def __init__(
+        self,
+        level: int,
+        name: str,
+        dpi_scale: float = 1.0,
+        grayscale: bool = False,
+        max_pages: Optional[int] = None,
+        contact_sheets: bool = True,
+        model: Optional[str] = None
+    ):
+        self.level = level
+        self.name = name
+        self.dpi_scale = dpi_scale
+        self.grayscale = grayscale
+        self.max_pages = max_pages  # cap on full-resolution pages (None = normal strategy)
+        self.contact_sheets = contact_sheets
+        self.model = model  # None = settings.claude_model
+
+    def render_dpi(self, dpi: int, min_dpi: int) -> int:
+        return dpi if self.dpi_scale >= 1 else max(int(dpi * self.dpi_scale), min(min_dpi, dpi))
+
+    def to_dict(self) -> dict:
+        return {
+            'level': self.level,
+            'name': self.name,
+            'dpi_scale': self.dpi_scale,
+            'grayscale': self.grayscale,
+            'max_pages': self.max_pages,
+            'contact_sheets': self.contact_sheets,
+            'model': self.model,
+        }
+
+
+def build_levels(economy_model: str) -> list[DegradationLevel]:
+    return [
+        DegradationLevel(0, "full"),
+        DegradationLevel(1, "reduced", dpi_scale=0.75, grayscale=True),
+        DegradationLevel(2, "lean", dpi_scale=0.6, grayscale=True, max_pages=2, contact_sheets=False),
+        DegradationLevel(3, "economy", dpi_scale=0.5, grayscale=True, max_pages=1, contact_sheets=False,
+                         model=economy_model or None),
+    ]
+
+
+def parse_thresholds(spec: str) -> list[float]:
+    """'20,50,100' -> [20.0, 50.0, 100.0] (entering levels 1, 2, 3)"""
+    return [float(part) for part in spec.split(",") if part.strip()]
+
+
+class DegradationController:
+    """Picks the degradation level from queue depth and oldest wait, with hysteresis."""
+
+    def __init__(
+        self,
+        levels: list[DegradationLevel],
+        depth_thresholds: list[float],
+        wait_thresholds: list[float],
+        express_threshold: int = 60,
+        interval_seconds: float = 10.0,
+        cooldown_seconds: float = 120.0,
+        hysteresis: float = 0.5
+    ):
+        self.levels = levels
+        self.depth_thresholds = depth_thresholds
+        self.wait_thresholds = wait_thresholds
+        self.express_threshold = express_threshold
+        self.interval_seconds = interval_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.hysteresis = hysteresis
+        self._lock = threading.Lock()
+        self._level = 0
+        self._changed_at = time.monotonic()
+        self._evaluated_at: Optional[float] = None
+        self._signals = {'depth': 0, 'oldest_wait_seconds': 0.0}
+
+    def _measure(self) -> dict:
+        now = time.time()
+        lanes = db.get_queue_depth(now, self.express_threshold)
+        depth = sum((row['waiting'] or 0) for row in lanes.values())
+        oldest = min((row['oldest_queued_at'] for row in lanes.values() if row['oldest_queued_at']), default=None)
+        return {'depth': depth, 'oldest_wait_seconds': round(now - oldest, 1) if oldest else 0.0}
+
+    def _target(self, signals: dict, scale: float = 1.0) -> int:
+        by_depth = sum(signals['depth'] >= t * scale for t in self.depth_thresholds)
+        by_wait = sum(signals['oldest_wait_seconds'] >= t * scale for t in self.wait_thresholds)
+        return min(max(by_depth, by_wait), len(self.levels) - 1)
+
+    def evaluate(self, force: bool = False) -> int:
+        """Re-measure the queue (at most once per interval) and step the level. Returns the level."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._evaluated_at is not None and now - self._evaluated_at < self.interval_seconds:
+                return self._level
+            self._evaluated_at = now
+            self._signals = signals = self._measure()
+
+            previous = self._level
+            if self._target(signals) > self._level:
+                self._level += 1
+            elif (
+                self._level > 0
+                and self._target(signals, self.hysteresis) < self._level
+                and now - self._changed_at >= self.cooldown_seconds
+            ):
+                self._level -= 1
+            if self._level != previous:
+                self._changed_at = now
+                logger.info(
+                    "Degradation level %s -> %s (%s) at queue depth %s, oldest wait %ss",
+                    previous, self._level, self.levels[self._level].name,
+                    signals['depth'], signals['oldest_wait_seconds']
+                )
+            return self._level
+
+    def level_for(self, urgency: int = 0) -> DegradationLevel:
+        """Settings for a document about to be rendered and classified."""
+        level = self.evaluate()
+        if urgency >= self.express_threshold:
+            return self.levels[0]
+        return self.levels[level]
+
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                'level': self._level,
+                'name': self.levels[self._level].name,
+                'signals': dict(self._signals),
+                'depth_thresholds': self.depth_thresholds,
+                'wait_thresholds_seconds': self.wait_thresholds,
+                'held_seconds': round(time.monotonic() - self._changed_at, 1),
+                'levels': [level.to_dict() for level in self.levels],
+            }
+
+
+_controller: Optional[DegradationController] = None
+_controller_lock = threading.Lock()
+
+
+def get_degradation_controller() -> Optional[DegradationController]:
+    """The process-wide controller, or None when degradation is disabled or there is no queue to watch."""
+    global _controller
+    if not (settings.degradation_enabled and settings.classification_queue_enabled):
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = DegradationController(
+                build_levels(settings.degradation_economy_model),
+                parse_thresholds(settings.degradation_depth_thresholds),
+                parse_thresholds(settings.degradation_wait_thresholds_seconds),
+                express_threshold=settings.express_lane_threshold,
+                interval_seconds=settings.degradation_interval_seconds,
+                cooldown_seconds=settings.degradation_cooldown_seconds,
+                hysteresis=settings.degradation_hysteresis
+            )
+        return _controller
@@ -3,15 +3,45 @@ FaxTriage AI — Document Service
 
 Business logic layer for document operations.
 """
+import logging
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from ..config import settings
 from .. import database as db
-from .pdf_processor import pdf_to_base64_images, get_page_count, PDFProcessingError
-from .classifier import classify_document, ClassificationError
+from .pdf_processor import (
+    PageText,
+    pdf_to_page_images,
+    get_page_count,
+    render_contact_sheets,
+    sample_pages,
+    select_pages_to_send,
+    filter_pages,
+    extract_page_range,
+    extract_page_texts,
+    EncodingPolicy,
+    PDFProcessingError
+)
+from .bundle_splitter import detect_segments
+from .degradation import DegradationLevel, get_degradation_controller
+from .metrics import DOCUMENT_SECONDS, DOCUMENTS, STAGE_SECONDS
+from .local_classifier import get_local_classifier, parse_skip_types
+from .ocr import ocr_pages
+from .sender_index import match_sender, record_classification, sender_signature
+from .preflight import preflight_pdf, repair_pdf
+from .timing import DocumentTimer, part, record
+from . import profiling, tracing
+from .urgency import sniff_urgency
+from .pipeline import Pipeline, StageSpec, get_pipeline, start_pipeline
+from .work_queue import ClassificationQueue, LeaseLostError, QueuedDocument, start_classification_queue
+from .render_pool import run_render, run_render_parallel, split_pages
+from .classifier import classify_document, ClassificationError, ClassificationResult
+
+logger = logging.getLogger(__name__)
 
 
 class DocumentProcessingError(Exception):
@@ -65,122 +95,620 @@ def validate_pdf(filename: str, file_content: bytes) -> list[str]:
     return errors
 
 
-def process_document(doc_id: int, file_path: Path) -> dict:
+class DocumentJob:
+    """
+    A document moving through the processing stages, and what each stage
+    found out about it for the next.
     """
-    Process a document through the classification pipeline.
 
-    Args:
-        doc_id: Database document ID
-        file_path: Path to the PDF file
+    def __init__(self, doc_id: int, file_path: Path, urgency: int = 0, lease: Optional[QueuedDocument] = None):
+        self.doc_id = doc_id
+        self.file_path = Path(file_path)
+        self.urgency = urgency
+        # The queue lease the document is processed under, if it came from the queue
+        self.lease = lease
+        # preflight
+        self.render_path = self.file_path
+        self.render_dpi = 300
+        self.content_type: Optional[str] = None
+        self.candidate_pages: list[int] = []
+        self.omitted_pages: Optional[dict[int, str]] = None
+        self.page_texts: Optional[list[PageText]] = None
+        # Readable text of the document, whichever path it takes, for the local pre-classifier
+        self.local_text = ""
+        self.signature = None
+        self.sender = None
+        self.hints: list[str] = []
+        # render: classify_document arguments, at the degradation level in force
+        self.request: Optional[dict] = None
+        self.degradation: Optional[DegradationLevel] = None
+        # classify: set early when the sender index or local model replaces the API
+        self.result: Optional[ClassificationResult] = None
+        self.timer = DocumentTimer()
+        # Stages are traced under the span the job was created in, whichever thread runs them
+        self.span = tracing.current_span()
+        # Sampled for profiling: each stage writes a profile of the thread running it
+        profiler = profiling.get_profiler()
+        self.profiled = profiler is not None and profiler.sample_document()
+
+    @property
+    def lease_owner(self) -> Optional[str]:
+        return self.lease.owner if self.lease is not None else None
+
+    def check_lease(self):
+        """Stop a document whose queue lease was lost — another worker may be classifying it."""
+        if self.lease is not None and self.lease.lease_lost:
+            raise LeaseLostError(f"Lease on document {self.doc_id} lost by {self.lease.owner}")
+
+
+def _preflight_stage(job: DocumentJob):
+    """
+    Inspect the PDF and decide how it will be classified: preflight route,
+    page elision, text layer / OCR, sender index and local pre-classifier.
+    Leaves job.result set when no API call is needed.
+    """
+    doc_id = job.doc_id
+    file_path = job.file_path
+
+    # Update status to processing
+    db.update_document_status(doc_id, 'processing')
+    db.log_event(doc_id, 'processing_start')
+
+    # Inspect the file structure and pick the cheapest route that works for it
+    if settings.preflight_enabled:
+        with part('inspect'):
+            preflight = run_render(
+                preflight_pdf,
+                str(file_path),
+                max_pages=settings.preflight_max_pages,
+                max_file_mb=settings.max_file_size_mb,
+                max_page_inches=settings.preflight_max_page_inches,
+                sample_pages=settings.preflight_sample_pages,
+                text_dpi=settings.preflight_text_dpi,
+                scan_dpi_range=(settings.preflight_scan_min_dpi, settings.preflight_scan_max_dpi)
+            )
+        db.update_document_preflight(doc_id, preflight.category, preflight.route, preflight.to_dict())
+        db.log_event(doc_id, 'preflight', preflight.to_dict())
+
+        if preflight.route == 'reject':
+            raise PDFProcessingError(preflight.reason)
+        if preflight.route == 'repair':
+            job.render_path = file_path.with_name(f"{file_path.stem}_repaired.pdf")
+            with part('repair'):
+                run_render(repair_pdf, str(file_path), str(job.render_path))
+        job.render_dpi = preflight.render_dpi
+        job.content_type = preflight.details.get('content')
+    render_path = job.render_path
+    content_type = job.content_type
+
+    # Drop blank and near-duplicate pages before anything is rendered
+    if settings.page_filter_enabled:
+        with part('page_filter'):
+            page_filter = run_render(
+                filter_pages,
+                str(render_path),
+                blank_threshold=settings.blank_page_ink_threshold,
+                duplicate_max_distance=settings.duplicate_page_max_distance
+            )
+        candidate_pages = page_filter.kept
+        job.omitted_pages = page_filter.omitted_reasons()
+        if page_filter.dropped:
+            db.log_event(doc_id, 'page_filter', page_filter.to_dict())
+    else:
+        candidate_pages = list(range(run_render(get_page_count, str(render_path))))
+    job.candidate_pages = candidate_pages
+
+    # Text-layer PDFs skip rendering: the extracted text of every page is
+    # sent with a small thumbnail instead of full-resolution page images
+    page_texts = None
+    if settings.text_path_enabled and content_type in (None, 'text'):
+        with part('text_layer'):
+            page_texts = run_render(
+                extract_page_texts,
+                str(render_path),
+                candidate_pages,
+                max_chars_per_page=settings.text_path_max_chars_per_page
+            )
+        db.save_page_texts(doc_id, 'text_layer', [
+            {'page_number': page.page_number + 1, 'text': page.text}
+            for page in page_texts if page.text
+        ])
+        job.local_text = "\n".join(page.text for page in page_texts if page.usable)
+        text_chars = sum(len(page) for page in page_texts)
+        unusable = {str(page.page_number + 1): page.reason for page in page_texts if not page.usable}
+        use_text = not unusable and text_chars <= settings.text_path_max_chars
+        db.log_event(doc_id, 'text_layer', {
+            'used': use_text,
+            'pages': len(page_texts),
+            'chars': text_chars,
+            'unusable_pages': unusable,
+        })
+        if not use_text:
+            page_texts = None
 
-    Returns:
-        Classification result dict
+    # Scanned faxes have no text layer — an optional OCR pass can still put
+    # them on the text path when every page reads cleanly
+    if settings.ocr_enabled and content_type == 'scan' and len(candidate_pages) <= settings.ocr_max_pages:
+        ocr_started = time.perf_counter()
+        try:
+            with part('ocr'):
+                ocr_texts = run_render(
+                    ocr_pages,
+                    str(render_path),
+                    candidate_pages,
+                    dpi=settings.ocr_dpi,
+                    lang=settings.ocr_lang,
+                    min_confidence=settings.ocr_min_confidence,
+                    tesseract_cmd=settings.ocr_tesseract_cmd,
+                    page_timeout=settings.ocr_page_timeout_seconds,
+                    max_chars_per_page=settings.text_path_max_chars_per_page,
+                    timeout=settings.render_timeout_seconds + settings.ocr_page_timeout_seconds * len(candidate_pages)
+                )
+        except PDFProcessingError as e:
+            # OCR only saves work — the vision path still handles the document
+            db.log_event(doc_id, 'ocr', {'used': False, 'error': str(e)})
+        else:
+            db.save_page_texts(doc_id, 'ocr', [
+                {'page_number': page.page_number + 1, 'text': page.text, 'confidence': page.confidence}
+                for page in ocr_texts
+            ])
+            job.local_text = job.local_text or "\n".join(page.text for page in ocr_texts if page.usable)
+            ocr_chars = sum(len(page) for page in ocr_texts)
+            unusable = {str(page.page_number + 1): page.reason for page in ocr_texts if not page.usable}
+            use_ocr = not unusable and ocr_chars <= settings.text_path_max_chars
+            db.log_event(doc_id, 'ocr', {
+                'used': use_ocr,
+                'confidence': {str(page.page_number + 1): page.confidence for page in ocr_texts},
+                'chars': ocr_chars,
+                'unusable_pages': unusable,
+                'elapsed_ms': int((time.perf_counter() - ocr_started) * 1000),
+            })
+            if use_ocr:
+                page_texts = ocr_texts
+    job.page_texts = page_texts
+
+    # Known senders: faxes from a known junk sender are classified without
+    # the API; other known senders narrow the request and prefill fields
+    if settings.sender_index_enabled:
+        try:
+            with part('sender_signature'):
+                job.signature = run_render(
+                    sender_signature, str(render_path), exclude_numbers=(settings.practice_fax_number,)
+                )
+        except PDFProcessingError as e:
+            # The sender index only saves work — classify without it
+            db.log_event(doc_id, 'sender', {'error': str(e)})
+        else:
+            sender = job.sender = match_sender(job.signature, settings.sender_layout_max_distance)
+            auto_type = sender.auto_type(
+                parse_skip_types(settings.sender_auto_types),
+                settings.sender_min_observations,
+                settings.sender_auto_min_share
+            ) if sender else None
+            db.log_event(doc_id, 'sender', {
+                **job.signature.to_dict(),
+                **(sender.to_dict() if sender else {'sender_id': None}),
+                'auto_classified': auto_type,
+            })
+            if auto_type:
+                job.result = sender.to_classification(auto_type, run_render(get_page_count, str(render_path)))
+            elif sender and sender.observations >= settings.sender_min_observations:
+                job.hints.append(sender.hint())
+
+    # Local pre-classifier: a confident prediction for a configured type
+    # replaces the API call; otherwise it is passed along as a hint
+    model = get_local_classifier() if job.local_text and job.result is None else None
+    if model:
+        with part('local_classifier'):
+            local = model.predict(job.local_text)
+        skip_api = (
+            local.label in parse_skip_types(settings.local_classifier_skip_types)
+            and local.confidence >= settings.local_classifier_skip_threshold
+        )
+        db.log_event(doc_id, 'local_classifier', {**local.to_dict(), 'skipped_api': skip_api})
+        if skip_api:
+            job.result = local.to_classification(run_render(get_page_count, str(render_path)))
+        elif local.confidence >= settings.local_classifier_hint_threshold:
+            job.hints.append(local.hint())
 
-    Raises:
-        DocumentProcessingError: If processing fails
+
+def _render_stage(job: DocumentJob):
     """
-    try:
-        # Update status to processing
-        db.update_document_status(doc_id, 'processing')
-        db.log_event(doc_id, 'processing_start')
+    Build the API request for a document — text plus a thumbnail when it has
+    usable page text, rendered page images (and contact sheets) otherwise.
+    """
+    if job.result is not None:
+        return
+    doc_id = job.doc_id
+    render_path = job.render_path
+    candidate_pages = job.candidate_pages
+    page_texts = job.page_texts
+
+    # Under load, render cheaper (and classify with a cheaper model) rather than fall behind
+    controller = get_degradation_controller()
+    degradation = job.degradation = controller.level_for(job.urgency) if controller else DegradationLevel(0, "full")
+    render_dpi = degradation.render_dpi(job.render_dpi, settings.degradation_min_dpi)
+    if controller:
+        db.log_event(doc_id, 'degradation', {
+            **degradation.to_dict(),
+            'render_dpi': render_dpi,
+            'signals': controller.state()['signals'],
+        })
 
+    contact_sheets = None
+    sheet_pages = None
+    if page_texts:
+        page_numbers = candidate_pages
+        page_count = run_render(get_page_count, str(render_path))
+        images = []
+        if settings.text_path_thumbnail:
+            try:
+                with part('thumbnail'):
+                    images = run_render(
+                        render_contact_sheets,
+                        str(render_path),
+                        page_numbers=candidate_pages[:1],
+                        thumb_width=settings.text_path_thumbnail_width,
+                        columns=1
+                    )
+            except PDFProcessingError as e:
+                # The thumbnail is supplementary — the text carries the content
+                db.log_event(doc_id, 'contact_sheet', {'error': str(e)})
+    else:
         # Convert PDF to images
-        images, page_count = pdf_to_base64_images(str(file_path))
+        page_numbers = select_pages_to_send(candidate_pages, degradation.max_pages)
+        # Pages are split across workers, each opening the PDF on its own
+        with part('pages'):
+            rendered = run_render_parallel(
+                pdf_to_page_images,
+                str(render_path),
+                split_pages(page_numbers, settings.render_parallel_workers),
+                dpi=render_dpi,
+                # Padding is configured in pixels at 300 DPI
+                autocrop_padding=round(settings.autocrop_padding_px * render_dpi / 300) if settings.autocrop_enabled else None,
+                encoding=EncodingPolicy(
+                    settings.image_encoder,
+                    candidates=settings.image_encoder_candidates,
+                    min_psnr=settings.image_encoder_min_psnr
+                ),
+                fallback_threads=settings.pdf2image_max_threads,
+                grayscale=degradation.grayscale
+            )
+        images = [img for chunk_images, _ in rendered for img in chunk_images]
+        page_count = rendered[0][1]
+        # Where the render workers spent it, summed over pages (parallel
+        # workers can add up to more than the wall time of 'pages')
+        for img in images:
+            for name, ms in (img.timings or {}).items():
+                if ms:
+                    record(f"page_{name}", ms / 1000)
+        # Crop savings ride on the pages — out-parameters don't cross the worker boundary
+        crop_report = [{'page': img.page_number + 1, **img.crop} for img in images if img.crop]
+        if crop_report:
+            db.log_event(doc_id, 'autocrop', {'pages': crop_report})
+        # Which renderer produced each page — tracks how often poppler is needed
+        db.log_event(doc_id, 'render', {
+            'pages': {str(img.page_number + 1): img.renderer for img in images},
+            'fallback_pages': sum(img.renderer == 'pdf2image' for img in images),
+            'cached_pages': sum(img.cached for img in images),
+        })
 
         if not images:
             raise DocumentProcessingError("Failed to extract images from PDF")
 
-        # Classify the document
-        result = classify_document(images, page_count)
-
-        # Update database with results
-        db.update_document_classification(
-            doc_id=doc_id,
-            document_type=result.document_type,
-            confidence=result.confidence,
-            priority=result.priority,
-            extracted_fields=result.extracted_fields,
-            flags=result.flags,
-            processing_time_ms=result.processing_time_ms
-        )
+        # Long faxes only get their first pages at full resolution — add
+        # contact sheets so the model still sees the rest of the document
+        if settings.contact_sheet_enabled and degradation.contact_sheets and len(images) < len(candidate_pages):
+            sheet_pages = [
+                candidate_pages[i] for i in sample_pages(len(candidate_pages), settings.contact_sheet_max_pages)
+            ]
+            try:
+                # One task per sheet, so sheets render in parallel
+                per_sheet = max(settings.contact_sheet_pages_per_sheet, 1)
+                sheet_chunks = [sheet_pages[i:i + per_sheet] for i in range(0, len(sheet_pages), per_sheet)]
+                sheets_started = time.perf_counter()
+                contact_sheets = [
+                    sheet
+                    for sheets in run_render_parallel(
+                        render_contact_sheets,
+                        str(render_path),
+                        sheet_chunks,
+                        thumb_width=settings.contact_sheet_thumb_width,
+                        pages_per_sheet=per_sheet
+                    )
+                    for sheet in sheets
+                ]
+                record('contact_sheets', time.perf_counter() - sheets_started)
+                db.log_event(doc_id, 'contact_sheet', {
+                    'sheets': len(contact_sheets),
+                    'pages': [p + 1 for p in sheet_pages],
+                })
+            except PDFProcessingError as e:
+                # Contact sheets are supplementary — classify from the first pages alone
+                contact_sheets = None
+                sheet_pages = None
+                db.log_event(doc_id, 'contact_sheet', {'error': str(e)})
+
+    job.request = {
+        'images': images,
+        'page_count': page_count,
+        'contact_sheets': contact_sheets,
+        'contact_sheet_pages': sheet_pages,
+        'page_numbers': page_numbers,
+        'omitted_pages': job.omitted_pages,
+        'page_texts': page_texts,
+    }
+
+
+def _classify_stage(job: DocumentJob):
+    """Call the API with the rendered request, unless the document is already classified."""
+    job.check_lease()
+    if job.result is not None:
+        return
+    job.result = classify_document(
+        **job.request, hints=job.hints, model=job.degradation.model if job.degradation else None
+    )
+    # Rendered pages are no longer needed; don't hold them until persist
+    job.request = None
+    # Fields of a sender seen only once or twice aren't trusted yet
+    sender = job.sender
+    if sender and sender.observations >= settings.sender_min_observations:
+        prefilled = sender.prefill(job.result.extracted_fields)
+        if prefilled:
+            db.log_event(job.doc_id, 'sender_prefill', {'sender_id': sender.sender['id'], 'fields': prefilled})
+
+
+def _persist_stage(job: DocumentJob):
+    """Store the classification and teach the sender index."""
+    doc_id = job.doc_id
+    result = job.result
+
+    # Update database with results, only while still holding the queue lease
+    job.check_lease()
+    stored = db.update_document_classification(
+        doc_id=doc_id,
+        document_type=result.document_type,
+        confidence=result.confidence,
+        priority=result.priority,
+        extracted_fields=result.extracted_fields,
+        flags=result.flags,
+        processing_time_ms=result.processing_time_ms,
+        lease_owner=job.lease_owner
+    )
+    if not stored:
+        job.lease.lease_lost = True
+        job.check_lease()
+
+    # Log the classification event
+    db.log_event(doc_id, 'classify', {
+        'document_type': result.document_type,
+        'confidence': result.confidence,
+        'priority': result.priority,
+        'token_usage': result.token_usage,
+        'path': result.input_path,
+        'latency_ms': result.processing_time_ms,
+    })
 
-        # Log the classification event
-        db.log_event(doc_id, 'classify', {
-            'document_type': result.document_type,
-            'confidence': result.confidence,
-            'priority': result.priority,
-            'token_usage': result.token_usage,
-        })
+    # Every classification teaches the sender index, including ones it made
+    if job.signature is not None:
+        db.set_document_sender(doc_id, record_classification(job.signature, result, job.sender))
+    DOCUMENTS.inc(outcome="classified", flag="none")
 
-        return result.to_dict()
 
-    except PDFProcessingError as e:
-        # Graceful degradation — document MUST appear in the queue
+def _timed_stage(name: str, func):
+    """Run a stage under the document's timer, wherever the stage runs."""
+    def run(job: DocumentJob):
+        started = time.perf_counter()
         try:
-            db.update_document_classification(
-                doc_id=doc_id,
-                document_type="other",
-                confidence=0.0,
-                priority="high",
-                extracted_fields={"key_details": f"PDF processing failed: {e}"},
-                flags=["pdf_processing_failed"],
-                processing_time_ms=0
-            )
-        except Exception:
-            # Last resort — at minimum update status so doc isn't stuck at "processing"
-            try:
-                db.update_document_status(doc_id, 'classified')
-            except Exception:
-                pass  # DB is broken, nothing we can do
-        db.log_event(doc_id, 'error', {'error': str(e), 'type': 'pdf_processing'})
+            with tracing.span(name, parent=job.span, **{'document.id': job.doc_id}), job.timer.stage(name), \
+                    profiling.profile("stage", name, enabled=job.profiled, **{'document.id': job.doc_id}):
+                func(job)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+    return run
+
+
+# Stage order shared by process_document and the pipeline
+DOCUMENT_STAGES = [
+    (name, _timed_stage(name, func))
+    for name, func in [
+        ("preflight", _preflight_stage),
+        ("render", _render_stage),
+        ("classify", _classify_stage),
+        ("persist", _persist_stage),
+    ]
+]
+
+
+def record_job_timings(job: DocumentJob):
+    """Store the processing section of the document's timing breakdown."""
+    job.timer.finish()
+    db.update_document_timings(job.doc_id, 'processing', job.timer.to_dict())
+
+
+def record_processing_failure(doc_id: int, error: BaseException, lease_owner: Optional[str] = None) -> dict:
+    """
+    Graceful degradation — a document that fails processing still MUST appear
+    in the queue, classified as 'other' at high priority with a failure flag.
+    With lease_owner, only while that worker still holds the queue lease; a
+    document whose lease was lost is left to the worker that reclaimed it.
+    Returns the document record.
+    """
+    if isinstance(error, LeaseLostError):
+        logger.warning("%s; leaving the document to its new owner", error)
+        DOCUMENTS.inc(outcome="abandoned", flag="lease_lost")
         return db.get_document(doc_id)
+    if isinstance(error, PDFProcessingError):
+        details, flag, error_type = f"PDF processing failed: {error}", "pdf_processing_failed", 'pdf_processing'
+    elif isinstance(error, ClassificationError):
+        details, flag, error_type = f"Classification failed: {error}", "classification_failed", 'classification'
+    else:
+        details, flag, error_type = f"Processing failed: {error}", "processing_failed", 'unknown'
 
-    except ClassificationError as e:
-        # Graceful degradation — document MUST appear in the queue
+    try:
+        if not db.update_document_classification(
+            doc_id=doc_id,
+            document_type="other",
+            confidence=0.0,
+            priority="high",
+            extracted_fields={"key_details": details},
+            flags=[flag],
+            processing_time_ms=0,
+            lease_owner=lease_owner
+        ):
+            return record_processing_failure(doc_id, LeaseLostError(f"Lease on document {doc_id} lost"))
+    except Exception:
+        # Last resort — at minimum update status so doc isn't stuck at "processing"
         try:
-            db.update_document_classification(
-                doc_id=doc_id,
-                document_type="other",
-                confidence=0.0,
-                priority="high",
-                extracted_fields={"key_details": f"Classification failed: {e}"},
-                flags=["classification_failed"],
-                processing_time_ms=0
-            )
+            db.update_document_status(doc_id, 'classified')
         except Exception:
-            # Last resort — at minimum update status so doc isn't stuck at "processing"
-            try:
-                db.update_document_status(doc_id, 'classified')
-            except Exception:
-                pass  # DB is broken, nothing we can do
-        db.log_event(doc_id, 'error', {'error': str(e), 'type': 'classification'})
-        return db.get_document(doc_id)
+            pass  # DB is broken, nothing we can do
+    db.log_event(doc_id, 'error', {'error': str(error), 'type': error_type})
+    DOCUMENTS.inc(outcome="failed", flag=flag)
+    return db.get_document(doc_id)
+
 
+def process_document(doc_id: int, file_path: Path) -> dict:
+    """
+    Process a document through the classification pipeline, running every
+    stage in the calling thread.
+
+    Args:
+        doc_id: Database document ID
+        file_path: Path to the PDF file
+
+    Returns:
+        Classification result dict (the document record if processing failed)
+    """
+    return _process_job(DocumentJob(doc_id, file_path))
+
+
+def _process_job(job: DocumentJob) -> dict:
+    try:
+        for _, stage in DOCUMENT_STAGES:
+            stage(job)
+        return job.result.to_dict()
     except Exception as e:
-        # Graceful degradation — document MUST appear in the queue
-        try:
-            db.update_document_classification(
-                doc_id=doc_id,
-                document_type="other",
-                confidence=0.0,
-                priority="high",
-                extracted_fields={"key_details": f"Processing failed: {e}"},
-                flags=["processing_failed"],
-                processing_time_ms=0
-            )
-        except Exception:
-            # Last resort — at minimum update status so doc isn't stuck at "processing"
+        return record_processing_failure(job.doc_id, e, job.lease_owner)
+    finally:
+        record_job_timings(job)
+
+
+def start_document_pipeline() -> Pipeline:
+    """Start the staged pipeline that queued documents flow through."""
+    workers = {
+        "preflight": settings.pipeline_preflight_workers,
+        "render": settings.pipeline_render_workers,
+        "classify": settings.pipeline_classify_workers,
+        "persist": settings.pipeline_persist_workers,
+    }
+    return start_pipeline(
+        [StageSpec(name, func, workers[name], settings.pipeline_queue_size) for name, func in DOCUMENT_STAGES],
+        on_error=lambda job, error: record_processing_failure(job.doc_id, error, job.lease_owner)
+    )
+
+
+def run_document(doc_id: int, file_path: Path, urgency: int = 0, lease: Optional[QueuedDocument] = None):
+    """
+    Process a document through the staged pipeline when it is running
+    (ordered by urgency at every stage), otherwise in the calling thread.
+    lease is the queue lease it was claimed under.
+    """
+    job = DocumentJob(doc_id, file_path, urgency, lease)
+    pipeline = get_pipeline()
+    if pipeline is None:
+        _process_job(job)
+        return
+    pipeline.submit(job, priority=urgency).wait()
+    record_job_timings(job)
+
+
+def ingest_document(filename: str, file_content: bytes, client_id: Optional[str] = None) -> dict:
+    """
+    Validate, save and record an upload, and sniff its provisional urgency.
+    The document is left 'pending' for classification. client_id is the
+    uploader, counted against its admission limit while the document is queued.
+
+    Raises:
+        DocumentProcessingError: If the file fails validation
+    """
+    timer = DocumentTimer()
+    # Starts the document's trace, unless the caller already has one going.
+    # No file name: fax file names often carry patient names, and spans leave the host
+    ingest_span = tracing.span("ingest", **{
+        'client.id': client_id,
+        'file.bytes': len(file_content),
+    })
+    with ingest_span as span, timer.stage('ingest'):
+        # Validate
+        with part('validate'):
+            errors = validate_pdf(filename, file_content)
+        if errors:
+            raise DocumentProcessingError("; ".join(errors))
+
+        # Save file
+        with part('save'):
+            stored_filename, file_path = save_uploaded_file(filename, file_content)
+
+        # Get page count
+        with part('page_count'):
             try:
-                db.update_document_status(doc_id, 'classified')
+                page_count = run_render(get_page_count, str(file_path))
             except Exception:
-                pass  # DB is broken, nothing we can do
-        db.log_event(doc_id, 'error', {'error': str(e), 'type': 'unknown'})
+                page_count = None
+
+        # Provisional urgency from the text layer orders the classification queue
+        with part('urgency_sniff'):
+            urgency = sniff_urgency(str(file_path), page_count, max_pages=settings.urgency_sniff_pages)
+
+        # Create database record
+        doc_id = db.create_document(
+            filename=filename,
+            file_path=str(file_path),
+            page_count=page_count,
+            urgency_score=urgency.score,
+            client_id=client_id,
+            trace_id=span.trace_id
+        )
+        span.set(**{'document.id': doc_id, 'page_count': page_count, 'urgency': urgency.score})
+
+        # Log upload event
+        db.log_event(doc_id, 'upload', {
+            'original_filename': filename,
+            'stored_filename': stored_filename,
+            'page_count': page_count,
+            'urgency': urgency.to_dict(),
+            'client_id': client_id,
+            'request_id': tracing.get_request_id(),
+            'trace_id': span.trace_id,
+        })
+    timer.finish()
+    STAGE_SECONDS.observe(timer.finished - timer.started, stage='ingest')
+    db.update_document_timings(doc_id, 'ingest', timer.to_dict())
+
+    return db.get_document(doc_id)
+
+
+def classify_ingested(doc_id: int, file_path: Path, urgency: int = 0, lease: Optional[QueuedDocument] = None) -> dict:
+    """Classify an ingested document, splitting it if it is a bundle. Returns the document record."""
+    # Process through classification (always succeeds — errors result in fallback values)
+    run_document(doc_id, file_path, urgency, lease)
+    if lease is not None and lease.lease_lost:
+        # The worker that reclaimed it classifies (and splits) it
         return db.get_document(doc_id)
 
+    # Bundles get split into child documents, each classified on its own
+    doc = db.get_document(doc_id)
+    if settings.bundle_split_enabled and 'multi_document_bundle' in (doc.get('flags') or []):
+        split_bundle(doc_id, file_path)
+
+    # Return the complete document record
+    return db.get_document(doc_id)
+
 
 def upload_and_process(filename: str, file_content: bytes) -> dict:
     """
-    Complete upload and processing workflow.
+    Complete upload and processing workflow, inline in the caller's thread.
 
     1. Validate the file
     2. Save to disk
@@ -198,39 +726,137 @@ def upload_and_process(filename: str, file_content: bytes) -> dict:
     Raises:
         DocumentProcessingError: If any step fails
     """
-    # Validate
-    errors = validate_pdf(filename, file_content)
-    if errors:
-        raise DocumentProcessingError("; ".join(errors))
+    started = time.perf_counter()
+    with tracing.span("upload"):
+        doc = ingest_document(filename, file_content)
+        doc = classify_ingested(doc['id'], Path(doc['file_path']))
+    DOCUMENT_SECONDS.observe(time.perf_counter() - started, mode="inline")
+    return doc
+
+
+def enqueue_document(queue: ClassificationQueue, doc: dict):
+    """Queue an ingested document for classification by its urgency score."""
+    queue.submit(doc['id'])
+
+
+def process_queued(item: QueuedDocument) -> dict:
+    """Classification queue handler: record the queue wait, then classify."""
+    db.log_event(item.doc_id, 'queue', {
+        'lane': item.lane,
+        'urgency': item.urgency,
+        'wait_ms': item.wait_ms,
+        'attempt': item.attempt,
+        'worker': item.owner,
+    })
+    db.update_document_timings(item.doc_id, 'queue', {
+        'wait_ms': item.wait_ms,
+        'lane': item.lane,
+        'attempt': item.attempt,
+    })
+    STAGE_SECONDS.observe(item.wait_ms / 1000, stage='queue_wait')
+    # Continues the trace the upload started, possibly in another process
+    with tracing.span("process", trace_id=item.trace_id, **{
+        'document.id': item.doc_id,
+        'queue.lane': item.lane,
+        'queue.attempt': item.attempt,
+        'urgency': item.urgency,
+        'worker': item.owner,
+    }):
+        tracing.add_span(
+            "queue_wait", int(item.enqueued_at * 1e9), int(item.started_at * 1e9), **{'queue.lane': item.lane}
+        )
+        doc = classify_ingested(item.doc_id, Path(item.file_path), item.urgency, lease=item)
+    # From enqueue (shared epoch clock), so it holds across processes
+    DOCUMENT_SECONDS.observe(max(time.time() - item.enqueued_at, 0.0), mode="queued")
+    return doc
+
+
+def start_classification_workers() -> ClassificationQueue:
+    """Start this process's classification workers on the shared queue."""
+    return start_classification_queue(
+        process_queued,
+        workers=settings.classification_workers,
+        express_workers=settings.express_lane_workers,
+        express_threshold=settings.express_lane_threshold,
+        aging_per_minute=settings.queue_aging_per_minute,
+        lease_seconds=settings.queue_lease_seconds,
+        heartbeat_seconds=settings.queue_heartbeat_seconds,
+        max_attempts=settings.queue_max_attempts,
+        poll_seconds=settings.queue_poll_seconds
+    )
+
+
+def split_bundle(doc_id: int, file_path: Path) -> list[int]:
+    """
+    Split a multi-document bundle into child documents and classify them.
 
-    # Save file
-    stored_filename, file_path = save_uploaded_file(filename, file_content)
+    Segments are found from text-layer cues (see bundle_splitter), written out
+    as their own PDFs so each page range is viewable, and classified
+    concurrently. The parent keeps its bundle-level classification.
+
+    Returns:
+        IDs of the created child documents (empty if no boundaries were found)
+    """
+    parent = db.get_document(doc_id)
+    if not parent or parent.get('parent_id'):
+        # Never re-split a segment
+        return []
 
-    # Get page count
     try:
-        page_count = get_page_count(str(file_path))
-    except Exception:
-        page_count = None
+        segments = run_render(detect_segments, str(file_path), max_segments=settings.bundle_max_segments)
+    except PDFProcessingError as e:
+        db.log_event(doc_id, 'bundle_split', {'error': str(e)})
+        return []
 
-    # Create database record
-    doc_id = db.create_document(
-        filename=filename,
-        file_path=str(file_path),
-        page_count=page_count
-    )
+    if len(segments) < 2:
+        db.log_event(doc_id, 'bundle_split', {'segments': len(segments), 'children': []})
+        return []
 
-    # Log upload event
-    db.log_event(doc_id, 'upload', {
-        'original_filename': filename,
-        'stored_filename': stored_filename,
-        'page_count': page_count,
+    children = []
+    for page_start, page_end in segments:
+        child_path = file_path.with_name(f"{file_path.stem}_p{page_start}-{page_end}.pdf")
+        try:
+            page_count = run_render(extract_page_range, str(file_path), str(child_path), page_start, page_end)
+        except PDFProcessingError as e:
+            db.log_event(doc_id, 'bundle_split', {
+                'error': str(e), 'page_start': page_start, 'page_end': page_end,
+            })
+            continue
+
+        pages_label = f"p. {page_start}" if page_start == page_end else f"pp. {page_start}-{page_end}"
+        child_id = db.create_document(
+            filename=f"{parent['filename']} ({pages_label})",
+            file_path=str(child_path),
+            page_count=page_count,
+            parent_id=doc_id,
+            page_start=page_start,
+            page_end=page_end,
+            trace_id=parent.get('trace_id')
+        )
+        db.log_event(child_id, 'upload', {
+            'parent_id': doc_id,
+            'page_start': page_start,
+            'page_end': page_end,
+            'page_count': page_count,
+        })
+        children.append((child_id, child_path))
+
+    db.log_event(doc_id, 'bundle_split', {
+        'segments': [[start, end] for start, end in segments],
+        'children': [child_id for child_id, _ in children],
     })
 
-    # Process through classification (always succeeds — errors result in fallback values)
-    process_document(doc_id, file_path)
+    # Processing never raises, so one failed segment can't sink the rest
+    urgency = parent.get('urgency_score') or 0
 
-    # Return the complete document record
-    return db.get_document(doc_id)
+    def classify_segment(child: tuple[int, Path]):
+        with tracing.span("bundle_segment", **{'document.id': child[0]}):
+            run_document(*child, urgency)
+
+    with ThreadPoolExecutor(max_workers=max(settings.bundle_max_workers, 1)) as pool:
+        list(pool.map(tracing.bind(classify_segment), children))
+
+    return [child_id for child_id, _ in children]
 
 
 def update_document(
@@ -270,6 +896,10 @@ def update_document(
         reviewed_by=reviewed_by
     )
 
+    # A reviewer's type correction also corrects the sender's history
+    if 'document_type' in changes and current.get('sender_id'):
+        db.correct_sender_type(current['sender_id'], current.get('document_type'), document_type)
+
     # Log changes
     if changes:
         event_type = 'reassign' if 'document_type' in changes else 'review'
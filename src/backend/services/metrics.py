@@ -0,0 +1,181 @@
+"""
+FaxTriage AI — Metrics
+
+Counters and histograms in the Prometheus text exposition format, without
+the client library. Recording is a dict update under a lock, cheap enough
+for every stage, API attempt and database connection. Live values (queue
+depth, worker utilization, degradation level) are read when /metrics is
+scraped, as gauges.
+
+Metrics are per process: each API server and standalone worker exposes its
+own, and Prometheus sums them.
+"""
+import bisect
+import threading
+from typing import Iterable, Optional
+
+# Seconds; stages range from a database write to a slow API call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+DOCUMENT_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+SQLITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}_total{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values, set when the metrics are collected."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: Optional[float], **labels):
+        if value is not None:
+            self._values[tuple(labels.get(name, "") for name in self.labelnames)] = value
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+def render(metrics: Iterable) -> str:
+    """Text exposition format (version 0.0.4) for a set of metrics."""
+    lines = []
+    for metric in metrics:
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+# --- Process-wide metrics recorded in the hot path ---
+
+STAGE_SECONDS = Histogram(
+    "faxtriage_stage_duration_seconds",
+    "Time per document processing stage (ingest, queue_wait, preflight, render, classify, persist)",
+    ["stage"]
+)
+DOCUMENT_SECONDS = Histogram(
+    "faxtriage_document_duration_seconds",
+    "End-to-end document latency from upload (or enqueue) to classified",
+    ["mode"],
+    buckets=DOCUMENT_BUCKETS
+)
+DOCUMENTS = Counter(
+    "faxtriage_documents",
+    "Documents finished, by outcome and fallback flag",
+    ["outcome", "flag"]
+)
+API_REQUESTS = Counter(
+    "faxtriage_api_requests",
+    "Classification API attempts by model and outcome",
+    ["model", "outcome"]
+)
+API_SECONDS = Histogram(
+    "faxtriage_api_request_duration_seconds",
+    "Classification API attempt latency",
+    ["model"]
+)
+API_RETRIES = Counter(
+    "faxtriage_api_retries",
+    "Classification API attempts that were retries of a failed attempt",
+    ["model"]
+)
+API_TOKENS = Counter(
+    "faxtriage_api_tokens",
+    "Tokens used by classification API calls",
+    ["model", "type"]
+)
+SQLITE_SECONDS = Histogram(
+    "faxtriage_sqlite_query_duration_seconds",
+    "Time a SQLite connection was held: connect, queries and commit",
+    buckets=SQLITE_BUCKETS
+)
+
+RECORDED = [STAGE_SECONDS, DOCUMENT_SECONDS, DOCUMENTS, API_REQUESTS, API_SECONDS, API_RETRIES, API_TOKENS, SQLITE_SECONDS]
@@ -0,0 +1,201 @@
+"""
+FaxTriage AI — OCR Pre-pass
+
+Optional local OCR of image-only (scanned) faxes with the Tesseract
+binary, run in the render worker pool like any other PDF task.
+
+Each page gets its recognized text and a mean word confidence. When every
+page reads cleanly, the document is classified from its OCR text plus a
+thumbnail (the text path) instead of full-resolution page images. Poor OCR
+— handwriting, heavy scan noise — leaves the document on the vision path,
+where the model reads the pixels itself.
+
+Tesseract is an optional dependency: without the binary on PATH, OCR is
+reported unavailable and documents are rendered as before.
+"""
+import shutil
+import subprocess
+import time
+from functools import lru_cache
+from io import BytesIO
+from typing import Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from .pdf_processor import PDFProcessingError, PageText, text_layer_problem
+from .render_cache import file_digest, get_render_cache
+
+# Tesseract TSV row level for a single word
+TSV_WORD_LEVEL = "5"
+
+
+def tesseract_available(tesseract_cmd: str = "tesseract") -> bool:
+    """True if the Tesseract binary can be found."""
+    return shutil.which(tesseract_cmd) is not None
+
+
+@lru_cache(maxsize=8)
+def tesseract_version(tesseract_cmd: str = "tesseract") -> str:
+    """First line of `tesseract --version` (part of the OCR cache key)."""
+    try:
+        proc = subprocess.run([tesseract_cmd, "--version"], capture_output=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise PDFProcessingError(f"Tesseract unavailable: {e}")
+    output = (proc.stdout or proc.stderr).decode("utf-8", "replace").strip()
+    return output.splitlines()[0] if output else "unknown"
+
+
+def parse_tesseract_tsv(tsv: str) -> tuple[str, Optional[float]]:
+    """
+    Rebuild page text from Tesseract TSV output.
+
+    Returns:
+        Tuple of (text with one line per recognized line, mean word
+        confidence 0-100 weighted by word length — None if no words)
+    """
+    lines: dict[tuple[str, ...], list[str]] = {}
+    weighted = 0.0
+    chars = 0
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t", 11)
+        if len(cols) < 12 or cols[0] != TSV_WORD_LEVEL:
+            continue
+        word = cols[11].strip()
+        try:
+            confidence = float(cols[10])
+        except ValueError:
+            continue
+        if not word or confidence < 0:
+            continue
+        # (block, paragraph, line) — rows arrive in reading order
+        lines.setdefault(tuple(cols[2:5]), []).append(word)
+        weighted += confidence * len(word)
+        chars += len(word)
+
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, (weighted / chars if chars else None)
+
+
+def ocr_image(
+    img: Image.Image,
+    dpi: int = 300,
+    lang: str = "eng",
+    tesseract_cmd: str = "tesseract",
+    timeout: float = 30.0
+) -> tuple[str, Optional[float]]:
+    """
+    OCR one page image with Tesseract.
+
+    Returns:
+        Tuple of (text, mean word confidence 0-100 or None)
+
+    Raises:
+        PDFProcessingError: If Tesseract is missing, fails or times out
+    """
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    try:
+        proc = subprocess.run(
+            [tesseract_cmd, "stdin", "stdout", "-l", lang, "--dpi", str(dpi), "tsv"],
+            input=buffer.getvalue(),
+            capture_output=True,
+            timeout=timeout
+        )
+    except FileNotFoundError:
+        raise PDFProcessingError(f"Tesseract not found: {tesseract_cmd}")
+    except subprocess.TimeoutExpired:
+        raise PDFProcessingError(f"OCR timed out after {timeout:.0f}s")
+
+    if proc.returncode != 0:
+        error = proc.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise PDFProcessingError(f"Tesseract failed: {error[-1] if error else proc.returncode}")
+    return parse_tesseract_tsv(proc.stdout.decode("utf-8", "replace"))
+
+
+def ocr_pages(
+    pdf_path: str,
+    page_numbers: Optional[list[int]] = None,
+    dpi: int = 300,
+    lang: str = "eng",
+    min_confidence: float = 80.0,
+    tesseract_cmd: str = "tesseract",
+    page_timeout: float = 30.0,
+    max_chars_per_page: int = 8000
+) -> list[PageText]:
+    """
+    OCR pages of a PDF, flagging pages whose OCR is too poor to classify from.
+
+    A page is usable when its mean word confidence is at least min_confidence
+    and its text passes the same checks as a text layer.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages (None = all pages)
+        dpi: Grayscale render resolution fed to Tesseract
+        lang: Tesseract language(s), e.g. "eng"
+        min_confidence: Minimum mean word confidence (0-100) for a usable page
+        tesseract_cmd: Tesseract binary
+        page_timeout: Seconds allowed per page
+        max_chars_per_page: Longer page text is truncated
+
+    Returns:
+        PageText per page with source="ocr" and its confidence
+
+    Raises:
+        PDFProcessingError: If the PDF can't be read or Tesseract fails
+    """
+    if not tesseract_available(tesseract_cmd):
+        raise PDFProcessingError(f"Tesseract not found: {tesseract_cmd}")
+
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    try:
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
+
+        cache = get_render_cache()
+        if cache:
+            digest = file_digest(pdf_path)
+            engine = tesseract_version(tesseract_cmd)
+        zoom = dpi / 72
+        pages = []
+        for page_num in (range(len(doc)) if page_numbers is None else page_numbers):
+            key = None
+            hit = None
+            if cache:
+                key = cache.make_key(digest, page_num, renderer="ocr", dpi=dpi, lang=lang, engine=engine)
+                hit = cache.get(key)
+
+            if hit is not None:
+                text, confidence = hit[1]
+            else:
+                started = time.perf_counter()
+                try:
+                    pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+                except Exception as e:
+                    raise PDFProcessingError(f"Failed to render PDF page for OCR: {e}")
+                img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                text, confidence = ocr_image(img, dpi, lang, tesseract_cmd, page_timeout)
+                if cache:
+                    cache.put(key, b"", [text, confidence], render_ms=int((time.perf_counter() - started) * 1000))
+
+            if confidence is None or confidence < min_confidence:
+                problem = "no text" if confidence is None else f"low OCR confidence ({confidence:.0f})"
+            else:
+                problem = text_layer_problem(text)
+            pages.append(PageText(
+                page_num,
+                text[:max_chars_per_page],
+                usable=problem is None,
+                reason=problem,
+                truncated=len(text) > max_chars_per_page,
+                source="ocr",
+                confidence=round(confidence, 1) if confidence is not None else None
+            ))
+        return pages
+    finally:
+        doc.close()
@@ -1,16 +1,47 @@
 """
 FaxTriage AI — PDF Processing Service
 
-Converts PDF documents to base64-encoded images for Claude Vision API.
+Converts PDF documents to encoded page images for Claude Vision API.
+Pages are kept as raw bytes (PageImage) and only base64-encoded when the
+API request is built.
 Ported from scripts/test_classification.py
 """
 import base64
+import re
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import fitz  # PyMuPDF
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageStat
+
+from .render_cache import RenderCache, file_digest, get_render_cache
+
+# Grayscale level below which a pixel counts as ink (excludes light scan wash)
+INK_LEVEL = 200
+
+# Mean brightness (0-1) below which a render is treated as black/failed
+BLACK_THRESHOLD = 0.05
+
+# Auto-crop: top share of the page treated as the fax header band, and how much
+# darker than its row's background a pixel must be to count there. Header
+# lines are often faint thermal-printer text that INK_LEVEL alone would miss.
+HEADER_BAND = 0.12
+HEADER_CONTRAST = 24
+
+# Text layer: minimum characters for a page's text to be worth sending, the
+# share of characters that must be ordinary text (garbled font encodings
+# produce control/private-use/replacement characters), and the share of
+# 3+ letter words that must contain a vowel (unmapped glyphs decode to
+# consonant soup)
+TEXT_LAYER_MIN_CHARS = 40
+TEXT_LAYER_MIN_CLEAN = 0.9
+TEXT_LAYER_MIN_WORDLIKE = 0.7
 
 # Try to import pdf2image for fallback
 try:
@@ -20,7 +51,22 @@ except ImportError:
     PDF2IMAGE_AVAILABLE = False
 
 
-def is_image_black_or_empty(img_bytes: bytes, threshold: float = 0.05) -> bool:
+def _open_cache(pdf_path: str) -> tuple[Optional[RenderCache], Optional[str]]:
+    """Render cache and the PDF's content hash, or (None, None) if caching is off."""
+    cache = get_render_cache()
+    if cache is None:
+        return None, None
+    try:
+        return cache, file_digest(pdf_path)
+    except OSError:
+        return None, None
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def is_image_black_or_empty(img_bytes: bytes, threshold: float = BLACK_THRESHOLD) -> bool:
     """
     Check if an image is mostly black/empty by analyzing pixel values.
 
@@ -32,98 +78,587 @@ def is_image_black_or_empty(img_bytes: bytes, threshold: float = 0.05) -> bool:
         True if image appears black/empty
     """
     try:
-        img = Image.open(BytesIO(img_bytes))
-        gray = img.convert('L')
-        pixels = list(gray.getdata())
-        avg_brightness = sum(pixels) / (len(pixels) * 255.0)
-        return avg_brightness < threshold
+        return is_pil_image_black(Image.open(BytesIO(img_bytes)), threshold)
     except Exception:
         return False
 
 
-def pdf_to_base64_images_pymupdf(
-    pdf_path: str,
-    pages_to_process: int,
-    dpi: int = 300
-) -> tuple[list[str], bool]:
+def is_pil_image_black(img: Image.Image, threshold: float = BLACK_THRESHOLD) -> bool:
+    """Same check as is_image_black_or_empty, on an already-decoded image."""
+    gray = img.convert('L')
+    return ImageStat.Stat(gray).mean[0] / 255.0 < threshold
+
+
+def analyze_image(img: Image.Image) -> tuple[float, float]:
     """
-    Convert PDF pages using PyMuPDF.
+    Brightness and ink coverage of a rendered page from one histogram pass.
 
     Returns:
-        Tuple of (list of base64 images, success flag)
+        Tuple of (mean brightness 0-1, share of pixels darker than INK_LEVEL)
+    """
+    histogram = img.convert('L').histogram()
+    pixels = sum(histogram) or 1
+    brightness = sum(level * count for level, count in enumerate(histogram)) / (pixels * 255.0)
+    return brightness, sum(histogram[:INK_LEVEL]) / pixels
+
+
+class PageImage:
+    """
+    An encoded page image held as raw bytes.
+
+    Base64 inflates size by a third, so pages stay as bytes through the
+    pipeline and are encoded once, when the API request is built.
+    """
+
+    __slots__ = (
+        "data", "media_type", "page_number", "width", "height",
+        "brightness", "ink_coverage", "crop", "renderer", "cached", "timings",
+    )
+
+    def __init__(
+        self,
+        data: bytes,
+        media_type: str,
+        page_number: Optional[int] = None,
+        width: int = 0,
+        height: int = 0,
+        brightness: Optional[float] = None,
+        ink_coverage: Optional[float] = None,
+        crop: Optional[dict] = None,
+        renderer: Optional[str] = None,
+        cached: bool = False,
+        timings: Optional[dict] = None
+    ):
+        self.data = data
+        self.media_type = media_type
+        self.page_number = page_number  # 0-based; None for composites (contact sheets)
+        self.width = width
+        self.height = height
+        # Analysis metrics from the full-resolution render
+        self.brightness = brightness  # mean, 0-1
+        self.ink_coverage = ink_coverage  # share of pixels darker than INK_LEVEL
+        self.crop = crop  # autocrop savings, None if not cropped
+        self.renderer = renderer  # "pymupdf" or "pdf2image"; None for composites
+        self.cached = cached  # served from the render cache
+        # Milliseconds spent producing this page by part (open, rasterize,
+        # black_check, autocrop, encode, fallback, cache_read) — rides back
+        # from the render worker with the page
+        self.timings = timings
+
+    @property
+    def is_black(self) -> bool:
+        return self.brightness is not None and self.brightness < BLACK_THRESHOLD
+
+    def cache_meta(self) -> dict:
+        """Everything but the image bytes, as JSON-serializable render cache metadata."""
+        return {
+            'media_type': self.media_type,
+            'page_number': self.page_number,
+            'width': self.width,
+            'height': self.height,
+            'brightness': self.brightness,
+            'ink_coverage': self.ink_coverage,
+            'crop': self.crop,
+            'renderer': self.renderer,
+        }
+
+    @classmethod
+    def from_cache(cls, data: bytes, meta: dict, timings: Optional[dict] = None) -> "PageImage":
+        """Rebuild a page from a render cache entry (see cache_meta)."""
+        return cls(
+            data, meta['media_type'], meta.get('page_number'), meta.get('width', 0), meta.get('height', 0),
+            brightness=meta.get('brightness'), ink_coverage=meta.get('ink_coverage'), crop=meta.get('crop'),
+            renderer=meta.get('renderer'), cached=True, timings=timings
+        )
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the encoded bytes."""
+        return memoryview(self.data)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.view()).decode("ascii")
+
+    def __repr__(self) -> str:
+        return (
+            f"PageImage(page={self.page_number}, {self.media_type}, "
+            f"{self.width}x{self.height}, {len(self.data)} bytes)"
+        )
+
+
+# --- Image encoders ---
+
+class ImageEncoder(ABC):
+    """Encodes a rendered page image to bytes for the API."""
+
+    name: str = ""
+    media_type: str = ""
+    lossless: bool = True
+
+    @abstractmethod
+    def encode(self, img: Image.Image) -> bytes:
+        ...
+
+    def _save(self, img: Image.Image, **options) -> bytes:
+        if img.mode in ("RGBA", "LA", "P"):
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.convert("RGBA").getchannel("A"))
+            img = background
+        buffer = BytesIO()
+        img.save(buffer, **options)
+        return buffer.getvalue()
+
+
+class PNGEncoder(ImageEncoder):
+    """Lossless PNG; higher compress_level is smaller but slower."""
+
+    media_type = "image/png"
+
+    def __init__(self, compress_level: int = 6):
+        self.compress_level = compress_level
+        self.name = f"png:{compress_level}"
+
+    def encode(self, img: Image.Image) -> bytes:
+        return self._save(img, format="PNG", compress_level=self.compress_level)
+
+
+class WebPEncoder(ImageEncoder):
+    """Lossless WebP — typically a third of PNG size on fax pages."""
+
+    name = "webp"
+    media_type = "image/webp"
+
+    def __init__(self, method: int = 4):
+        self.method = method
+
+    def encode(self, img: Image.Image) -> bytes:
+        return self._save(img, format="WEBP", lossless=True, method=self.method)
+
+
+class JPEGEncoder(ImageEncoder):
+    """Lossy JPEG at a fixed quality."""
+
+    media_type = "image/jpeg"
+    lossless = False
+
+    def __init__(self, quality: int = 85):
+        self.quality = quality
+        self.name = f"jpeg:{quality}"
+
+    def encode(self, img: Image.Image) -> bytes:
+        return self._save(img, format="JPEG", quality=self.quality, optimize=True)
+
+
+def get_encoder(spec: str) -> ImageEncoder:
+    """
+    Build an encoder from a spec string: "png", "png:9", "webp", "jpeg", "jpeg:75".
 
     Raises:
-        PDFProcessingError: If PDF cannot be opened or rendered
+        ValueError: If the format is unknown
+    """
+    name, _, arg = spec.strip().lower().partition(":")
+    if name == "png":
+        return PNGEncoder(int(arg)) if arg else PNGEncoder()
+    if name == "webp":
+        return WebPEncoder(int(arg)) if arg else WebPEncoder()
+    if name in ("jpeg", "jpg"):
+        return JPEGEncoder(int(arg)) if arg else JPEGEncoder()
+    raise ValueError(f"Unknown image encoder: {spec}")
+
+
+def psnr(original: Image.Image, encoded: bytes) -> float:
+    """Peak signal-to-noise ratio (dB) of an encoding against the original, in grayscale."""
+    reference = np.asarray(original.convert("L"), dtype=np.float32)
+    decoded = np.asarray(Image.open(BytesIO(encoded)).convert("L"), dtype=np.float32)
+    mse = float(np.mean((reference - decoded) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+class EncodingPolicy:
+    """
+    Chooses how each page is encoded.
+
+    A single encoder spec ("png", "webp", "jpeg:85") is used as-is. "auto"
+    encodes with every candidate and keeps the smallest result; lossy
+    candidates only qualify when their PSNR meets min_psnr, so a candidate
+    list without a lossless encoder gets PNG added as the fallback.
     """
+
+    def __init__(self, spec: str = "png", candidates: str = "png,webp,jpeg:85", min_psnr: float = 42.0):
+        self.auto = spec.strip().lower() == "auto"
+        specs = candidates.split(",") if self.auto else [spec]
+        self.encoders = [get_encoder(s) for s in specs if s.strip()]
+        if self.auto and not any(encoder.lossless for encoder in self.encoders):
+            self.encoders.append(PNGEncoder())
+        self.min_psnr = min_psnr
+
+    def encode(self, img: Image.Image) -> tuple[bytes, str]:
+        """Returns (encoded bytes, media type)."""
+        if not self.auto:
+            encoder = self.encoders[0]
+            return encoder.encode(img), encoder.media_type
+
+        best: Optional[tuple[bytes, str]] = None
+        for encoder in self.encoders:
+            data = encoder.encode(img)
+            if best is not None and len(data) >= len(best[0]):
+                continue
+            if not encoder.lossless and psnr(img, data) < self.min_psnr:
+                continue
+            best = (data, encoder.media_type)
+        return best
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the encoding settings in render cache keys."""
+        names = ",".join(encoder.name for encoder in self.encoders)
+        return f"auto:{names}@{self.min_psnr}" if self.auto else names
+
+
+def autocrop_box(
+    gray: np.ndarray,
+    padding: int = 36,
+    protect_boxes: Optional[list[tuple[int, int, int, int]]] = None
+) -> Optional[tuple[int, int, int, int]]:
+    """
+    Find the content bounding box of a grayscale page image.
+
+    Margins, speckles and the light edge shadows scanners leave behind fall
+    above INK_LEVEL and are trimmed. Two guards keep header content:
+    rows in the top HEADER_BAND that hold faint marks (darker than the row's
+    median by HEADER_CONTRAST) count as content, and protect_boxes (e.g. text
+    layer blocks, in pixels) are always kept inside the crop.
+
+    Args:
+        gray: 2-D uint8 array (0 = black, 255 = white)
+        padding: Pixels of margin kept around the content
+        protect_boxes: (x0, y0, x1, y1) regions that must stay in the crop
+
+    Returns:
+        (left, top, right, bottom) crop box, or None if the page has no content
+    """
+    height, width = gray.shape
+    ink = gray < INK_LEVEL
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    left, top, right, bottom = cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+    # Header guard — skip the outer 5% of columns so vertical edge shadows
+    # don't make every row look like content
+    band = gray[:max(int(height * HEADER_BAND), 1), width // 20: width - width // 20].astype(np.int16)
+    faint = (np.median(band, axis=1, keepdims=True) - band) > HEADER_CONTRAST
+    header_rows = np.flatnonzero(faint.sum(axis=1) >= 3)
+    if header_rows.size:
+        top = min(top, header_rows[0])
+
+    for x0, y0, x1, y1 in protect_boxes or []:
+        left, top = min(left, x0), min(top, y0)
+        right, bottom = max(right, x1), max(bottom, y1)
+
+    return (
+        max(int(left) - padding, 0),
+        max(int(top) - padding, 0),
+        min(int(right) + padding, width),
+        min(int(bottom) + padding, height),
+    )
+
+
+def autocrop_image(
+    img: Image.Image,
+    padding: int = 36,
+    protect_boxes: Optional[list[tuple[int, int, int, int]]] = None
+) -> tuple[Image.Image, Optional[dict]]:
+    """
+    Trim uniform borders from a rendered page.
+
+    Returns:
+        Tuple of (cropped image, savings dict or None if nothing was trimmed)
+    """
+    if img.mode in ("RGBA", "LA"):
+        # Transparent areas render as black samples — composite onto white first
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+
+    gray = np.asarray(img.convert("L"))
+    box = autocrop_box(gray, padding=padding, protect_boxes=protect_boxes)
+    if box is None or box == (0, 0, img.width, img.height):
+        return img, None
+
+    cropped = img.crop(box)
+    original_pixels = img.width * img.height
+    savings = {
+        'original': [img.width, img.height],
+        'cropped': [cropped.width, cropped.height],
+        'pixel_savings': round(1 - (cropped.width * cropped.height) / original_pixels, 3),
+    }
+    return cropped, savings
+
+
+def _pixmap_to_image(pix: fitz.Pixmap) -> Image.Image:
+    mode = "RGBA" if pix.alpha else ("L" if pix.n == 1 else "RGB")
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def _to_grayscale(img: Image.Image) -> Image.Image:
+    """Single-channel copy of a page render, transparency flattened onto white."""
+    if img.mode == "RGBA":
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    return img.convert("L")
+
+
+def iter_page_images_pymupdf(
+    pdf_path: str,
+    page_numbers: list[int],
+    dpi: int = 300,
+    autocrop_padding: Optional[int] = None,
+    encoding: Optional[EncodingPolicy] = None,
+    grayscale: bool = False
+) -> Iterator[PageImage]:
+    """
+    Render PDF pages with PyMuPDF one at a time.
+
+    Each page is rendered, analyzed, cropped and encoded before the next is
+    started, and only the encoded PageImage is yielded, so memory stays flat
+    however many pages a consumer pulls. Stop iterating (or close the
+    generator) to stop rendering; the document is closed either way.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages to render, in order
+        dpi: Render resolution
+        autocrop_padding: Trim margins to content plus this many pixels
+            (None = no cropping). Text-layer blocks are never cropped away.
+        encoding: How pages are encoded (None = PNG)
+        grayscale: Encode pages single-channel (smaller, for degraded renders)
+
+    Yields:
+        PageImage with brightness, ink_coverage and crop metrics set
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or a page cannot be rendered
+    """
+    opened = time.perf_counter()
     try:
         doc = fitz.open(pdf_path)
     except Exception as e:
         raise PDFProcessingError(f"Failed to open PDF: {e}")
 
-    # Check for password-protected PDFs
-    if doc.is_encrypted:
-        doc.close()
-        raise PDFProcessingError("PDF is password-protected and cannot be processed")
+    try:
+        # Check for password-protected PDFs
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
 
-    images = []
-    all_black = True
+        encoding = encoding or EncodingPolicy()
+        mat = fitz.Matrix(dpi/72, dpi/72)
+        cache, digest = _open_cache(pdf_path)
+        # Opening the document (and its cache) is charged to the first page
+        open_ms = _elapsed_ms(opened)
 
-    try:
-        for page_num in range(min(pages_to_process, len(doc))):
-            page = doc[page_num]
-            mat = fitz.Matrix(dpi/72, dpi/72)
-            # Render with alpha channel and white background to handle transparency
-            pix = page.get_pixmap(matrix=mat, alpha=True)
-
-            # If the image appears black, try rendering without alpha
-            img_bytes = pix.tobytes("png")
-            if is_image_black_or_empty(img_bytes):
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img_bytes = pix.tobytes("png")
-
-            if not is_image_black_or_empty(img_bytes):
-                all_black = False
-
-            b64 = base64.b64encode(img_bytes).decode("utf-8")
-            images.append(b64)
-    except Exception as e:
+        for page_num in page_numbers:
+            if page_num >= len(doc):
+                continue
+
+            if cache:
+                lookup = time.perf_counter()
+                key = cache.make_key(
+                    digest, page_num, renderer="pymupdf", dpi=dpi, color="gray" if grayscale else "rgb",
+                    autocrop=autocrop_padding, encoder=encoding.cache_key
+                )
+                hit = cache.get(key)
+                if hit is not None:
+                    yield PageImage.from_cache(*hit, timings={'open': open_ms, 'cache_read': _elapsed_ms(lookup)})
+                    open_ms = 0
+                    continue
+
+            started = time.perf_counter()
+            timings = {'open': open_ms}
+            open_ms = 0
+            try:
+                page = doc[page_num]
+                # Render with alpha channel and white background to handle transparency
+                img = _pixmap_to_image(page.get_pixmap(matrix=mat, alpha=True))
+                mark = time.perf_counter()
+                timings['rasterize'] = _elapsed_ms(started)
+                brightness, ink_coverage = analyze_image(img)
+
+                # If the image appears black, try rendering without alpha
+                if brightness < BLACK_THRESHOLD:
+                    img = _pixmap_to_image(page.get_pixmap(matrix=mat, alpha=False))
+                    brightness, ink_coverage = analyze_image(img)
+                timings['black_check'] = _elapsed_ms(mark)
+
+                savings = None
+                if brightness >= BLACK_THRESHOLD and autocrop_padding is not None:
+                    mark = time.perf_counter()
+                    scale = dpi / 72
+                    protect = [
+                        (int(x0 * scale), int(y0 * scale), int(x1 * scale) + 1, int(y1 * scale) + 1)
+                        for x0, y0, x1, y1, *_ in page.get_text("blocks")
+                    ]
+                    img, savings = autocrop_image(img, padding=autocrop_padding, protect_boxes=protect)
+                    timings['autocrop'] = _elapsed_ms(mark)
+
+                mark = time.perf_counter()
+                if grayscale:
+                    img = _to_grayscale(img)
+                img_bytes, media_type = encoding.encode(img)
+                timings['encode'] = _elapsed_ms(mark)
+                width, height = img.size
+                del img
+            except Exception as e:
+                raise PDFProcessingError(f"Failed to render PDF page: {e}")
+
+            page_image = PageImage(
+                img_bytes, media_type, page_num, width, height,
+                brightness=brightness, ink_coverage=ink_coverage, crop=savings,
+                renderer="pymupdf", timings=timings
+            )
+            if cache:
+                cache.put(key, img_bytes, page_image.cache_meta(), render_ms=_elapsed_ms(started))
+            yield page_image
+    finally:
         doc.close()
-        raise PDFProcessingError(f"Failed to render PDF page: {e}")
 
-    doc.close()
-    return images, not all_black
 
+def pdf_to_page_images_pymupdf(
+    pdf_path: str,
+    page_numbers: list[int],
+    dpi: int = 300,
+    autocrop_padding: Optional[int] = None,
+    crop_report: Optional[list[dict]] = None,
+    encoding: Optional[EncodingPolicy] = None,
+    grayscale: bool = False
+) -> tuple[list[PageImage], bool]:
+    """
+    Convert PDF pages using PyMuPDF (collects iter_page_images_pymupdf).
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages to render, in order
+        dpi: Render resolution
+        autocrop_padding: Trim margins to content plus this many pixels
+            (None = no cropping). Text-layer blocks are never cropped away.
+        crop_report: If given, per-page crop savings are appended to it
+        encoding: How pages are encoded (None = PNG)
+        grayscale: Encode pages single-channel
+
+    Returns:
+        Tuple of (list of page images, success flag)
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or rendered
+    """
+    images = list(iter_page_images_pymupdf(
+        pdf_path, page_numbers, dpi=dpi,
+        autocrop_padding=autocrop_padding, encoding=encoding, grayscale=grayscale
+    ))
+
+    if crop_report is not None:
+        crop_report.extend({'page': img.page_number + 1, **img.crop} for img in images if img.crop)
+
+    return images, any(not img.is_black for img in images)
 
-def pdf_to_base64_images_pdf2image(
+
+def pdf_to_page_images_pdf2image(
     pdf_path: str,
-    pages_to_process: int,
-    dpi: int = 300
-) -> list[str]:
+    page_numbers: list[int],
+    dpi: int = 300,
+    autocrop_padding: Optional[int] = None,
+    crop_report: Optional[list[dict]] = None,
+    encoding: Optional[EncodingPolicy] = None,
+    max_threads: int = 2
+) -> list[PageImage]:
     """
     Convert PDF pages using pdf2image (poppler backend).
 
+    Pages are rendered in grayscale — fax content carries no color — and each
+    run of consecutive pages is converted and encoded before the next, so only
+    one run is decoded in memory at a time.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages to render, in order
+        dpi: Render resolution
+        autocrop_padding: Trim margins to content plus this many pixels (None = no cropping)
+        crop_report: If given, per-page crop savings are appended to it
+        encoding: How pages are encoded (None = PNG)
+        max_threads: Upper bound on concurrent poppler processes per run
+
     Returns:
-        List of base64-encoded PNG image strings
+        List of page images
     """
     if not PDF2IMAGE_AVAILABLE:
         raise RuntimeError("pdf2image not installed")
 
-    pil_images = convert_from_path(
-        pdf_path,
-        dpi=dpi,
-        first_page=1,
-        last_page=pages_to_process,
-        fmt='png'
-    )
+    encoding = encoding or EncodingPolicy()
+    cache, digest = _open_cache(pdf_path)
+    keys = {}
+    rendered = {}
+    if cache:
+        for page_num in page_numbers:
+            keys[page_num] = cache.make_key(
+                digest, page_num, renderer="pdf2image", dpi=dpi, color="gray",
+                autocrop=autocrop_padding, encoder=encoding.cache_key
+            )
+            lookup = time.perf_counter()
+            hit = cache.get(keys[page_num])
+            if hit is not None:
+                hit = PageImage.from_cache(*hit, timings={'cache_read': _elapsed_ms(lookup)})
+                rendered[page_num] = hit
+                if hit.crop and crop_report is not None:
+                    crop_report.append({'page': page_num + 1, **hit.crop})
 
-    images = []
-    for img in pil_images:
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        images.append(b64)
+    # Group consecutive uncached pages so each run is a single poppler call
+    runs = []
+    for page_num in page_numbers:
+        if page_num in rendered:
+            continue
+        if runs and runs[-1][-1] + 1 == page_num:
+            runs[-1].append(page_num)
+        else:
+            runs.append([page_num])
 
-    return images
+    for run in runs:
+        started = time.perf_counter()
+        pil_images = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            first_page=run[0] + 1,
+            last_page=run[-1] + 1,
+            grayscale=True,
+            thread_count=max(min(max_threads, len(run)), 1)
+        )
+        for page_num, img in zip(run, pil_images):
+            brightness, ink_coverage = analyze_image(img)
+            savings = None
+            if autocrop_padding is not None:
+                img, savings = autocrop_image(img, padding=autocrop_padding)
+                if savings and crop_report is not None:
+                    crop_report.append({'page': page_num + 1, **savings})
+            img_bytes, media_type = encoding.encode(img)
+            rendered[page_num] = PageImage(
+                img_bytes, media_type, page_num, img.width, img.height,
+                brightness=brightness, ink_coverage=ink_coverage, crop=savings,
+                renderer="pdf2image",
+                # Poppler renders a run at once — split its time evenly across the pages
+                timings={'fallback': _elapsed_ms(started) // len(run)}
+            )
+            if cache:
+                cache.put(
+                    keys[page_num], img_bytes, rendered[page_num].cache_meta(),
+                    render_ms=rendered[page_num].timings['fallback']
+                )
+        del pil_images
+
+    return [rendered[page_num] for page_num in page_numbers if page_num in rendered]
 
 
 class PDFProcessingError(Exception):
@@ -142,59 +677,507 @@ def get_page_count(pdf_path: str) -> int:
         raise PDFProcessingError(f"Failed to read PDF: {e}")
 
 
-def pdf_to_base64_images(
+class PageText:
+    """Text of one page (text layer or OCR) and whether it can stand in for the page image."""
+
+    __slots__ = ("page_number", "text", "usable", "reason", "truncated", "source", "confidence")
+
+    def __init__(
+        self,
+        page_number: int,
+        text: str,
+        usable: bool,
+        reason: Optional[str] = None,
+        truncated: bool = False,
+        source: str = "text_layer",
+        confidence: Optional[float] = None
+    ):
+        self.page_number = page_number  # 0-based
+        self.text = text
+        self.usable = usable
+        self.reason = reason  # why the text isn't usable
+        self.truncated = truncated
+        self.source = source  # "text_layer" or "ocr"
+        self.confidence = confidence  # mean OCR word confidence (0-100), None for a text layer
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+
+def text_layer_problem(text: str) -> Optional[str]:
+    """
+    Check whether extracted text is a faithful text layer.
+
+    Returns:
+        None if usable, otherwise a short reason ("no text", "garbled", ...)
+    """
+    if len(text) < TEXT_LAYER_MIN_CHARS:
+        return "no text" if not text else "too little text"
+
+    unclean = sum(
+        1 for c in text
+        if c == "\ufffd" or (unicodedata.category(c) in ("Cc", "Co", "Cn") and c not in "\n\t")
+    )
+    if 1 - unclean / len(text) < TEXT_LAYER_MIN_CLEAN:
+        return "garbled"
+
+    words = re.findall(r"[A-Za-z]{3,}", text)
+    if words:
+        wordlike = sum(1 for w in words if re.search(r"[aeiouyAEIOUY]", w)) / len(words)
+        if wordlike < TEXT_LAYER_MIN_WORDLIKE:
+            return "garbled"
+    return None
+
+
+def extract_page_texts(
     pdf_path: str,
-    max_pages: Optional[int] = None
-) -> tuple[list[str], int]:
+    page_numbers: Optional[list[int]] = None,
+    max_chars_per_page: int = 8000
+) -> list[PageText]:
+    """
+    Extract the text layer of pages in reading order, flagging pages whose
+    text layer is missing or garbled.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages (None = all pages)
+        max_chars_per_page: Longer page text is truncated
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or read
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    try:
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
+
+        pages = []
+        for page_num in (range(len(doc)) if page_numbers is None else page_numbers):
+            try:
+                text = doc[page_num].get_text("text", sort=True).strip()
+            except Exception as e:
+                raise PDFProcessingError(f"Failed to extract PDF text: {e}")
+            problem = text_layer_problem(text)
+            pages.append(PageText(
+                page_num,
+                text[:max_chars_per_page],
+                usable=problem is None,
+                reason=problem,
+                truncated=len(text) > max_chars_per_page
+            ))
+        return pages
+    finally:
+        doc.close()
+
+
+def extract_page_range(pdf_path: str, output_path: str, page_start: int, page_end: int) -> int:
+    """
+    Write pages page_start..page_end (1-based, inclusive) to a new PDF.
+
+    Returns:
+        Number of pages written
+
+    Raises:
+        PDFProcessingError: If the source cannot be read or the output written
+    """
+    try:
+        src = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    out = fitz.open()
+    try:
+        out.insert_pdf(src, from_page=page_start - 1, to_page=page_end - 1)
+        out.save(output_path, garbage=3, deflate=True)
+        return len(out)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to extract pages {page_start}-{page_end}: {e}")
+    finally:
+        out.close()
+        src.close()
+
+
+def select_pages_to_send(candidate_pages: list[int], max_pages: Optional[int] = None) -> list[int]:
     """
-    Convert PDF pages to base64-encoded PNG images at 300 DPI.
+    Apply the multi-page strategy to a list of candidate pages (0-based).
+
+    - ≤5 candidates: send all of them
+    - >5 candidates: send the first 3 only
+    """
+    pages = candidate_pages[:3] if len(candidate_pages) > 5 else list(candidate_pages)
+    if max_pages is not None:
+        pages = pages[:max_pages]
+    return pages
 
-    Uses PyMuPDF as primary renderer, falls back to pdf2image (poppler)
-    if the rendered images appear black/empty.
 
-    Multi-page strategy:
+def page_fingerprint(page: fitz.Page, dpi: int = 50, hash_size: int = 64) -> tuple[float, int]:
+    """
+    Cheap low-resolution analysis of a page for elision decisions.
+
+    Returns:
+        Tuple of (ink coverage 0-1, perceptual difference hash as an int).
+        Ink counts pixels darker than light scanner wash, so gray edge
+        shadows and background tint don't register as content.
+    """
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), colorspace=fitz.csGRAY, alpha=False)
+    img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+    histogram = img.histogram()
+    ink_coverage = sum(histogram[:INK_LEVEL]) / (pix.width * pix.height)
+
+    # Difference hash: compare horizontally adjacent pixels of a small grayscale copy
+    small = img.resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    phash = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            phash = (phash << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+
+    return ink_coverage, phash
+
+
+class PageFilterResult:
+    """Outcome of blank/duplicate page elision. Page numbers are 0-based."""
+
+    def __init__(self, total_pages: int, blank_threshold: float = 0.002, duplicate_max_distance: int = 10):
+        self.total_pages: int = total_pages
+        self.kept: list[int] = []
+        self.blank: list[int] = []
+        self.duplicates: dict[int, int] = {}  # dropped page -> page it duplicates
+        self.blank_threshold = blank_threshold
+        self.duplicate_max_distance = duplicate_max_distance
+        self._kept_hashes: list[tuple[int, int]] = []
+
+    def add(self, page_num: int, ink_coverage: float, phash: int) -> bool:
+        """
+        Decide on one page as it is produced. Returns True if the page is kept.
+        """
+        if ink_coverage < self.blank_threshold:
+            self.blank.append(page_num)
+            return False
+
+        for kept, kept_hash in self._kept_hashes:
+            if bin(phash ^ kept_hash).count("1") <= self.duplicate_max_distance:
+                self.duplicates[page_num] = kept
+                return False
+
+        self.kept.append(page_num)
+        self._kept_hashes.append((page_num, phash))
+        return True
+
+    def finish(self) -> "PageFilterResult":
+        """Close out the stream — keeps the first page if every page was blank."""
+        if not self.kept and self.blank:
+            # Nothing but blanks — still send the first page so the fax gets triaged
+            self.kept.append(self.blank.pop(0))
+        return self
+
+    @property
+    def dropped(self) -> list[int]:
+        return sorted(self.blank + list(self.duplicates))
+
+    def omitted_reasons(self) -> dict[int, str]:
+        """Human-readable reason per dropped page, for the classifier instruction."""
+        reasons = {page: "blank" for page in self.blank}
+        for page, original in self.duplicates.items():
+            reasons[page] = f"duplicate of page {original + 1}"
+        return dict(sorted(reasons.items()))
+
+    def to_dict(self) -> dict:
+        """1-based page numbers for processing_log."""
+        return {
+            'total_pages': self.total_pages,
+            'kept': [p + 1 for p in self.kept],
+            'blank': [p + 1 for p in self.blank],
+            'duplicates': {str(p + 1): original + 1 for p, original in self.duplicates.items()},
+        }
+
+
+def iter_page_fingerprints(
+    pdf_path: str,
+    page_numbers: Optional[list[int]] = None
+) -> Iterator[tuple[int, float, int]]:
+    """
+    Yield (page number, ink coverage, perceptual hash) one page at a time.
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or analyzed
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    try:
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
+
+        cache, digest = _open_cache(pdf_path)
+        for page_num in (range(len(doc)) if page_numbers is None else page_numbers):
+            key = None
+            if cache:
+                key = cache.make_key(digest, page_num, renderer="fingerprint", dpi=50, hash_size=64, ink_level=INK_LEVEL)
+                hit = cache.get(key)
+                if hit is not None:
+                    ink_coverage, phash = hit[1]
+                    yield page_num, ink_coverage, phash
+                    continue
+
+            started = time.perf_counter()
+            try:
+                ink_coverage, phash = page_fingerprint(doc[page_num])
+            except Exception as e:
+                raise PDFProcessingError(f"Failed to analyze PDF page: {e}")
+            if cache:
+                cache.put(key, b"", [ink_coverage, phash], render_ms=_elapsed_ms(started))
+            yield page_num, ink_coverage, phash
+    finally:
+        doc.close()
+
+
+def filter_pages(
+    pdf_path: str,
+    blank_threshold: float = 0.002,
+    duplicate_max_distance: int = 10
+) -> PageFilterResult:
+    """
+    Find blank and near-duplicate pages so they aren't rendered or sent.
+
+    A page is blank when its ink coverage is below blank_threshold. A page is
+    a near-duplicate when its perceptual hash is within duplicate_max_distance
+    bits of an earlier kept page (repeated cover sheets, retransmitted pages).
+    At least one page is always kept.
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or analyzed
+    """
+    result = PageFilterResult(get_page_count(pdf_path), blank_threshold, duplicate_max_distance)
+    for page_num, ink_coverage, phash in iter_page_fingerprints(pdf_path):
+        result.add(page_num, ink_coverage, phash)
+    return result.finish()
+
+
+def pdf_to_page_images(
+    pdf_path: str,
+    max_pages: Optional[int] = None,
+    page_numbers: Optional[list[int]] = None,
+    autocrop_padding: Optional[int] = None,
+    crop_report: Optional[list[dict]] = None,
+    encoding: Optional[EncodingPolicy] = None,
+    fallback_threads: int = 2,
+    dpi: int = 300,
+    grayscale: bool = False
+) -> tuple[list[PageImage], int]:
+    """
+    Convert PDF pages to encoded page images (300 DPI by default).
+
+    Uses PyMuPDF as primary renderer, consuming its pages as they are
+    produced: a run of pages that come out black/empty is handed to
+    pdf2image (poppler) as soon as the run ends, so the re-render overlaps
+    PyMuPDF rendering the pages after it. Every other page keeps its PyMuPDF
+    render. Each PageImage records which renderer produced it.
+
+    Multi-page strategy (when page_numbers is not given):
     - Documents ≤5 pages: send all pages
     - Documents >5 pages: send first 3 pages only
 
     Args:
         pdf_path: Path to the PDF file
         max_pages: Maximum number of pages to process (None = use default strategy)
+        page_numbers: Exact 0-based pages to render, e.g. after page elision
+            (None = apply the multi-page strategy to all pages)
+        autocrop_padding: Trim blank margins to content plus this many
+            pixels before encoding (None = no cropping)
+        crop_report: If given, per-page crop savings are appended to it
+        encoding: How pages are encoded (None = PNG)
+        fallback_threads: Upper bound on concurrent poppler processes
+        dpi: Render resolution (preflight picks lower for text-layer PDFs and scans)
+        grayscale: Encode PyMuPDF pages single-channel (poppler pages always are)
 
     Returns:
-        Tuple of (list of base64 images, total page count)
+        Tuple of (list of page images, total page count)
     """
     total_pages = get_page_count(pdf_path)
 
-    # Multi-page strategy: For documents over 5 pages, send only first 3 pages
-    if total_pages > 5:
-        pages_to_process = 3
-    else:
-        pages_to_process = total_pages
+    if page_numbers is None:
+        page_numbers = select_pages_to_send(list(range(total_pages)), max_pages)
+    elif max_pages is not None:
+        page_numbers = page_numbers[:max_pages]
 
-    if max_pages is not None:
-        pages_to_process = min(pages_to_process, max_pages)
+    images = []
+    black_run: list[int] = []
+    fallbacks = []
+    # One poppler run at a time, alongside PyMuPDF
+    with ThreadPoolExecutor(max_workers=1) as fallback_pool:
+        def submit_black_run():
+            # Re-render only the pages PyMuPDF produced black, keeping the rest
+            if black_run and PDF2IMAGE_AVAILABLE:
+                fallbacks.append(fallback_pool.submit(
+                    pdf_to_page_images_pdf2image, pdf_path, list(black_run), dpi=dpi,
+                    autocrop_padding=autocrop_padding, crop_report=crop_report,
+                    encoding=encoding, max_threads=fallback_threads
+                ))
+            black_run.clear()
 
-    # Try PyMuPDF first at 300 DPI
-    images, success = pdf_to_base64_images_pymupdf(pdf_path, pages_to_process, dpi=300)
+        for img in iter_page_images_pymupdf(
+            pdf_path, page_numbers, dpi=dpi,
+            autocrop_padding=autocrop_padding, encoding=encoding, grayscale=grayscale
+        ):
+            images.append(img)
+            if img.crop and crop_report is not None:
+                crop_report.append({'page': img.page_number + 1, **img.crop})
+            if img.is_black and (not black_run or black_run[-1] + 1 == img.page_number):
+                black_run.append(img.page_number)
+                continue
+            submit_black_run()
+            if img.is_black:
+                black_run.append(img.page_number)
+        submit_black_run()
 
-    if success:
-        return images, total_pages
+        replacements = {}
+        for future in fallbacks:
+            try:
+                replacements.update({img.page_number: img for img in future.result() if not img.is_black})
+            except Exception:
+                pass  # keep that run's PyMuPDF images (better than nothing)
 
-    # PyMuPDF rendered black images, try pdf2image fallback
-    if PDF2IMAGE_AVAILABLE:
-        try:
-            images = pdf_to_base64_images_pdf2image(pdf_path, pages_to_process, dpi=300)
-            return images, total_pages
-        except Exception:
-            # Return PyMuPDF images anyway (better than nothing)
-            pass
+    if replacements:
+        for img in images:
+            replacement = replacements.get(img.page_number)
+            if replacement is not None and img.timings:
+                # The black PyMuPDF render was paid for too
+                replacement.timings = {**img.timings, **(replacement.timings or {})}
+        images = [replacements.get(img.page_number, img) for img in images]
 
     return images, total_pages
 
 
-def assess_image_quality(images: list[str]) -> str:
+def sample_pages(page_count: int, n: int) -> list[int]:
+    """
+    Pick up to n of page_count pages (0-based indices), spread evenly.
+
+    All pages are used when they fit; otherwise the first and last page are
+    always kept and the rest are evenly spaced between them.
+    """
+    if page_count <= n:
+        return list(range(page_count))
+    if n <= 1:
+        return [0]
+
+    step = (page_count - 1) / (n - 1)
+    return sorted({round(i * step) for i in range(n)})
+
+
+def render_contact_sheets(
+    pdf_path: str,
+    page_numbers: Optional[list[int]] = None,
+    thumb_width: int = 300,
+    columns: int = 5,
+    pages_per_sheet: int = 20
+) -> list[PageImage]:
+    """
+    Tile low-resolution page thumbnails into labeled montage images.
+
+    Each thumbnail is stamped with its 1-based page number so the model can
+    refer back to specific pages (e.g. where a new document starts).
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: 0-based pages to include (None = all pages)
+        thumb_width: Width of each thumbnail in pixels
+        columns: Thumbnails per row
+        pages_per_sheet: Maximum thumbnails per montage image
+
+    Returns:
+        List of PNG montage images
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or rendered
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    if doc.is_encrypted:
+        doc.close()
+        raise PDFProcessingError("PDF is password-protected and cannot be processed")
+
+    if page_numbers is None:
+        page_numbers = list(range(len(doc)))
+
+    font = ImageFont.load_default()
+    gutter = 8
+    sheets = []
+    cache, digest = _open_cache(pdf_path)
+
+    try:
+        for start in range(0, len(page_numbers), pages_per_sheet):
+            batch = page_numbers[start:start + pages_per_sheet]
+            thumbs = []
+            all_cached = bool(cache)
+            for page_num in batch:
+                key = None
+                if cache:
+                    key = cache.make_key(digest, page_num, renderer="thumbnail", width=thumb_width, color="gray", encoder="png")
+                    hit = cache.get(key)
+                    if hit is not None:
+                        thumbs.append((page_num, Image.open(BytesIO(hit[0]))))
+                        continue
+                    all_cached = False
+
+                started = time.perf_counter()
+                page = doc[page_num]
+                scale = thumb_width / page.rect.width
+                # Grayscale keeps thumbnails small; color adds nothing at this size
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+                thumb = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                if cache:
+                    buffer = BytesIO()
+                    thumb.save(buffer, format="PNG")
+                    cache.put(key, buffer.getvalue(), render_ms=_elapsed_ms(started))
+                thumbs.append((page_num, thumb))
+
+            thumb_height = max(t.height for _, t in thumbs)
+            rows = (len(thumbs) + columns - 1) // columns
+            cols = min(columns, len(thumbs))
+            sheet = Image.new(
+                "L",
+                (cols * (thumb_width + gutter) + gutter, rows * (thumb_height + gutter) + gutter),
+                color=160
+            )
+            draw = ImageDraw.Draw(sheet)
+
+            for i, (page_num, thumb) in enumerate(thumbs):
+                x = gutter + (i % columns) * (thumb_width + gutter)
+                y = gutter + (i // columns) * (thumb_height + gutter)
+                sheet.paste(thumb, (x, y))
+                label = f"p.{page_num + 1}"
+                box = draw.textbbox((0, 0), label, font=font)
+                draw.rectangle((x, y, x + box[2] + 6, y + box[3] + 6), fill=0)
+                draw.text((x + 3, y + 3), label, fill=255, font=font)
+
+            buffer = BytesIO()
+            sheet.save(buffer, format="PNG", optimize=True)
+            sheets.append(PageImage(
+                buffer.getvalue(), "image/png", None, sheet.width, sheet.height, cached=all_cached
+            ))
+    except Exception as e:
+        doc.close()
+        raise PDFProcessingError(f"Failed to render contact sheet: {e}")
+
+    doc.close()
+    return sheets
+
+
+def assess_image_quality(images: list[PageImage]) -> str:
     """
-    Assess overall image quality from base64 images.
+    Assess overall image quality from encoded page images.
 
     Returns: "good", "fair", or "poor"
     """
@@ -205,10 +1188,10 @@ def assess_image_quality(images: list[str]) -> str:
     # Larger images typically have more detail
     avg_size = sum(len(img) for img in images) / len(images)
 
-    # Base64 encoded 300 DPI letter-size page is typically 500KB-2MB
-    if avg_size > 500_000:
+    # Encoded 300 DPI letter-size PNG page is typically 375KB-1.5MB
+    if avg_size > 375_000:
         return "good"
-    elif avg_size > 100_000:
+    elif avg_size > 75_000:
         return "fair"
     else:
         return "poor"
@@ -0,0 +1,205 @@
+"""
+FaxTriage AI — Staged Processing Pipeline
+
+Runs jobs through a fixed sequence of stages, each with its own worker
+threads and a bounded queue in front of it. While one document waits on
+the API in the classify stage, the next one is already rendering, so CPU
+and network work overlap instead of alternating.
+
+- Stage queues are priority queues (highest priority first, then arrival),
+  so an urgent document overtakes queued ones at every stage.
+- Queues are bounded: a worker finishing a job blocks until the next stage
+  has room, so a slow stage pushes back on the ones before it instead of
+  piling up rendered pages in memory. Time spent blocked is measured.
+- A job whose stage raises skips the remaining stages; the error handler
+  records the failure.
+
+Per-stage depth, busy workers, utilization, queue wait and service time
+are exposed through stats() to find the bottleneck stage under load.
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageSpec:
+    """One stage: a function applied to each job, and its worker/queue sizing."""
+
+    def __init__(self, name: str, func: Callable[[object], None], workers: int = 1, queue_size: int = 4):
+        self.name = name
+        self.func = func
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 1)
+
+
+class PipelineTicket:
+    """A submitted job; wait() blocks until it has left the last stage."""
+
+    __slots__ = ("job", "priority", "done", "error", "stage_ms", "_queued_at")
+
+    def __init__(self, job, priority: int):
+        self.job = job
+        self.priority = priority
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.stage_ms: dict[str, int] = {}
+        self._queued_at = 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class _Stage:
+    def __init__(self, spec: StageSpec):
+        self.spec = spec
+        self.queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=spec.queue_size)
+        self.next: Optional["_Stage"] = None
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def stats(self, elapsed: float) -> dict:
+        with self.lock:
+            handled = self.processed + self.failed
+            return {
+                'name': self.spec.name,
+                'workers': self.spec.workers,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.spec.queue_size,
+                'busy': self.busy,
+                'processed': self.processed,
+                'failed': self.failed,
+                # Share of worker time spent working since the pipeline started
+                'utilization': round(self.busy_seconds / (self.spec.workers * elapsed), 4) if elapsed else None,
+                'avg_queue_wait_ms': round(self.wait_seconds * 1000 / handled, 1) if handled else None,
+                'avg_service_ms': round(self.busy_seconds * 1000 / handled, 1) if handled else None,
+                # Time finished jobs spent waiting for room in the next stage's queue
+                'blocked_ms': int(self.blocked_seconds * 1000),
+            }
+
+
+class Pipeline:
+    """A chain of stages with bounded priority queues between them."""
+
+    def __init__(self, stages: list[StageSpec], on_error: Optional[Callable[[object, BaseException], None]] = None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.on_error = on_error
+        self._stages = [_Stage(spec) for spec in stages]
+        for stage, following in zip(self._stages, self._stages[1:]):
+            stage.next = following
+        self._sequence = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._started_at: Optional[float] = None
+
+    def _put(self, stage: _Stage, ticket: PipelineTicket):
+        ticket._queued_at = time.monotonic()
+        stage.queue.put((-ticket.priority, next(self._sequence), ticket))
+
+    def submit(self, job, priority: int = 0) -> PipelineTicket:
+        """Queue a job at the first stage, blocking while that stage's queue is full."""
+        ticket = PipelineTicket(job, priority)
+        self._put(self._stages[0], ticket)
+        return ticket
+
+    def _worker(self, stage: _Stage):
+        while True:
+            _, _, ticket = stage.queue.get()
+            if ticket is None:
+                return
+            started = time.monotonic()
+            with stage.lock:
+                stage.busy += 1
+                stage.wait_seconds += started - ticket._queued_at
+            error = None
+            try:
+                stage.spec.func(ticket.job)
+            except BaseException as e:  # one job's failure must not take the stage down
+                error = e
+            elapsed = time.monotonic() - started
+            ticket.stage_ms[stage.spec.name] = int(elapsed * 1000)
+            with stage.lock:
+                stage.busy -= 1
+                stage.busy_seconds += elapsed
+                if error is None:
+                    stage.processed += 1
+                else:
+                    stage.failed += 1
+
+            if error is None and stage.next is not None:
+                handed_off = time.monotonic()
+                self._put(stage.next, ticket)
+                with stage.lock:
+                    stage.blocked_seconds += time.monotonic() - handed_off
+                continue
+
+            if error is not None:
+                ticket.error = error
+                if self.on_error is not None:
+                    try:
+                        self.on_error(ticket.job, error)
+                    except Exception:
+                        logger.exception("Pipeline error handler failed in stage %s", stage.spec.name)
+            ticket.done.set()
+
+    def start(self):
+        if self._threads:
+            return
+        self._started_at = time.monotonic()
+        for stage in self._stages:
+            for i in range(stage.spec.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(stage,), name=f"pipeline-{stage.spec.name}-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop each stage's workers once the jobs queued ahead of the stop have passed through."""
+        for stage in self._stages:
+            for _ in range(stage.spec.workers):
+                # Sorts after every real job (priority floor, newest sequence)
+                stage.queue.put((float("inf"), next(self._sequence), None))
+            for thread in [t for t in self._threads if t.name.startswith(f"pipeline-{stage.spec.name}-")]:
+                thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> list[dict]:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return [stage.stats(elapsed) for stage in self._stages]
+
+
+_pipeline: Optional[Pipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def start_pipeline(stages: list[StageSpec], on_error=None) -> Pipeline:
+    """Create and start the process-wide pipeline (idempotent)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = Pipeline(stages, on_error=on_error)
+            _pipeline.start()
+        return _pipeline
+
+
+def get_pipeline() -> Optional[Pipeline]:
+    """The running pipeline, or None when documents are processed in one call."""
+    return _pipeline
+
+
+def stop_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
@@ -0,0 +1,208 @@
+"""
+FaxTriage AI — PDF Preflight
+
+Fast structural inspection of a PDF before anything is rendered. Each file
+is put in a category and given the cheapest processing route that still
+works for it:
+
+| Category   | Meaning                                     | Route                                    |
+|------------|---------------------------------------------|------------------------------------------|
+| text       | Vector/text-layer pages (e-fax, EHR export) | text extraction, else render at text DPI |
+| scan       | Image-only pages (scanned/faxed)            | render at the scan's native DPI          |
+| mixed      | Both kinds of pages                         | render at full DPI                       |
+| repairable | Damaged xref/structure PyMuPDF recovered    | repair, then render                      |
+| encrypted  | Password-protected                          | reject                                   |
+| corrupt    | Unreadable or no pages                      | reject                                   |
+| oversized  | Too many pages or pages too large           | reject                                   |
+
+Preflight reads only the page tree, text layer and image placement of a
+sample of pages, so it takes milliseconds where a full render takes seconds.
+"""
+import os
+import time
+from statistics import median
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+from . import pdf_processor
+from .pdf_processor import PDFProcessingError, TEXT_LAYER_MIN_CHARS
+
+# A page whose images cover at least this share of its area is a scan
+MIN_IMAGE_COVERAGE = 0.5
+
+
+class PreflightResult:
+    """Outcome of preflight_pdf: category, route and the measurements behind them."""
+
+    def __init__(
+        self,
+        category: str,
+        route: str,
+        render_dpi: Optional[int] = None,
+        reason: Optional[str] = None,
+        **details
+    ):
+        self.category = category
+        self.route = route  # "render", "repair" or "reject"
+        self.render_dpi = render_dpi
+        self.reason = reason
+        self.details = details
+
+    def to_dict(self) -> dict:
+        return {
+            'category': self.category,
+            'route': self.route,
+            'render_dpi': self.render_dpi,
+            'reason': self.reason,
+            **self.details,
+        }
+
+
+def _reject(category: str, reason: str, started: float, **details) -> PreflightResult:
+    return PreflightResult(category, "reject", reason=reason, elapsed_ms=_elapsed_ms(started), **details)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _page_profile(page: fitz.Page) -> tuple[int, float, list[float]]:
+    """Text characters, image coverage (0-1) and placed-image resolutions (DPI) of a page."""
+    text_chars = len(page.get_text("text").strip())
+
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    resolutions = []
+    for image in page.get_image_info():
+        bbox = fitz.Rect(image["bbox"]) & page.rect
+        if bbox.is_empty:
+            continue
+        covered += abs(bbox)
+        if bbox.width > 0 and image.get("width"):
+            resolutions.append(image["width"] / (bbox.width / 72))
+    return text_chars, min(covered / page_area, 1.0), resolutions
+
+
+def preflight_pdf(
+    pdf_path: str,
+    max_pages: int = 500,
+    max_file_mb: int = 50,
+    max_page_inches: float = 50.0,
+    sample_pages: int = 12,
+    text_dpi: int = 200,
+    scan_dpi_range: tuple[int, int] = (150, 300),
+    full_dpi: int = 300
+) -> PreflightResult:
+    """
+    Categorize a PDF and pick its processing route without rendering it.
+
+    Args:
+        pdf_path: Path to the PDF file
+        max_pages: More pages than this is oversized
+        max_file_mb: A larger file is oversized
+        max_page_inches: A page side longer than this is oversized
+        sample_pages: Pages inspected (spread evenly, first and last included)
+        text_dpi: Render DPI for text-layer documents
+        scan_dpi_range: Native scan resolution is clamped to this range
+        full_dpi: Render DPI when the content type is mixed or unknown
+
+    Returns:
+        PreflightResult (never raises for a bad file — that's a category)
+    """
+    started = time.perf_counter()
+
+    try:
+        file_bytes = os.path.getsize(pdf_path)
+    except OSError as e:
+        return _reject("corrupt", f"PDF file unreadable: {e}", started)
+    if file_bytes > max_file_mb * 1024 * 1024:
+        return _reject("oversized", f"PDF exceeds {max_file_mb}MB", started, file_bytes=file_bytes)
+
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        return _reject("corrupt", f"PDF could not be opened: {e}", started, file_bytes=file_bytes)
+
+    try:
+        if doc.is_encrypted:
+            return _reject("encrypted", "PDF is password-protected and cannot be processed", started,
+                           file_bytes=file_bytes)
+
+        page_count = len(doc)
+        details = {'file_bytes': file_bytes, 'page_count': page_count}
+        if page_count == 0:
+            return _reject("corrupt", "PDF has no pages", started, **details)
+        if page_count > max_pages:
+            return _reject("oversized", f"PDF has {page_count} pages (limit {max_pages})", started, **details)
+
+        repaired = doc.is_repaired
+        text_pages = image_pages = 0
+        resolutions = []
+        # (the sample_pages argument shadows the helper here)
+        sampled = pdf_processor.sample_pages(page_count, sample_pages)
+        for page_num in sampled:
+            try:
+                page = doc[page_num]
+                if max(page.rect.width, page.rect.height) / 72 > max_page_inches:
+                    return _reject(
+                        "oversized",
+                        f"Page {page_num + 1} is larger than {max_page_inches:.0f} inches",
+                        started, **details
+                    )
+                text_chars, image_coverage, page_resolutions = _page_profile(page)
+            except Exception as e:
+                if repaired:
+                    # Recovered structure but unreadable pages — let the repair pass try
+                    break
+                return _reject("corrupt", f"Page {page_num + 1} unreadable: {e}", started, **details)
+
+            if text_chars >= TEXT_LAYER_MIN_CHARS:
+                text_pages += 1
+            elif image_coverage >= MIN_IMAGE_COVERAGE:
+                image_pages += 1
+                resolutions.extend(page_resolutions)
+    finally:
+        doc.close()
+
+    details.update(
+        sampled_pages=len(sampled),
+        text_pages=text_pages,
+        image_pages=image_pages,
+        repaired=repaired,
+    )
+
+    if text_pages == len(sampled):
+        content, dpi = "text", text_dpi
+    elif image_pages == len(sampled):
+        # Rendering a 200 DPI fax scan at 300 DPI only interpolates pixels
+        low, high = scan_dpi_range
+        native = round(median(resolutions)) if resolutions else high
+        details['scan_dpi'] = native
+        content, dpi = "scan", max(low, min(high, native))
+    else:
+        content, dpi = "mixed", full_dpi
+
+    details['content'] = content
+    details['elapsed_ms'] = _elapsed_ms(started)
+    if repaired:
+        return PreflightResult("repairable", "repair", render_dpi=dpi, **details)
+    return PreflightResult(content, "render", render_dpi=dpi, **details)
+
+
+def repair_pdf(pdf_path: str, output_path: str) -> int:
+    """
+    Rewrite a damaged PDF from PyMuPDF's recovered object tree.
+
+    Returns:
+        Page count of the repaired file
+
+    Raises:
+        PDFProcessingError: If the file can't be rewritten
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            doc.save(output_path, garbage=3, clean=True, deflate=True)
+            return len(doc)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to repair PDF: {e}")
@@ -0,0 +1,277 @@
+"""
+FaxTriage AI — Sampling Profiler
+
+Opt-in statistical profiling of sampled HTTP requests and documents, to see
+where CPU goes on a slow node without attaching a debugger.
+
+- A profiled request samples the stacks of every thread in the process for
+  as long as it runs (a request's work can be spread over worker threads),
+  each stack rooted at its thread's name.
+- A profiled document samples the thread running each processing stage
+  separately. Render tasks run in worker processes, so the worker samples
+  its own stack while it runs the task and sends the samples back with the
+  result; they are merged under a render_worker frame.
+- Stacks are sampled every interval by a background thread reading
+  sys._current_frames(), at function granularity.
+
+Profiles are written as collapsed stacks ("frame;frame;frame count", the
+input of flamegraph.pl and speedscope) with a JSON sidecar of metadata, to
+a directory that keeps the newest max_profiles. With profiling disabled,
+or for requests and documents not sampled, nothing runs.
+"""
+import contextvars
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from ..config import settings
+
+_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+
+_labels: dict = {}
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def collapse(frame, root: Optional[str] = None) -> str:
+    """A frame's stack as 'outermost;...;innermost', optionally under a root frame."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Counts the collapsed stacks of one thread (or every other thread) at an interval."""
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id  # None = all threads, each rooted at its name
+        self.stacks: dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frame = frames.get(self.thread_id)
+            stacks = [collapse(frame)] if frame is not None else []
+        else:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                collapse(frame, root=names.get(ident, f"thread-{ident}"))
+                for ident, frame in frames.items() if ident != own
+            ]
+        for stack in stacks:
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict[str, int]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+class ProfileSession:
+    """One profiled request or document stage, and the stacks sampled for it."""
+
+    def __init__(self, kind: str, name: str, interval: float, attributes: dict):
+        self.kind = kind
+        self.name = name
+        self.interval = interval
+        self.attributes = attributes
+        self.started = time.time()
+        self.stacks: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stacks: dict[str, int], root: Optional[str] = None):
+        """Merge stacks sampled elsewhere (a render worker process)."""
+        with self._lock:
+            for stack, count in stacks.items():
+                key = f"{root};{stack}" if root else stack
+                self.stacks[key] = self.stacks.get(key, 0) + count
+
+
+class ProfileStore:
+    """Collapsed-stack files with JSON metadata sidecars, rotated to the newest max_profiles."""
+
+    ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+    def __init__(self, directory: Path, max_profiles: int = 200):
+        self.directory = Path(directory)
+        self.max_profiles = max(max_profiles, 1)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def save(self, session: ProfileSession, duration_ms: float, samples: int) -> dict:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        safe_name = re.sub(r"[^\w.-]+", "_", session.name).strip("_")[:60] or "unnamed"
+        stamp = datetime.fromtimestamp(session.started).strftime("%Y%m%d_%H%M%S")
+        profile_id = f"{stamp}_{os.getpid()}_{sequence}_{session.kind}_{safe_name}"
+        meta = {
+            'id': profile_id,
+            'kind': session.kind,
+            'name': session.name,
+            'created': datetime.fromtimestamp(session.started).isoformat(),
+            'duration_ms': round(duration_ms, 1),
+            'samples': samples,
+            'stacks': len(session.stacks),
+            'interval_ms': session.interval * 1000,
+            'attributes': session.attributes,
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        folded = "".join(f"{stack} {count}\n" for stack, count in sorted(session.stacks.items()))
+        (self.directory / f"{profile_id}.folded").write_text(folded)
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(meta))
+        self._rotate()
+        return meta
+
+    def _rotate(self):
+        sidecars = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for sidecar in sidecars[:max(len(sidecars) - self.max_profiles, 0)]:
+            for path in (sidecar, sidecar.with_suffix(".folded")):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass  # another process rotated it first
+
+    def list(self, limit: int = 50, kind: Optional[str] = None) -> list[dict]:
+        """Metadata of the newest profiles first."""
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for sidecar in sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+            try:
+                meta = json.loads(sidecar.read_text())
+            except (OSError, ValueError):
+                continue
+            if kind and meta.get('kind') != kind:
+                continue
+            profiles.append(meta)
+            if len(profiles) >= limit:
+                break
+        return profiles
+
+    def read(self, profile_id: str) -> Optional[str]:
+        """The collapsed stacks of a profile, or None if it doesn't exist (or was rotated out)."""
+        if not self.ID_PATTERN.match(profile_id):
+            return None
+        try:
+            return (self.directory / f"{profile_id}.folded").read_text()
+        except FileNotFoundError:
+            return None
+
+
+class Profiler:
+    """Picks what to profile and runs profile sessions into the store."""
+
+    def __init__(self, store: ProfileStore, interval_ms: float = 5.0, request_rate: float = 0.01,
+                 document_rate: float = 0.01):
+        self.store = store
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.request_rate = request_rate
+        self.document_rate = document_rate
+
+    def sample_request(self, forced: bool = False) -> bool:
+        return forced or random.random() < self.request_rate
+
+    def sample_document(self) -> bool:
+        return random.random() < self.document_rate
+
+    @contextmanager
+    def session(self, kind: str, name: str, all_threads: bool = False, **attributes) -> Iterator[ProfileSession]:
+        """Sample stacks while the block runs (this thread, or all threads), then save the profile."""
+        session = ProfileSession(kind, name, self.interval, attributes)
+        sampler = StackSampler(self.interval, None if all_threads else threading.get_ident()).start()
+        token = _session.set(session)
+        started = time.perf_counter()
+        try:
+            yield session
+        finally:
+            _session.reset(token)
+            session.add(sampler.stop())
+            # A block shorter than the interval has nothing to show
+            if session.stacks:
+                self.store.save(session, (time.perf_counter() - started) * 1000, sampler.samples)
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Optional[Profiler]:
+    """The process-wide profiler, or None when profiling is disabled."""
+    global _profiler
+    if not settings.profiling_enabled:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler(
+                ProfileStore(settings.profiling_dir, settings.profiling_max_profiles),
+                interval_ms=settings.profiling_interval_ms,
+                request_rate=settings.profiling_request_rate,
+                document_rate=settings.profiling_document_rate
+            )
+        return _profiler
+
+
+def current_session() -> Optional[ProfileSession]:
+    """The profile being recorded for the current request or stage, if any."""
+    return _session.get()
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func to record into the profile current now, in whichever thread calls it."""
+    session = _session.get()
+    if session is None:
+        return func
+
+    def run(*args, **kwargs):
+        token = _session.set(session)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _session.reset(token)
+    return run
+
+
+@contextmanager
+def profile(kind: str, name: str, enabled: bool = True, **attributes) -> Iterator[Optional[ProfileSession]]:
+    """Profile the calling thread for the block when enabled and profiling is on."""
+    profiler = get_profiler() if enabled else None
+    if profiler is None:
+        yield None
+        return
+    with profiler.session(kind, name, **attributes) as session:
+        yield session
@@ -0,0 +1,251 @@
+"""
+FaxTriage AI — Render Cache
+
+Content-addressed on-disk cache of rendered page images, so
+re-classification, retries, bundle segments and eval runs don't re-render
+pages that were already rendered with the same settings.
+
+Entries are keyed by (PDF content hash, page index, render parameters —
+DPI/size, color mode, crop, encoder). An entry is a plain blob — the
+encoded image bytes, stored one file per entry and written atomically
+(temp file + rename), so render workers in separate processes can share
+the cache safely — plus JSON metadata (page measurements, OCR text, ...)
+in the index row, from which callers rebuild their objects. Nothing read
+from the cache is unpickled or otherwise executed: a writable cache
+directory can at worst serve a wrong image, not run code in the workers.
+
+A small SQLite index next to the entries tracks size and last access for
+LRU eviction under a byte budget, plus hit/miss counters shared by all
+processes.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Generator, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering output changes, so stale entries are never served
+RENDER_VERSION = 2
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    render_ms INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+METRIC_NAMES = ("hits", "misses", "writes", "evictions", "bytes_saved", "render_ms_saved")
+
+
+@lru_cache(maxsize=256)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def file_digest(pdf_path: str) -> str:
+    """SHA-256 of a file's contents (memoized on path, size and mtime)."""
+    stat = os.stat(pdf_path)
+    return _digest(str(pdf_path), stat.st_size, stat.st_mtime_ns)
+
+
+class RenderCache:
+    """
+    On-disk LRU cache of render results.
+
+    Safe to use from several threads and processes at once. Cache failures
+    are logged and treated as misses — the cache never fails a render.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.directory / "index.db"
+        self._local = threading.local()
+        with self._index() as conn:
+            conn.executescript(INDEX_SCHEMA)
+            # Indexes from before metadata moved out of the (pickled) entry files
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if "meta" not in columns:
+                conn.execute("ALTER TABLE entries ADD COLUMN meta TEXT")
+            conn.executemany(
+                "INSERT OR IGNORE INTO metrics (name, value) VALUES (?, 0)",
+                [(name,) for name in METRIC_NAMES]
+            )
+
+    @staticmethod
+    def make_key(pdf_digest: str, page: Any, **params) -> str:
+        """Cache key for one page (or page set) of a PDF rendered with the given parameters."""
+        payload = json.dumps([RENDER_VERSION, pdf_digest, page, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[tuple[bytes, Any]]:
+        """Return the cached (blob, metadata), or None on a miss."""
+        try:
+            with self._index() as conn:
+                row = conn.execute("SELECT render_ms, meta FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Render cache index read failed: %s", e)
+            row = None
+        if row is None:
+            self._count(misses=1)
+            return None
+
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                data = f.read()
+            meta = json.loads(row[1]) if row[1] is not None else None
+        except FileNotFoundError:
+            self._discard(key)
+            self._count(misses=1)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Dropping unreadable render cache entry %s: %s", key[:12], e)
+            self._discard(key)
+            self._count(misses=1)
+            return None
+
+        try:
+            with self._index() as conn:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._increment(conn, hits=1, bytes_saved=len(data), render_ms_saved=row[0])
+        except sqlite3.Error as e:
+            logger.warning("Render cache index update failed: %s", e)
+        return data, meta
+
+    def put(self, key: str, data: bytes, meta: Any = None, render_ms: int = 0) -> None:
+        """
+        Store a blob and its JSON-serializable metadata atomically, then evict
+        least recently used entries over budget.
+        """
+        path = self._entry_path(key)
+        try:
+            meta_json = json.dumps(meta) if meta is not None else None
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+
+            with self._index() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, size, render_ms, last_access, meta) VALUES (?, ?, ?, ?, ?)",
+                    (key, len(data) + len(meta_json or ""), int(render_ms), time.time(), meta_json)
+                )
+                self._increment(conn, writes=1)
+            self._evict()
+        except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Render cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        """Entry count, bytes used and hit/miss counters across all processes."""
+        with self._index() as conn:
+            entries, used = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            metrics = dict(conn.execute("SELECT name, value FROM metrics").fetchall())
+        lookups = metrics.get("hits", 0) + metrics.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes_used": used,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(metrics.get("hits", 0) / lookups, 4) if lookups else None,
+            **{name: metrics.get(name, 0) for name in METRIC_NAMES},
+        }
+
+    def _evict(self) -> None:
+        with self._index() as conn:
+            used = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if used <= self.max_bytes:
+                return
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                if used <= self.max_bytes:
+                    break
+                victims.append(key)
+                used -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+            self._increment(conn, evictions=len(victims))
+        for key in victims:
+            self._entry_path(key).unlink(missing_ok=True)
+
+    def _discard(self, key: str) -> None:
+        try:
+            with self._index() as conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._entry_path(key).unlink(missing_ok=True)
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _count(self, **deltas) -> None:
+        try:
+            with self._index() as conn:
+                self._increment(conn, **deltas)
+        except sqlite3.Error as e:
+            logger.warning("Render cache metrics update failed: %s", e)
+
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, **deltas) -> None:
+        conn.executemany(
+            "UPDATE metrics SET value = value + ? WHERE name = ?",
+            [(delta, name) for name, delta in deltas.items() if delta]
+        )
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    @contextmanager
+    def _index(self) -> Generator[sqlite3.Connection, None, None]:
+        """Per-thread index connection; commits on success, rolls back on error."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        with conn:
+            yield conn
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """Process-wide render cache from settings, or None when caching is disabled."""
+    global _cache
+    if not settings.render_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = RenderCache(settings.render_cache_dir, settings.render_cache_max_mb * 1024 * 1024)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Render cache unavailable: %s", e)
+                return None
+        return _cache
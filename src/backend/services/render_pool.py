@@ -0,0 +1,331 @@
+"""
+FaxTriage AI — Render Worker Pool
+
+Runs PDF parsing and rendering in separate worker processes so a malformed
+or adversarial PDF can't hang or balloon memory inside the API process.
+
+Each task gets:
+- A wall-clock timeout — the worker is killed if it overruns
+- An RSS cap — checked while the task runs (Linux /proc); the worker is
+  killed if it goes over
+- An address space limit (RLIMIT_AS) set in the worker itself, so an
+  allocation burst faster than the RSS polling fails with MemoryError in
+  the worker instead of exhausting the machine's memory
+- Worker recycling — a worker is replaced after a fixed number of tasks,
+  so fragmentation and leaks in the PDF libraries don't accumulate
+
+A killed or crashed worker surfaces as PDFProcessingError, which the
+pipeline already turns into a fallback classification.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from ..config import settings
+from . import profiling, tracing
+from .pdf_processor import PDFProcessingError
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks a running task's deadline and memory (seconds)
+POLL_INTERVAL = 0.05
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _limit_address_space(max_mb: int) -> None:
+    """Cap this process's virtual memory (where the platform supports RLIMIT_AS)."""
+    try:
+        import resource
+        limit = max_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, AttributeError, ValueError, OSError) as e:
+        logger.warning("Render worker address space limit not set: %s", e)
+
+
+def _worker_main(conn, max_address_space_mb: int = 0) -> None:
+    """
+    Worker loop: receive (func, args, kwargs, profile_interval), send back
+    ("ok", result) or ("error", exc), followed by the task's start and end
+    time in the worker and, when profile_interval is set, the collapsed
+    stacks sampled while it ran.
+    """
+    # Ctrl-C on the server goes to the whole process group — let the parent shut us down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if max_address_space_mb:
+        _limit_address_space(max_address_space_mb)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        func, args, kwargs, profile_interval = task
+        sampler = profiling.StackSampler(profile_interval, threading.get_ident()).start() if profile_interval else None
+        started = time.time_ns()
+        try:
+            reply = ("ok", func(*args, **kwargs))
+        except Exception as e:
+            reply = ("error", e)
+        reply += (started, time.time_ns(), sampler.stop() if sampler else None)
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Result or exception couldn't be pickled
+            conn.send((
+                "error", PDFProcessingError(f"Render worker could not return result: {e}"), started, time.time_ns(),
+                None
+            ))
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, ctx, max_address_space_mb: int = 0):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, max_address_space_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except Exception:
+                self.process.kill()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    """
+    Fixed-size pool of render worker processes.
+
+    Thread-safe: callers block until a worker is free. Workers are started
+    lazily on first use.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 60.0,
+        max_rss_mb: Optional[int] = 1024,
+        max_tasks_per_worker: int = 50,
+        max_address_space_mb: int = 0
+    ):
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_address_space_mb = max_address_space_mb
+        self.max_tasks_per_worker = max(max_tasks_per_worker, 1)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max(workers, 1))
+        self._idle: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a module-level function in a worker and return its result.
+
+        Exceptions raised by func are re-raised here.
+
+        Raises:
+            PDFProcessingError: If the task times out, exceeds the memory cap,
+                or the worker dies
+        """
+        timeout = self.timeout if timeout is None else timeout
+        name = getattr(func, "__name__", repr(func))
+        # A profiled request or stage has the worker sample its own stack
+        profile = profiling.current_session()
+
+        with self._slots:
+            worker = self._acquire()
+            pid = worker.process.pid
+            healthy = False
+            try:
+                status, value, started_ns, ended_ns, stacks = self._call(
+                    worker, func, args, kwargs, timeout, profile.interval if profile else None
+                )
+                # A worker that hit its address space limit is replaced, not reused
+                healthy = not (status == "error" and isinstance(value, MemoryError))
+            finally:
+                self._release(worker, healthy)
+        if not healthy:
+            logger.warning("Render worker %s: %s hit the address space limit", pid, name)
+            value = PDFProcessingError(
+                f"Rendering exceeded address space limit of {self.max_address_space_mb} MB"
+            )
+
+        # The worker process's side of the task, inside the caller's render_task span
+        tracing.add_span(
+            "render_worker", started_ns, ended_ns, error=value if status == "error" else None,
+            **{'render.func': name, 'worker.pid': pid}
+        )
+        if profile is not None and stacks:
+            profile.add(stacks, root=f"render_worker:{name}")
+        if status == "error":
+            raise value
+        return value
+
+    def close(self) -> None:
+        """Stop idle workers. Workers busy with a task are stopped when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._closed:
+                raise PDFProcessingError("Render pool is shut down")
+            if self._idle:
+                return self._idle.pop()
+        return _Worker(self._ctx, self.max_address_space_mb)
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy:
+            worker.stop(kill=True)
+            return
+
+        worker.tasks += 1
+        with self._lock:
+            if not self._closed and worker.tasks < self.max_tasks_per_worker:
+                self._idle.append(worker)
+                return
+        # Recycle: the next task gets a fresh process
+        worker.stop()
+
+    def _call(self, worker: _Worker, func: Callable, args: tuple, kwargs: dict, timeout: float,
+              profile_interval: Optional[float] = None):
+        name = getattr(func, "__name__", repr(func))
+        try:
+            worker.conn.send((func, args, kwargs, profile_interval))
+        except (OSError, EOFError) as e:
+            raise PDFProcessingError(f"Render worker unavailable: {e}")
+
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll(POLL_INTERVAL):
+            if not worker.process.is_alive():
+                raise PDFProcessingError(
+                    f"Render worker exited unexpectedly (exit code {worker.process.exitcode})"
+                )
+            if time.monotonic() > deadline:
+                logger.warning("Killing render worker %s: %s timed out after %.0fs",
+                               worker.process.pid, name, timeout)
+                raise PDFProcessingError(f"Rendering timed out after {timeout:.0f}s")
+            if self.max_rss_mb:
+                rss = _rss_mb(worker.process.pid)
+                if rss is not None and rss > self.max_rss_mb:
+                    logger.warning("Killing render worker %s: %s using %.0f MB",
+                                   worker.process.pid, name, rss)
+                    raise PDFProcessingError(
+                        f"Rendering exceeded memory limit of {self.max_rss_mb} MB"
+                    )
+
+        try:
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            raise PDFProcessingError(
+                f"Render worker exited unexpectedly (exit code {worker.process.exitcode})"
+            )
+
+
+_pool: Optional[RenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """Process-wide render pool, created from settings on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(
+                workers=settings.render_workers,
+                timeout=settings.render_timeout_seconds,
+                max_rss_mb=settings.render_max_rss_mb,
+                max_tasks_per_worker=settings.render_worker_max_tasks,
+                # Virtual size runs well above RSS (library mappings, thread stacks)
+                max_address_space_mb=settings.render_max_address_space_mb or 2 * (settings.render_max_rss_mb or 0)
+            )
+        return _pool
+
+
+def run_render(func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run a rendering function in the worker pool.
+
+    timeout overrides the pool's per-task limit. Runs in-process (without a
+    timeout) when render_pool_enabled is off.
+    """
+    with tracing.span("render_task", **{'render.func': getattr(func, "__name__", repr(func))}):
+        if not settings.render_pool_enabled:
+            return func(*args, **kwargs)
+        return get_render_pool().run(func, *args, timeout=timeout, **kwargs)
+
+
+def split_pages(page_numbers: list[int], parts: int) -> list[list[int]]:
+    """Split pages into at most `parts` contiguous, near-equal chunks (order kept)."""
+    parts = max(min(parts, len(page_numbers)), 1)
+    size, extra = divmod(len(page_numbers), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(list(page_numbers[start:end]))
+        start = end
+    # An empty page list still yields one (empty) chunk so callers get a result back
+    return [chunk for chunk in chunks if chunk] or [list(page_numbers)]
+
+
+def run_render_parallel(func: Callable, pdf_path: str, page_chunks: list[list[int]], **kwargs) -> list:
+    """
+    Run func(pdf_path, page_numbers=chunk, **kwargs) for each chunk concurrently.
+
+    Each worker opens the document on its own. Results come back in chunk
+    order regardless of which finishes first. If any chunk fails, its
+    exception is raised.
+    """
+    if len(page_chunks) <= 1:
+        return [run_render(func, pdf_path, page_numbers=chunk, **kwargs) for chunk in page_chunks]
+
+    # Dispatch threads record their render spans under the caller's span,
+    # and worker samples into the caller's profile
+    traced_render = profiling.bind(tracing.bind(run_render))
+    with ThreadPoolExecutor(max_workers=len(page_chunks)) as dispatch:
+        futures = [
+            dispatch.submit(traced_render, func, pdf_path, page_numbers=chunk, **kwargs)
+            for chunk in page_chunks
+        ]
+        return [future.result() for future in futures]
+
+
+def shutdown_render_pool() -> None:
+    """Stop all render workers (server shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,277 @@
+"""
+FaxTriage AI — Sender Fingerprint Index
+
+Most fax volume comes from a handful of labs, pharmacies, insurers and junk
+senders, each with a fixed cover-sheet template. Each document gets a
+sender signature:
+
+- Fax numbers from the transmission header band (excluding our own number
+  and the TO: number)
+- A header key — the normalized words of the header band
+- A layout hash — a coarse difference hash of the first page
+
+A signature is matched to a known sender by fax number, then header key,
+then layout hash within a Hamming distance. Known senders map to the types
+their faxes were classified as (reviewer corrections included) and their
+sending_facility / fax_origin_number:
+
+- A sender whose faxes are overwhelmingly one auto-classify type (junk) is
+  classified without an API call
+- Other known senders get a hint narrowing the request, and their stable
+  fields prefilled where the API returned none
+"""
+import re
+from typing import Optional
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageFilter
+
+from .. import database as db
+from ..config import settings
+from .classifier import ClassificationResult
+from .local_classifier import BASE_PRIORITY
+from .pdf_processor import HEADER_BAND, PDFProcessingError
+
+PHONE_PATTERN = re.compile(r"(?<!\d)\(?(\d{3})\)?[\s.\-]*(\d{3})[\s.\-]*(\d{4})(?!\d)")
+TO_NUMBER_PATTERN = re.compile(r"\bTO:\s*\(?\d{3}\)?[\s.\-]*\d{3}[\s.\-]*\d{4}", re.IGNORECASE)
+
+# Header words that vary per transmission rather than per sender
+HEADER_STOPWORDS = {
+    "fax", "from", "page", "pages", "date", "time", "phone", "tel", "transmission",
+    "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec",
+    "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+}
+HEADER_KEY_WORDS = 12
+
+# Layout hash: difference hash of a LAYOUT_HASH_SIZE² grid (256 bits)
+LAYOUT_HASH_SIZE = 16
+LAYOUT_DPI = 36
+
+# Fields copied from a known sender when the classification left them empty
+PREFILL_FIELDS = ("sending_facility", "fax_origin_number")
+
+
+def normalize_number(text: str) -> Optional[str]:
+    """Ten-digit fax/phone number, or None."""
+    digits = re.sub(r"\D", "", text or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else None
+
+
+def header_numbers(text: str, exclude: tuple[str, ...] = ()) -> list[str]:
+    """Fax/phone numbers in header text, minus the TO: number and excluded ones."""
+    excluded = {normalize_number(n) for n in exclude}
+    numbers = []
+    for match in PHONE_PATTERN.finditer(TO_NUMBER_PATTERN.sub(" ", text)):
+        number = "".join(match.groups())
+        if number not in excluded and number not in numbers:
+            numbers.append(number)
+    return numbers
+
+
+def header_key(text: str) -> Optional[str]:
+    """Normalized sender words of the header band (numbers, dates and boilerplate removed)."""
+    words = []
+    for word in re.findall(r"[a-z]{3,}", TO_NUMBER_PATTERN.sub(" ", text).lower()):
+        if word not in HEADER_STOPWORDS and word not in words:
+            words.append(word)
+    return " ".join(words[:HEADER_KEY_WORDS]) or None
+
+
+def layout_hash(page: fitz.Page) -> str:
+    """Coarse difference hash of a page's layout, as hex."""
+    zoom = LAYOUT_DPI / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    # Blur first so filled-in names and dates don't change the template's hash
+    small = img.filter(ImageFilter.GaussianBlur(2)).resize(
+        (LAYOUT_HASH_SIZE + 1, LAYOUT_HASH_SIZE), Image.LANCZOS
+    )
+    pixels = small.tobytes()
+    value = 0
+    for row in range(LAYOUT_HASH_SIZE):
+        offset = row * (LAYOUT_HASH_SIZE + 1)
+        for col in range(LAYOUT_HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{LAYOUT_HASH_SIZE * LAYOUT_HASH_SIZE // 4}x}"
+
+
+def layout_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class SenderSignature:
+    """Sender identity evidence from the first page of a document."""
+
+    __slots__ = ("numbers", "header_key", "layout_hash")
+
+    def __init__(self, numbers: list[str], header_key: Optional[str], layout_hash: Optional[str]):
+        self.numbers = numbers
+        self.header_key = header_key
+        self.layout_hash = layout_hash
+
+    def to_dict(self) -> dict:
+        return {'numbers': self.numbers, 'header_key': self.header_key, 'layout_hash': self.layout_hash}
+
+
+def sender_signature(pdf_path: str, exclude_numbers: tuple[str, ...] = (), page_number: int = 0) -> SenderSignature:
+    """
+    Read the sender signature of a PDF's cover page.
+
+    Args:
+        pdf_path: Path to the PDF file
+        exclude_numbers: Numbers that never identify a sender (our own fax number)
+        page_number: 0-based cover page
+
+    Raises:
+        PDFProcessingError: If PDF cannot be opened or read
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        raise PDFProcessingError(f"Failed to open PDF: {e}")
+
+    try:
+        if doc.is_encrypted:
+            raise PDFProcessingError("PDF is password-protected and cannot be processed")
+        try:
+            page = doc[page_number]
+            band = fitz.Rect(0, 0, page.rect.width, page.rect.height * HEADER_BAND)
+            text = page.get_text("text", clip=band, sort=True)
+            layout = layout_hash(page)
+        except Exception as e:
+            raise PDFProcessingError(f"Failed to read PDF cover page: {e}")
+        return SenderSignature(header_numbers(text, tuple(exclude_numbers)), header_key(text), layout)
+    finally:
+        doc.close()
+
+
+class SenderMatch:
+    """A known sender matched to a document, and how it was matched."""
+
+    def __init__(self, sender: dict, matched_by: str, distance: Optional[int] = None):
+        self.sender = sender
+        self.matched_by = matched_by  # "fax_number", "header" or "layout"
+        self.distance = distance
+
+    @property
+    def observations(self) -> int:
+        return self.sender['observations']
+
+    @property
+    def dominant_type(self) -> tuple[Optional[str], float]:
+        """Most common classified type and its share of this sender's faxes."""
+        counts = self.sender['type_counts']
+        total = sum(counts.values())
+        if not total:
+            return None, 0.0
+        label = max(counts, key=counts.get)
+        return label, counts[label] / total
+
+    def auto_type(self, auto_types: list[str], min_observations: int, min_share: float) -> Optional[str]:
+        """Type to classify as without the API, or None."""
+        label, share = self.dominant_type
+        if label in auto_types and self.observations >= min_observations and share >= min_share:
+            return label
+        return None
+
+    def hint(self) -> str:
+        """Hint sentence narrowing the API request to what this sender usually sends."""
+        counts = sorted(self.sender['type_counts'].items(), key=lambda item: -item[1])
+        history = ", ".join(f"{label} ×{count}" for label, count in counts if count > 0)
+        name = self.sender.get('sending_facility') or "an unnamed sender"
+        number = self.sender.get('fax_origin_number')
+        return (
+            f"The cover page matches a known sender, {name}"
+            f"{f' (fax {number})' if number else ''}, whose previous {self.observations}"
+            f" faxes were classified as: {history}."
+        )
+
+    def prefill(self, extracted_fields: dict) -> list[str]:
+        """Fill empty sender fields from the index. Returns the fields filled."""
+        filled = []
+        for field in PREFILL_FIELDS:
+            if not extracted_fields.get(field) and self.sender.get(field):
+                extracted_fields[field] = self.sender[field]
+                filled.append(field)
+        return filled
+
+    def to_classification(self, document_type: str, page_count: int) -> ClassificationResult:
+        """Classification stored when a known sender replaces the API call."""
+        _, share = self.dominant_type
+        extracted_fields = {
+            'urgency_indicators': [],
+            'key_details': (
+                f"Known {document_type} sender ({self.observations} prior faxes, "
+                f"matched by {self.matched_by}); API call skipped"
+            ),
+        }
+        self.prefill(extracted_fields)
+        data = {
+            'document_type': document_type,
+            'confidence': round(share, 4),
+            'priority': BASE_PRIORITY.get(document_type, "low"),
+            'extracted_fields': extracted_fields,
+            'flags': [],
+            'page_count_processed': page_count,
+        }
+        return ClassificationResult(data, 0, {"input_tokens": 0, "output_tokens": 0}, input_path="sender")
+
+    def to_dict(self) -> dict:
+        label, share = self.dominant_type
+        return {
+            'sender_id': self.sender['id'],
+            'matched_by': self.matched_by,
+            'distance': self.distance,
+            'observations': self.observations,
+            'dominant_type': label,
+            'dominant_share': round(share, 4),
+        }
+
+
+def match_sender(signature: SenderSignature, max_layout_distance: int = 24) -> Optional[SenderMatch]:
+    """
+    Find the known sender for a signature: by fax number, then header key,
+    then nearest layout hash. Header numbers are authoritative — a signature
+    with numbers that match no sender is a new sender.
+    """
+    if signature.numbers:
+        sender = db.find_sender_by_numbers(signature.numbers)
+        return SenderMatch(sender, "fax_number") if sender else None
+
+    if signature.header_key:
+        sender = db.find_sender_by_header(signature.header_key)
+        if sender:
+            return SenderMatch(sender, "header")
+
+    if signature.layout_hash:
+        best = None
+        for candidate in db.list_sender_layouts():
+            distance = layout_distance(signature.layout_hash, candidate['layout_hash'])
+            if distance <= max_layout_distance and (best is None or distance < best[1]):
+                best = (candidate['id'], distance)
+        if best:
+            return SenderMatch(db.get_sender(best[0]), "layout", best[1])
+    return None
+
+
+def record_classification(
+    signature: SenderSignature,
+    result: ClassificationResult,
+    match: Optional[SenderMatch] = None
+) -> int:
+    """Add a classified document to its sender (creating the sender if new). Returns the sender id."""
+    fields = result.extracted_fields or {}
+    origin = normalize_number(fields.get('fax_origin_number') or "")
+    if origin == normalize_number(settings.practice_fax_number):
+        origin = None
+    return db.record_sender_observation(
+        sender_id=match.sender['id'] if match else None,
+        document_type=result.document_type,
+        numbers=signature.numbers + ([origin] if origin and origin not in signature.numbers else []),
+        header_key=signature.header_key,
+        layout_hash=signature.layout_hash,
+        sending_facility=fields.get('sending_facility'),
+        fax_origin_number=fields.get('fax_origin_number')
+    )
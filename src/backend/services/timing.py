@@ -0,0 +1,105 @@
+"""
+FaxTriage AI — Per-Document Timing
+
+Breaks a document's processing time down by stage, and each stage by the
+work inside it (PDF open, rasterize, black-page checks, poppler fallback,
+encode, API attempts, retry waits, database time, ...), so a slow document
+shows where its time went.
+
+A DocumentTimer is carried by the document through the stages. stage()
+makes it the calling thread's active timer, so code deep inside a stage —
+the classifier's retry loop, every database connection — records into it
+with record() / part() without the timer being passed down. With no active
+timer these are a thread-local lookup and return.
+
+Parts can overlap (database time inside the text-layer step counts toward
+both), and time the document spent waiting between stages is reported as
+the stages' idle time.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+_local = threading.local()
+
+
+class DocumentTimer:
+    """Wall-clock milliseconds per stage, and per part within each stage, for one document."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.stages: dict[str, float] = {}
+        self.parts: dict[str, dict[str, float]] = {}
+        self.counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["DocumentTimer"]:
+        """Time a stage and make this timer the thread's active one while it runs."""
+        previous = getattr(_local, "active", None)
+        _local.active = (self, name)
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - started
+            _local.active = previous
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed * 1000
+
+    def add(self, stage: str, part: str, ms: float, count: int = 1):
+        with self._lock:
+            parts = self.parts.setdefault(stage, {})
+            parts[part] = parts.get(part, 0.0) + ms
+            counts = self.counts.setdefault(stage, {})
+            counts[part] = counts.get(part, 0) + count
+
+    def finish(self):
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        total_ms = (end - self.started) * 1000
+        with self._lock:
+            stages = {
+                name: {
+                    'ms': round(ms, 1),
+                    'parts': {part: round(part_ms, 1) for part, part_ms in self.parts.get(name, {}).items()},
+                    # Parts recorded more than once (API attempts, database connections, ...)
+                    'counts': {part: n for part, n in self.counts.get(name, {}).items() if n > 1},
+                }
+                for name, ms in self.stages.items()
+            }
+            busy_ms = sum(self.stages.values())
+        return {
+            'total_ms': round(total_ms, 1),
+            'stages': stages,
+            # Time between stages: pipeline queue waits and hand-offs
+            'idle_ms': round(max(total_ms - busy_ms, 0.0), 1),
+        }
+
+
+def active() -> Optional[tuple[DocumentTimer, str]]:
+    """The (timer, stage) the calling thread is recording into, if any."""
+    return getattr(_local, "active", None)
+
+
+def record(part: str, seconds: float, count: int = 1):
+    """Add time to a part of the active stage (no-op outside a timed stage)."""
+    current = getattr(_local, "active", None)
+    if current is not None:
+        timer, stage = current
+        timer.add(stage, part, seconds * 1000, count)
+
+
+@contextmanager
+def part(name: str) -> Iterator[None]:
+    """Time a block as a part of the active stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
@@ -0,0 +1,447 @@
+"""
+FaxTriage AI — Tracing
+
+Spans for each document's trip through the system — ingest, queue wait,
+each processing stage, every render task (with the worker process's own
+time) and every API attempt — so a slow fax shows exactly where its time
+went and in which thread or process.
+
+- A document's trace id is stored with the document, so a worker process
+  that classifies it continues the trace the upload started. Spans carry
+  the document id, the upload's request id, the thread and the process id.
+- The current span is a context variable. Threads that work on behalf of
+  a span (pipeline stages, render dispatch, bundle children) are handed it
+  explicitly with use_span() / bind().
+- Tail sampling: spans are buffered until the local root span ends (the
+  part of the trace this process recorded). Traces with an error or a root
+  slower than slow_ms are always kept; healthy ones are kept at sample_rate,
+  decided by the trace id so every process keeps or drops the same traces.
+- Kept spans are exported in the background, as JSON lines to a local
+  size-capped, rotated file or as OTLP/JSON to a collector (scripts/trace_collector.py stands in for
+  one locally). Export never blocks processing: a full queue drops batches.
+
+With tracing disabled every call here is a no-op.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def set_request_id(request_id: Optional[str]) -> contextvars.Token:
+    return _request_id.set(request_id)
+
+
+def get_request_id() -> Optional[str]:
+    """The id of the HTTP request being handled (X-Request-Id), if any."""
+    return _request_id.get()
+
+
+class Span:
+    """One timed operation in a trace."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "local_root",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 local_root: bool, attributes: dict, start_ns: Optional[int] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.local_root = local_root
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None, end_ns: Optional[int] = None):
+        if self.end_ns is not None:
+            return
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        self.tracer._finish(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict:
+        """The span in OTLP/JSON form."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # internal
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off."""
+
+    trace_id = None
+    span_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error: Optional[BaseException] = None, end_ns: Optional[int] = None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class FileExporter:
+    """
+    Appends spans to a file, one OTLP/JSON span per line. Once the file
+    reaches max_bytes it is rotated to path.1 (path.1 to path.2, ...),
+    keeping `backups` old files.
+    """
+
+    def __init__(self, path: Path, resource: dict, max_bytes: int = 50 * 1024 * 1024, backups: int = 3):
+        self.path = Path(path)
+        self.resource = resource
+        self.max_bytes = max_bytes
+        self.backups = max(backups, 0)
+
+    def _rotate(self):
+        try:
+            if self.path.stat().st_size < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        for i in range(self.backups, 0, -1):
+            source = self.path if i == 1 else self.path.with_name(f"{self.path.name}.{i - 1}")
+            try:
+                os.replace(source, self.path.with_name(f"{self.path.name}.{i}"))
+            except FileNotFoundError:
+                pass  # fewer backups so far, or another process rotated first
+        if not self.backups:
+            self.path.unlink(missing_ok=True)
+
+    def export(self, spans: list[Span]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.max_bytes:
+            self._rotate()
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps({**span.to_otlp(), 'resource': self.resource}) + "\n")
+
+
+class OTLPExporter:
+    """POSTs spans to an OTLP/HTTP collector's /v1/traces endpoint as JSON."""
+
+    def __init__(self, endpoint: str, resource: dict, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.resource = resource
+        self.timeout = timeout
+
+    def export(self, spans: list[Span]):
+        body = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute(k, v) for k, v in self.resource.items()]},
+                'scopeSpans': [{
+                    'scope': {'name': 'faxtriage'},
+                    'spans': [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Creates spans, tail-samples finished traces and exports the kept ones in the background."""
+
+    def __init__(
+        self,
+        exporter,
+        slow_ms: float = 30000,
+        sample_rate: float = 0.01,
+        max_spans_per_trace: int = 1000,
+        max_pending_traces: int = 10000,
+        export_queue_size: int = 1000
+    ):
+        self.exporter = exporter
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.max_spans_per_trace = max_spans_per_trace
+        self.max_pending_traces = max_pending_traces
+        self._lock = threading.Lock()
+        # trace id -> [finished spans, open local roots]
+        self._pending: "OrderedDict[str, list]" = OrderedDict()
+        # Decisions already made, for spans that finish after their local root
+        self._decided: "OrderedDict[str, bool]" = OrderedDict()
+        self._queue: queue.Queue = queue.Queue(maxsize=export_queue_size)
+        self.kept = 0
+        self.dropped = 0
+        self.export_dropped = 0
+        self._thread = threading.Thread(target=self._export_loop, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        trace_id: Optional[str] = None,
+        start_ns: Optional[int] = None,
+        **attributes
+    ) -> Span:
+        """
+        Start a span under `parent`, else as a local root in `trace_id`
+        (continuing a trace recorded elsewhere), else in a new trace.
+        """
+        attributes.setdefault('request.id', get_request_id())
+        attributes['thread.name'] = threading.current_thread().name
+        attributes['process.pid'] = os.getpid()
+        if isinstance(parent, Span):
+            span = Span(self, name, parent.trace_id, parent.span_id, False, attributes, start_ns)
+        else:
+            span = Span(self, name, trace_id or new_trace_id(), None, True, attributes, start_ns)
+        if span.local_root:
+            with self._lock:
+                entry = self._pending.get(span.trace_id)
+                if entry is None:
+                    entry = self._pending[span.trace_id] = [[], 0]
+                entry[1] += 1
+                self._evict()
+        return span
+
+    def _evict(self):
+        # Traces whose roots never ended (a crashed thread) can't pile up forever
+        while len(self._pending) > self.max_pending_traces:
+            trace_id, (spans, _) = self._pending.popitem(last=False)
+            self._decide(trace_id, spans, None)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            entry = self._pending.get(span.trace_id)
+            if entry is None:
+                decision = self._decided.get(span.trace_id)
+                if decision:
+                    self._enqueue([span])
+                return
+            if len(entry[0]) < self.max_spans_per_trace:
+                entry[0].append(span)
+            if span.local_root:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._pending[span.trace_id]
+                    self._decide(span.trace_id, entry[0], span)
+
+    def _decide(self, trace_id: str, spans: list[Span], root: Optional[Span]):
+        if any(s.error for s in spans):
+            reason = "error"
+        elif root is not None and root.duration_ms >= self.slow_ms:
+            reason = "slow"
+        elif int(trace_id[:8], 16) / 0xFFFFFFFF < self.sample_rate:
+            reason = "sampled"
+        else:
+            reason = None
+
+        self._decided[trace_id] = reason is not None
+        while len(self._decided) > self.max_pending_traces:
+            self._decided.popitem(last=False)
+        if reason is None:
+            self.dropped += 1
+            return
+        self.kept += 1
+        if root is not None:
+            root.attributes['sampling.reason'] = reason
+        self._enqueue(spans)
+
+    def _enqueue(self, spans: list[Span]):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.export_dropped += 1
+
+    def _export_loop(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                self.export_dropped += 1
+                logger.warning("Trace export failed (%d spans): %s", len(spans), e)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Export what's queued, then stop the export thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'kept_traces': self.kept,
+            'dropped_traces': self.dropped,
+            'pending_traces': pending,
+            'export_dropped': self.export_dropped,
+            'export_queue': self._queue.qsize(),
+        }
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The process-wide tracer, or None when tracing is disabled."""
+    global _tracer
+    if not settings.tracing_enabled:
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                resource = {
+                    'service.name': settings.tracing_service_name,
+                    'host.name': socket.gethostname(),
+                    'process.pid': os.getpid(),
+                }
+                if settings.tracing_otlp_endpoint:
+                    exporter = OTLPExporter(settings.tracing_otlp_endpoint, resource)
+                else:
+                    exporter = FileExporter(
+                        settings.tracing_file, resource,
+                        max_bytes=settings.tracing_file_max_mb * 1024 * 1024,
+                        backups=settings.tracing_file_backups
+                    )
+                _tracer = Tracer(
+                    exporter,
+                    slow_ms=settings.tracing_slow_ms,
+                    sample_rate=settings.tracing_sample_rate
+                )
+    return _tracer
+
+
+def shutdown_tracer():
+    global _tracer
+    with _tracer_lock:
+        tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.shutdown()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, **attributes):
+    """Start a span under the current one without making it current; the caller ends it."""
+    tracer = get_tracer()
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, parent=_current.get(), **attributes)
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None, **attributes) -> Iterator:
+    """
+    Run a block as a span — under `parent`, else the current span, else as a
+    local root of `trace_id` (or a new trace) — and make it current. An
+    exception leaving the block marks the span as failed.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    started = tracer.start_span(name, parent=parent or _current.get(), trace_id=trace_id, **attributes)
+    token = _current.set(started)
+    try:
+        yield started
+    except BaseException as e:
+        started.end(error=e)
+        raise
+    finally:
+        _current.reset(token)
+        started.end()
+
+
+def add_span(name: str, start_ns: int, end_ns: int, error: Optional[BaseException] = None, **attributes):
+    """Record an already-finished operation (timed elsewhere) under the current span."""
+    tracer = get_tracer()
+    parent = _current.get()
+    if tracer is None or parent is None:
+        return
+    tracer.start_span(name, parent=parent, start_ns=start_ns, **attributes).end(error=error, end_ns=end_ns)
+
+
+@contextmanager
+def use_span(parent) -> Iterator[None]:
+    """Make a span current in this thread (work done on another thread's behalf)."""
+    if not isinstance(parent, Span):
+        yield
+        return
+    token = _current.set(parent)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func to run under the span current now, in whichever thread calls it."""
+    parent = _current.get()
+    if parent is None:
+        return func
+
+    def run(*args, **kwargs):
+        with use_span(parent):
+            return func(*args, **kwargs)
+    return run
@@ -0,0 +1,130 @@
+"""
+FaxTriage AI — Urgency Sniffing
+
+A cheap pre-pass at ingest that looks for the urgency phrases the
+classification prompt asks the model to extract ("CRITICAL VALUE", "STAT",
+"PANIC VALUE", ...) in the first pages' text layer and turns them into a
+provisional urgency score, 0-100. The score only orders the classification
+queue — the classification itself still assigns the document's priority.
+
+Image-only faxes have no text to sniff at ingest and score 0; they are
+protected from starvation by queue aging like any other low-scoring document.
+
+Forms list urgency phrases as options ("X Urgent / STAT / Routine",
+"X APPROVED / DENIED"). In a block of lines where one option is ticked, the
+unticked option lines are ignored. This only recognizes ticks that made it
+into the text layer as a mark (X, [x], ☒, ✓, ...) on the option's line; a
+form whose boxes are drawn as graphics, or ticked by hand on a scan, can
+still score from an unticked option until classification corrects it.
+
+Text is read in a render worker: the upload is untrusted and isn't parsed
+in the API process.
+"""
+import re
+from typing import Optional
+
+from ..prompts.classification import CLASSIFICATION_PROMPT
+from .pdf_processor import PDFProcessingError, extract_page_texts
+from .render_pool import run_render
+
+# Weight of each phrase; the prompt's list is the source of truth for which
+# phrases are sniffed, phrases not weighted here score DEFAULT_WEIGHT
+PHRASE_WEIGHTS = {
+    "CRITICAL VALUE": 100,
+    "PANIC VALUE": 100,
+    "STAT": 90,
+    "URGENT": 70,
+    "IMMEDIATE": 60,
+    "APPEAL DEADLINE": 60,
+    "TIME-SENSITIVE": 60,
+    "ASAP": 60,
+    "out of medication": 60,
+    "ABNORMAL": 50,
+    "DENIED": 40,
+    "0 refills": 40,
+}
+DEFAULT_WEIGHT = 40
+
+# Each additional distinct phrase adds this much, up to 100
+EXTRA_PHRASE_BONUS = 5
+
+# Short acronyms only count in capitals ("stat" is common in ordinary prose)
+CASE_SENSITIVE_PHRASES = {"STAT", "ASAP"}
+
+
+def prompt_urgency_phrases(prompt: str = CLASSIFICATION_PROMPT) -> list[str]:
+    """The quoted phrases of the prompt's 'Urgency Indicators to Extract' list."""
+    match = re.search(r"## Urgency Indicators to Extract\s*\n(.*)", prompt)
+    return re.findall(r'"([^"]+)"', match.group(1)) if match else list(PHRASE_WEIGHTS)
+
+
+def _phrase_pattern(phrase: str) -> re.Pattern:
+    flags = 0 if phrase in CASE_SENSITIVE_PHRASES else re.IGNORECASE
+    return re.compile(rf"(?<![\w-]){re.escape(phrase)}(?![\w-])", flags)
+
+
+URGENCY_PATTERNS = [(phrase, _phrase_pattern(phrase)) for phrase in prompt_urgency_phrases()]
+
+# A ticked option: a mark at the start of the line or after whitespace ("DETERMINATION:  X APPROVED")
+CHECKED_OPTION = re.compile(r"(?:^|\s)(?:\[\s*[xX✓✔]\s*\]|\([xX]\)|[X☒☑✓✔■])\s+\w")
+# Unticked options are short lines in the same block
+MAX_OPTION_CHARS = 60
+
+
+def strip_unchecked_options(text: str) -> str:
+    """Drop the unticked lines of checkbox option lists (blocks of lines with a ticked option)."""
+    lines = text.split("\n")
+    kept = []
+    block: list[str] = []
+    for line in lines + [""]:
+        if line.strip():
+            block.append(line)
+            continue
+        if len(block) > 1 and any(CHECKED_OPTION.search(option) for option in block):
+            block = [
+                option for option in block
+                if CHECKED_OPTION.search(option) or len(option.strip()) > MAX_OPTION_CHARS
+            ]
+        kept.extend(block)
+        kept.append(line)
+        block = []
+    return "\n".join(kept[:-1])
+
+
+class UrgencySniff:
+    """Provisional urgency of a document and the phrases behind it."""
+
+    __slots__ = ("score", "phrases", "chars")
+
+    def __init__(self, score: int, phrases: list[str], chars: int):
+        self.score = score
+        self.phrases = phrases
+        self.chars = chars  # text sniffed; 0 for image-only faxes
+
+    def to_dict(self) -> dict:
+        return {'score': self.score, 'phrases': self.phrases, 'chars': self.chars}
+
+
+def score_urgency(text: str) -> UrgencySniff:
+    """Score text by its strongest urgency phrase, plus a bonus per extra phrase."""
+    sniffed = strip_unchecked_options(text)
+    phrases = [phrase for phrase, pattern in URGENCY_PATTERNS if pattern.search(sniffed)]
+    if not phrases:
+        return UrgencySniff(0, [], len(text))
+    weights = sorted((PHRASE_WEIGHTS.get(p, DEFAULT_WEIGHT) for p in phrases), reverse=True)
+    score = min(100, weights[0] + EXTRA_PHRASE_BONUS * (len(weights) - 1))
+    return UrgencySniff(score, phrases, len(text))
+
+
+def sniff_urgency(pdf_path: str, page_count: Optional[int], max_pages: int = 3) -> UrgencySniff:
+    """
+    Provisional urgency of a PDF from the text layer of its first max_pages
+    pages. Never raises: unreadable PDFs score 0 and are left to preflight.
+    """
+    if not page_count:
+        return UrgencySniff(0, [], 0)
+    try:
+        pages = run_render(extract_page_texts, pdf_path, page_numbers=list(range(min(page_count, max_pages))))
+    except PDFProcessingError:
+        return UrgencySniff(0, [], 0)
+    return score_urgency("\n".join(page.text for page in pages if page.usable))
@@ -0,0 +1,289 @@
+"""
+FaxTriage AI — Classification Queue
+
+Uploaded documents wait in the documents table for a classification worker,
+ordered by the provisional urgency score sniffed at ingest instead of
+arrival order:
+
+- Effective priority is urgency + aging_per_minute × minutes queued, so a
+  junk fax that has waited long enough outranks a fresh urgent one and
+  low-priority work can't starve.
+- Documents scoring at least the express threshold are in the express lane.
+  General workers take the best document from either lane; express workers
+  only claim express documents, so a burst of junk can't occupy every
+  worker while a critical lab value waits.
+
+Workers claim documents with a lease: the claim is a single SQLite write
+transaction, so any number of threads, uvicorn workers or worker processes
+(python -m src.backend.worker) can share one database without two of
+them classifying — and paying for — the same document. A worker heartbeats
+its lease while it works. If the worker dies, the lease expires and the
+document becomes claimable again; a document whose lease expires on its
+max_attempts-th claim is marked as an error instead of retried forever.
+A worker that loses its lease (it stalled past the lease, or its heartbeat
+found another owner) stops before calling the API or storing a result: the
+document's lease_lost flag is checked between stages, and the result is
+only written while the worker still owns the lease.
+
+Queue wait is measured per document and reported per lane.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+from .. import database as db
+
+logger = logging.getLogger(__name__)
+
+EXPRESS = "express"
+NORMAL = "normal"
+
+
+class LeaseLostError(Exception):
+    """The worker's lease on a document expired and another worker may be classifying it."""
+    pass
+
+
+class QueuedDocument:
+    """A document leased by a classification worker."""
+
+    __slots__ = (
+        "doc_id", "file_path", "urgency", "lane", "enqueued_at", "started_at", "attempt", "owner", "trace_id",
+        "lease_lost",
+    )
+
+    def __init__(
+        self,
+        doc_id: int,
+        file_path: str,
+        urgency: int,
+        lane: str,
+        enqueued_at: float,
+        started_at: float,
+        attempt: int,
+        owner: str,
+        trace_id: Optional[str] = None
+    ):
+        self.doc_id = doc_id
+        self.file_path = file_path
+        self.urgency = urgency
+        self.lane = lane
+        self.enqueued_at = enqueued_at  # epoch seconds
+        self.started_at = started_at
+        self.attempt = attempt
+        self.owner = owner
+        self.trace_id = trace_id  # continued by the worker that classifies it
+        self.lease_lost = False  # set by the heartbeat; the worker must stop
+
+    @property
+    def wait_ms(self) -> int:
+        """Time from enqueue to this claim (includes earlier failed attempts)."""
+        return max(int((self.started_at - self.enqueued_at) * 1000), 0)
+
+
+class ClassificationQueue:
+    """Database-backed priority queue with aging, an express lane and leased claims."""
+
+    def __init__(
+        self,
+        handler: Callable[[QueuedDocument], object],
+        workers: int = 3,
+        express_workers: int = 1,
+        express_threshold: int = 60,
+        aging_per_minute: float = 5.0,
+        lease_seconds: float = 120.0,
+        heartbeat_seconds: float = 30.0,
+        max_attempts: int = 3,
+        poll_seconds: float = 1.0
+    ):
+        self.handler = handler
+        self.workers = max(workers, 0)
+        self.express_workers = max(express_workers, 0)
+        self.express_threshold = express_threshold
+        self.aging_per_minute = aging_per_minute
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.poll_seconds = poll_seconds
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+        self._active = 0  # documents this process holds a lease on
+
+    def lane_for(self, urgency: int) -> str:
+        return EXPRESS if urgency >= self.express_threshold else NORMAL
+
+    def submit(self, doc_id: int):
+        """Queue a document for classification by any worker sharing the database."""
+        db.enqueue_document(doc_id, time.time())
+        with self._cond:
+            self._submitted += 1
+            self._cond.notify_all()
+
+    def wait(self, doc_id: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a document has left the queue — classified by this or any
+        other process, or abandoned. False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while db.is_queued(doc_id):
+            remaining = self.poll_seconds if deadline is None else min(deadline - time.monotonic(), self.poll_seconds)
+            if remaining <= 0:
+                return False
+            with self._cond:
+                self._cond.wait(remaining)
+        return True
+
+    def _claim(self, owner: str, express_only: bool) -> Optional[QueuedDocument]:
+        now = time.time()
+        row = db.claim_document(
+            owner,
+            now,
+            lease_seconds=self.lease_seconds,
+            max_attempts=self.max_attempts,
+            aging_per_minute=self.aging_per_minute,
+            min_urgency=self.express_threshold if express_only else None
+        )
+        if row is None:
+            return None
+        urgency = row['urgency_score'] or 0
+        return QueuedDocument(
+            row['id'], row['file_path'], urgency, self.lane_for(urgency),
+            row['queued_at'], now, row['attempts'], owner, row['trace_id']
+        )
+
+    def _heartbeat(self, item: QueuedDocument, finished: threading.Event):
+        interval = self.heartbeat_seconds
+        while not finished.wait(interval):
+            try:
+                renewed = db.renew_lease(item.doc_id, item.owner, time.time() + self.lease_seconds)
+            except Exception:
+                # A busy database mustn't end the heartbeat; retry soon, while the lease lasts
+                logger.exception("Lease renewal failed for document %s; retrying", item.doc_id)
+                interval = min(self.heartbeat_seconds, 1.0)
+                continue
+            interval = self.heartbeat_seconds
+            if not renewed:
+                logger.warning("Lost the lease on document %s (%s); abandoning it", item.doc_id, item.owner)
+                item.lease_lost = True
+                return
+
+    def _worker(self, express_only: bool):
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._stopping:
+            with self._cond:
+                seen = self._submitted
+            try:
+                item = self._claim(owner, express_only)
+            except Exception:
+                logger.exception("Classification queue claim failed")
+                item = None
+            if item is None:
+                # Local submits wake us at once; work queued by other processes
+                # is picked up on the next poll
+                with self._cond:
+                    if self._submitted == seen and not self._stopping:
+                        self._cond.wait(self.poll_seconds)
+                continue
+
+            with self._cond:
+                self._active += 1
+            finished = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(item, finished), daemon=True)
+            heartbeat.start()
+            try:
+                self.handler(item)
+            except Exception:  # keep the worker alive; the document is released below
+                logger.exception("Classification worker failed on document %s", item.doc_id)
+            finally:
+                finished.set()
+                if not db.release_document(item.doc_id, owner):
+                    logger.warning("Document %s was reclaimed before %s finished it", item.doc_id, owner)
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping = False
+        for i in range(self.workers + self.express_workers):
+            express_only = i >= self.workers
+            thread = threading.Thread(
+                target=self._worker,
+                args=(express_only,),
+                name=f"classify-{'express' if express_only else 'general'}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop claiming and let workers finish their current document. Queued
+        documents stay in the database for the next start or another process;
+        a document still in flight after the timeout is reclaimed when its
+        lease expires.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> dict:
+        """Live depth, in-flight and expired leases, and oldest wait per lane, across all processes."""
+        now = time.time()
+        depth = db.get_queue_depth(now, self.express_threshold)
+        lanes = {}
+        for lane in (EXPRESS, NORMAL):
+            row = depth.get(lane) or {}
+            oldest = row.get('oldest_queued_at')
+            lanes[lane] = {
+                'depth': row.get('waiting') or 0,
+                'in_flight': row.get('in_flight') or 0,
+                'expired_leases': row.get('expired') or 0,
+                'oldest_wait_ms': int((now - oldest) * 1000) if oldest is not None else None,
+            }
+        return {
+            'workers': self.workers,
+            'express_workers': self.express_workers,
+            'express_threshold': self.express_threshold,
+            'aging_per_minute': self.aging_per_minute,
+            'lease_seconds': self.lease_seconds,
+            'max_attempts': self.max_attempts,
+            'local_in_flight': self._active,
+            'lanes': lanes,
+        }
+
+
+_queue: Optional[ClassificationQueue] = None
+_queue_lock = threading.Lock()
+
+
+def start_classification_queue(handler: Callable[[QueuedDocument], object], **kwargs) -> ClassificationQueue:
+    """Create and start the process-wide queue (idempotent)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ClassificationQueue(handler, **kwargs)
+            _queue.start()
+        return _queue
+
+
+def get_classification_queue() -> Optional[ClassificationQueue]:
+    """The running queue, or None when uploads are classified inline."""
+    return _queue
+
+
+def stop_classification_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.stop()
+            _queue = None
@@ -0,0 +1,100 @@
+"""
+FaxTriage AI — Standalone Classification Worker
+
+Runs classification workers against the shared database without the API,
+so classification can scale out in separate processes or containers. Set
+CLASSIFICATION_WORKERS=0 and EXPRESS_LANE_WORKERS=0 on the API servers to
+make them ingest only. Workers lease documents, so any number of these can
+run side by side; a worker killed mid-document has its documents reclaimed
+when their leases expire.
+
+Part of the backend package so it ships in the API image; a worker
+container runs the same image with a different command.
+
+Usage:
+    python -m src.backend.worker
+    python -m src.backend.worker --workers 4 --express-workers 2
+    python -m src.backend.worker --metrics-port 9108
+"""
+import argparse
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import settings
+from . import database as db
+from .services.document_service import start_classification_workers, start_document_pipeline
+from .routers.metrics import CONTENT_TYPE, render_metrics
+from .services.pipeline import stop_pipeline
+from .services.render_pool import shutdown_render_pool
+from .services.tracing import shutdown_tracer
+from .services.work_queue import stop_classification_queue
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics for Prometheus; the worker has no API server."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per scrape is noise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run classification workers on the shared queue")
+    parser.add_argument("--workers", type=int, default=settings.classification_workers,
+                        help="General workers (any lane)")
+    parser.add_argument("--express-workers", type=int, default=settings.express_lane_workers,
+                        help="Workers reserved for the express lane")
+    parser.add_argument("--metrics-port", type=int, default=settings.metrics_worker_port,
+                        help="Serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args()
+
+    if not settings.anthropic_api_key:
+        print("ERROR: ANTHROPIC_API_KEY is not set.")
+        sys.exit(1)
+    if args.workers + args.express_workers < 1:
+        print("ERROR: need at least one worker.")
+        sys.exit(1)
+
+    settings.classification_workers = args.workers
+    settings.express_lane_workers = args.express_workers
+    db.init_database()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    if settings.pipeline_enabled:
+        start_document_pipeline()
+    start_classification_workers()
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = ThreadingHTTPServer(("0.0.0.0", args.metrics_port), MetricsHandler)
+        threading.Thread(target=metrics_server.serve_forever, daemon=True).start()
+        print(f"Metrics on http://0.0.0.0:{args.metrics_port}/metrics")
+    print(f"Classifying with {args.workers} general + {args.express_workers} express workers "
+          f"({settings.database_path}). Ctrl-C to stop.")
+    stopping.wait()
+
+    print("Stopping — finishing documents in flight...")
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    stop_classification_queue()
+    stop_pipeline()
+    shutdown_render_pool()
+    shutdown_tracer()
+
+
+if __name__ == "__main__":
+    main()
@@ -70,6 +70,13 @@ export async function getDocument(id) {
   return fetchApi(`/documents/${id}`)
 }
 
+/**
+ * Get the segments split out of a multi-document bundle
+ */
+export async function getDocumentChildren(id) {
+  return fetchApi(`/documents/${id}/children`)
+}
+
 /**
  * Update a document
  * @param {number} id - Document ID
@@ -105,6 +112,11 @@ export async function uploadDocuments(files, onProgress) {
 
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: 'Upload failed' }))
+    // Admission refusals (429/503) carry { error, retry_after, backlog }
+    if (error.detail?.error) {
+      const retry = response.headers.get('Retry-After')
+      throw new Error(retry ? `${error.detail.error} — try again in ${retry}s` : error.detail.error)
+    }
     throw new Error(error.detail || `HTTP ${response.status}`)
   }
 
@@ -1,9 +1,9 @@
-import { useState } from 'react'
+import { useState, useEffect } from 'react'
 import { DOCUMENT_TYPES, PRIORITIES, CONFIDENCE_THRESHOLDS } from '../constants'
 import FlagBadge from './FlagBadge'
 import ActionButtons from './ActionButtons'
 import PdfViewer from './PdfViewer'
-import { updateDocument, getPdfUrl } from '../api'
+import { updateDocument, getPdfUrl, getDocumentChildren } from '../api'
 
 function toTitleCase(name) {
   if (!name) return name
@@ -92,6 +92,53 @@ function InfoRow({ label, value, mono = false }) {
   )
 }
 
+function formatPageRange(start, end) {
+  return start === end ? `p. ${start}` : `pp. ${start}–${end}`
+}
+
+function BundleSegments({ documentId }) {
+  const [segments, setSegments] = useState([])
+
+  useEffect(() => {
+    let cancelled = false
+    setSegments([])
+    getDocumentChildren(documentId)
+      .then(children => { if (!cancelled) setSegments(children) })
+      .catch(err => console.error('Failed to load bundle segments:', err))
+    return () => { cancelled = true }
+  }, [documentId])
+
+  if (segments.length === 0) {
+    return null
+  }
+
+  return (
+    <div className="px-4 py-3 border-b border-gray-200">
+      <h3 className="text-xs font-semibold text-gray-400 uppercase mb-2">Bundle Segments</h3>
+      <div className="flex flex-col gap-2">
+        {segments.map(segment => (
+          <button
+            key={segment.id}
+            onClick={() => window.open(getPdfUrl(segment.id), '_blank')}
+            className="flex items-center justify-between gap-2 text-left rounded p-2 hover:bg-gray-50"
+            title="Open segment PDF in new tab"
+          >
+            <span className="text-sm text-gray-500 font-mono whitespace-nowrap">
+              {formatPageRange(segment.page_start, segment.page_end)}
+            </span>
+            <span className="flex-1 text-sm text-gray-900 truncate">
+              {toTitleCase(segment.extracted_fields?.patient_name) || '—'}
+            </span>
+            {segment.status === 'processing' || segment.status === 'pending'
+              ? <span className="text-xs text-gray-400">Processing…</span>
+              : <TypeBadge type={segment.document_type} />}
+          </button>
+        ))}
+      </div>
+    </div>
+  )
+}
+
 export default function DocumentDetail({ document, onClose, onAction }) {
   const [isLoading, setIsLoading] = useState(false)
 
@@ -109,7 +156,12 @@ export default function DocumentDetail({ document, onClose, onAction }) {
     extracted_fields,
     upload_time,
     processing_time_ms,
-    filename
+    filename,
+    parent_id,
+    page_start,
+    page_end,
+    pdf_category,
+    processing_route
   } = document
 
   const patientName = extracted_fields?.patient_name || 'Unknown Patient'
@@ -286,9 +338,24 @@ export default function DocumentDetail({ document, onClose, onAction }) {
             mono
           />
           <InfoRow label="Filename" value={filename} mono />
+          {parent_id && (
+            <InfoRow
+              label="Bundle Pages"
+              value={`#${parent_id}, ${formatPageRange(page_start, page_end)}`}
+              mono
+            />
+          )}
+          {pdf_category && (
+            <InfoRow label="PDF Type" value={`${pdf_category} (${processing_route})`} mono />
+          )}
         </div>
       </div>
 
+      {/* Segments split out of a multi-document bundle */}
+      {!parent_id && flags?.includes('multi_document_bundle') && (
+        <BundleSegments documentId={id} />
+      )}
+
       {/* PDF Preview */}
       <div className="px-4 py-3 border-b border-gray-200">
         <div className="flex items-center justify-between mb-2">